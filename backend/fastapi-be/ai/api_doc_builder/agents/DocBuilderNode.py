@@ -1,6 +1,5 @@
 from typing import Dict, List
-from ai.utils.get_llm_response import get_llm_response
-from ai.utils.parse_json_response import parse_json_response
+from ai.utils.get_llm_response import get_llm_json_response
 from ai.api_doc_builder.graph.BuilderGraphState import BuilderGraphState
 from ai.api_doc_builder.prompts.get_doc_builder_prompt import get_doc_builder_prompt
 from configs.logger import get_custom_logger
@@ -29,10 +28,7 @@ def generate_snippet_with_llm(batch: Dict[str, List[Dict]]) -> List[Dict]:
     )
 
     try:
-        response = get_llm_response(prompt, system_prompt)
-        snippets = parse_json_response(response)
-        if not isinstance(snippets, dict):
-            raise ValueError(f"Invalid JSON response for batch: {response}")
+        snippets = get_llm_json_response(prompt, system_prompt, stage="doc_builder", expected_type=dict)
         # Convert collection-wise snippets to list for compatibility
         snippet_list = []
         for collection_name, paths in snippets.items():
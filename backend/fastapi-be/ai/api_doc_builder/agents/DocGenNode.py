@@ -1,12 +1,14 @@
 import uuid
 import time
-from typing import Dict, List
-from ai.utils.get_llm_response import get_llm_response
-from ai.utils.parse_json_response import parse_json_response
+from typing import Dict, List, Tuple
+from ai.utils.get_llm_response import get_llm_json_response, is_unusable_answer, UnusableLLMResponse
+from ai.utils.bisecting_executor import run_bisecting
+from langchain_core.runnables import RunnableConfig
+from ai.utils.run_graph import node_events
 from ai.api_doc_builder.prompts.get_code_generation_prompt import get_code_snippets_prompt
 from ai.api_doc_builder.graph.BuilderGraphState import BuilderGraphState
 from configs.logger import get_custom_logger
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception
 from requests.exceptions import RequestException
 
 logger = get_custom_logger(__name__)
@@ -14,26 +16,42 @@ logger = get_custom_logger(__name__)
 @retry(
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=1, min=2, max=10),
-    retry=retry_if_exception_type((RequestException, ValueError)),
+    # An answer that came back unusable is split up by the bisecting executor instead of re-sent whole.
+    retry=retry_if_exception(lambda e: isinstance(e, (RequestException, ValueError)) and not is_unusable_answer(e)),
+    reraise=True,
     before_sleep=lambda retry_state: logger.info(f"Retrying LLM call (attempt {retry_state.attempt_number})...")
 )
-def generate_snippet_with_llm(batch: Dict[str, List[Dict]]) -> Dict[str, Dict]:
+def request_snippets(items: List[Tuple[str, Dict]], bypass_cache: bool = False) -> Dict[str, Dict]:
+    """One LLM call for the snippets of (collection name, endpoint) items; an empty answer is unusable."""
+    batch: Dict[str, List[Dict]] = {}
+    for collection_name, ep in items:
+        batch.setdefault(collection_name, []).append(ep)
     prompt = get_code_snippets_prompt(batch)
     system_prompt = (
         "You are a precise API documentation generator. "
         "Only generate code_snippets (curl, python, js, ts, php) for the given endpoints. "
         "Preserve their IDs, do not modify the structure."
     )
+    answer = get_llm_json_response(prompt, system_prompt, stage="doc_snippets", expected_type=dict, bypass_cache=bypass_cache)
+    if not answer:
+        raise UnusableLLMResponse("{}")
+    return answer
 
-    try:
-        response = get_llm_response(prompt, system_prompt)
-        parsed = parse_json_response(response)
-        return parsed if isinstance(parsed, dict) else {}
-    except Exception as e:
-        logger.error(f"Failed to generate snippets: {e}")
-        return {}
+def settle_snippets(items: List[Tuple[str, Dict]], answer: Dict[str, Dict], complete: bool):
+    """Keeps the snippets of the endpoints an answer covers; the others are asked for again."""
+    answer = answer or {}
+    kept = {ep["id"]: answer[ep["id"]] for _, ep in items if isinstance(answer.get(ep["id"]), dict)}
+    return kept, [item for item in items if item[1]["id"] not in kept]
 
-def DocGeneratorNode(state: BuilderGraphState) -> BuilderGraphState:
+def generate_snippet_with_llm(batch: Dict[str, List[Dict]]) -> Dict[str, Dict]:
+    """
+    Snippets of a batch by endpoint ID. Failed requests are retried; endpoints whose
+    snippets are missing or unparseable are asked for again in halves, not the whole batch.
+    """
+    items = [(collection_name, ep) for collection_name, endpoints in batch.items() for ep in endpoints]
+    return run_bisecting("Snippet batch", items, request_snippets, expected_type=dict, settle=settle_snippets).result
+
+def DocGeneratorNode(state: BuilderGraphState, config: RunnableConfig) -> BuilderGraphState:
     batches = state.get("batched_endpoints", [])
     if not batches:
         logger.warning("No batches to process.")
@@ -48,6 +66,7 @@ def DocGeneratorNode(state: BuilderGraphState) -> BuilderGraphState:
     }
 
     doc_snippets: Dict[str, List[Dict]] = {}
+    emit = node_events(config)
     start = time.time()
 
     for i, batch in enumerate(batches):
@@ -64,12 +83,19 @@ def DocGeneratorNode(state: BuilderGraphState) -> BuilderGraphState:
                 state["metrics"]["total_endpoints"] += 1
             enriched_batch[collection_name] = enriched_endpoints
 
-        snippet_response = generate_snippet_with_llm(enriched_batch)
+        try:
+            snippet_response = generate_snippet_with_llm(enriched_batch)
+        except Exception as e:
+            logger.error(f"Failed to generate snippets for batch {i + 1}: {e}")
+            snippet_response = {}
 
         if not snippet_response:
             logger.warning(f"No snippets generated for batch {i + 1}.")
+            emit({"event": "batch", "stage": "documentation", "batch_index": i, "batch_count": len(batches), "count": 0, "doc_snippets": {}})
             continue
 
+        batch_snippets: Dict[str, List[Dict]] = {}
+
         for collection_name, endpoints in enriched_batch.items():
             if collection_name not in doc_snippets:
                 doc_snippets[collection_name] = []
@@ -83,7 +109,7 @@ def DocGeneratorNode(state: BuilderGraphState) -> BuilderGraphState:
                 code_snips = snippet_response.get(ep_id, {})
 
                 # Attach as: { "path": ..., "code_snippets": {...} }
-                doc_snippets[collection_name].append({
+                batch_snippets.setdefault(collection_name, []).append({
                     **ep,
                     "code_snippets": {
                         "Bash": code_snips.get("bash", ""),
@@ -96,6 +122,11 @@ def DocGeneratorNode(state: BuilderGraphState) -> BuilderGraphState:
 
                 state["metrics"]["total_snippets"] += 1
 
+        for collection_name, snippets in batch_snippets.items():
+            doc_snippets[collection_name].extend(snippets)
+        emit({"event": "batch", "stage": "documentation", "batch_index": i, "batch_count": len(batches),
+              "count": sum(len(snippets) for snippets in batch_snippets.values()), "doc_snippets": batch_snippets})
+
     state["metrics"]["execution_time"] = time.time() - start
     state["doc_snippets"] = doc_snippets
 
@@ -1,19 +1,23 @@
 from ai.api_doc_builder.graph.doc_builder_graph import create_doc_builder_graph
 from ai.api_doc_builder.graph.BuilderGraphState import BuilderGraphState
+from ai.utils.run_graph import run_graph, UpdateCallback, EventCallback
 from configs.logger import get_custom_logger
+from typing import Optional
 
 logger = get_custom_logger(__name__)
 
 graph = create_doc_builder_graph()
 
-async def invoke_doc_graph(state: BuilderGraphState) -> BuilderGraphState:
+async def invoke_doc_graph(state: BuilderGraphState, on_update: Optional[UpdateCallback] = None, on_event: Optional[EventCallback] = None) -> BuilderGraphState:
     """
     Invoke the graph to process backend files and extract OpenAPI endpoints.
+    `on_update` receives each node's result as it finishes and `on_event`
+    the per-batch events nodes emit.
     """
 
     logger.info("Starting graph invocation...")
     try:
-        updated_state =await graph.ainvoke(state)
+        updated_state =await run_graph(graph, state, on_update=on_update, on_event=on_event)
         print(updated_state.keys())
         logger.info("Graph invocation completed successfully.")
     except Exception as e:
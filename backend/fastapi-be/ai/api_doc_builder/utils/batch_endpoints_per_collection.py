@@ -1,22 +1,19 @@
 from typing import List, Dict
-import json
-import tiktoken
 from dotenv import load_dotenv
 import os
 
+from ai.utils.tokenizer import count_json_tokens
+
 load_dotenv()
 MAX_TOKENS_PER_DOC_BATCH = int(os.getenv("MAX_TOKENS_PER_DOC_BATCH", 1000))
 
-def estimate_tokens(endpoints: List[Dict], encoding_name: str = "cl100k_base") -> int:
+def estimate_tokens(endpoints: List[Dict]) -> int:
     """
-    Estimates the token count for a list of endpoints using tiktoken.
+    Estimates the token count for a list of endpoints as JSON. Endpoints are counted
+    one by one, so unchanged endpoints hit the token-count memo on later runs;
+    one token per element covers the list's separators.
     """
-    try:
-        encoding = tiktoken.get_encoding(encoding_name)
-        endpoints_str = json.dumps(endpoints)
-        return len(encoding.encode(endpoints_str))
-    except Exception:
-        return len(json.dumps(endpoints)) // 4  # Fallback: 1 token ≈ 4 characters
+    return sum(count_json_tokens(endpoints)) + len(endpoints) + 1
 
 def batch_endpoints(endpoints: Dict[str, List[Dict]], max_token_per_doc_batch: int = MAX_TOKENS_PER_DOC_BATCH) -> List[Dict[str, List[Dict]]]:
     """
@@ -0,0 +1,104 @@
+import asyncio
+from typing import Dict, List
+from ai.utils.get_llm_response import aget_llm_json_response
+from ai.utils.gather_bounded import gather_bounded
+from ai.api_extractor.graph.GraphState import GraphState
+from ai.api_extractor.prompts.get_endpoint_enrichment_prompt import get_endpoint_enrichment_prompt
+from ai.api_extractor.utils.batch_chunks import MAX_TOKENS_PER_BATCH, EXTRACTION_CONCURRENCY
+from ai.utils.tokenizer import count_tokens_many
+from ai.api_extractor.utils.extraction_cache import extraction_cache, enrichment_cache_key, EXTRACTION_CACHE_ENABLED
+from ai.api_extractor.utils.static_extractor import DEFAULT_EXTRACTION_MODE
+from configs.logger import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+OPERATIONS = ["create", "read", "update", "delete", "other"]
+
+def apply_enrichment(endpoint: Dict, enrichment: Dict) -> Dict:
+    """
+    Fills the descriptive fields of a static endpoint from the LLM output.
+    Path, method, handler and params stay static; response schemas derived from
+    `response_model` win over the LLM's examples for the same status code.
+    """
+    enriched = dict(endpoint)
+    if isinstance(enrichment.get("summary"), str) and enrichment["summary"].strip():
+        enriched["summary"] = enrichment["summary"].strip()
+    if enrichment.get("operation") in OPERATIONS:
+        enriched["operation"] = enrichment["operation"]
+
+    if isinstance(enrichment.get("responses"), dict):
+        responses = {str(code): value for code, value in enrichment["responses"].items() if isinstance(value, dict)}
+        for code, static_response in endpoint.get("responses", {}).items():
+            if code not in responses:
+                responses[code] = static_response
+            elif static_response.get("response"):
+                responses[code] = {**responses[code], "response": static_response["response"]}
+        enriched["responses"] = responses
+    return enriched
+
+def _batch_items(items: List[Dict]) -> List[List[Dict]]:
+    batches, current, current_tokens = [], [], 0
+    for item, tokens in zip(items, count_tokens_many([item["code"] for item in items])):
+        if current and current_tokens + tokens > MAX_TOKENS_PER_BATCH:
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(item)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+async def EnrichStaticEndpointsNode(state: GraphState) -> GraphState:
+    """
+    In hybrid mode, asks the LLM only for summaries, operations and response examples
+    of the statically extracted endpoints.
+    """
+    if (state.get("extraction_mode") or DEFAULT_EXTRACTION_MODE) != "hybrid":
+        return {}
+
+    endpoints = state.get("static_endpoints") or []
+    sources = state.get("static_sources") or []
+    if not endpoints:
+        return {}
+
+    keys = [enrichment_cache_key(endpoint, code) for endpoint, code in zip(endpoints, sources)]
+    cached = extraction_cache.get_many(list(set(keys))) if EXTRACTION_CACHE_ENABLED else {}
+    enrichments: Dict[int, Dict] = {i: cached[key] for i, key in enumerate(keys) if key in cached}
+
+    # Endpoints sharing a handler (several methods or mounts) are enriched once.
+    pending: Dict[str, Dict] = {}
+    for i, key in enumerate(keys):
+        if i not in enrichments and key not in pending:
+            pending[key] = {"index": len(pending), "endpoint": endpoints[i], "code": sources[i], "key": key}
+
+    batches = _batch_items(list(pending.values()))
+    logger.info(f"Enriching {len(endpoints)} static endpoints: {len(enrichments)} from cache, {len(pending)} in {len(batches)} LLM batches.")
+
+    system_prompt = "You are an expert in reading backend code and documenting API endpoints."
+
+    async def enrich_batch(i, batch):
+        prompt = get_endpoint_enrichment_prompt(batch)
+        results = await aget_llm_json_response(prompt, system_prompt, stage="enrichment", expected_type=list)
+        by_index = {item["index"]: item for item in batch}
+        return {
+            by_index[result["index"]]["key"]: result
+            for result in results
+            if isinstance(result, dict) and result.get("index") in by_index
+        }
+
+    fresh: Dict[str, Dict] = {}
+    results = await gather_bounded(batches, enrich_batch, EXTRACTION_CONCURRENCY)
+    for i, result in enumerate(results):
+        if isinstance(result, Exception):
+            logger.error(f"Error enriching batch {i+1}, keeping static fields: {result}")
+            continue
+        fresh.update(result)
+
+    if fresh and EXTRACTION_CACHE_ENABLED:
+        await asyncio.to_thread(extraction_cache.set_many, fresh)
+
+    enriched = []
+    for i, (endpoint, key) in enumerate(zip(endpoints, keys)):
+        enrichment = enrichments.get(i) or fresh.get(key)
+        enriched.append(apply_enrichment(endpoint, enrichment) if enrichment else endpoint)
+    return {"static_endpoints": enriched}
@@ -0,0 +1,8 @@
+from typing import List, Dict, TypedDict
+
+class BatchState(TypedDict):
+    """Input of a per-batch extraction task, sent from `chunk_files`."""
+    language: str
+    batch: List[Dict]
+    batch_index: int
+    batch_count: int
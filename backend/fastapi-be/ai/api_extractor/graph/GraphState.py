@@ -1,12 +1,32 @@
-from typing import List, Dict, Optional,TypedDict
+import operator
+from typing import Annotated, List, Dict, Optional,TypedDict
 
 class GraphState(TypedDict):
     repo_url:str
+    user_id: Optional[str] = None
     branch: Optional[str] = None
     repo_path: Optional[str] = None
+    clone_mode: Optional[str] = None
+    sparse_paths: Optional[List[str]] = None
+    extraction_mode: Optional[str] = None
+    commit_sha: Optional[str] = None
+    incremental: Optional[bool] = None
+    bypass_cache: Optional[bool] = None
+    from_cache: Optional[bool] = None
+    base_commit_sha: Optional[str] = None
+    changed_files: Optional[List[str]] = None
+    deleted_files: Optional[List[str]] = None
+    previous_endpoints: Optional[Dict[str, List[Dict]]] = None
     backend_files: Optional[List[Dict]] = None
     chunks: Optional[List[Dict]] = None
     chunk_batches:Optional[Dict[str, List[Dict]]] = None
-    python_endpoints: Optional[List[Dict]] = None
-    js_endpoints: Optional[List[Dict]] = None  
+    cached_endpoints: Optional[List[Dict]] = None
+    static_endpoints: Optional[List[Dict]] = None
+    static_sources: Optional[List[str]] = None
+    static_files: Optional[List[str]] = None
+    # Written by one task per batch; the reducer concatenates their results.
+    python_endpoints: Annotated[List[Dict], operator.add]
+    js_endpoints: Annotated[List[Dict], operator.add]
+    # Batches (or chunks of them) that yielded no endpoints after every retry; a run with any is partial.
+    failed_batches: Annotated[List[Dict], operator.add]
     endpoints: Optional[List[Dict]] = None 
\ No newline at end of file
@@ -1,30 +1,54 @@
+from typing import List
 from langgraph.graph import StateGraph,END
+from langgraph.types import Send
 
 from ai.api_extractor.graph.GraphState import GraphState
 
 from ai.api_extractor.nodes.LoadbackendFiles import LoadBackendFilesNode
+from ai.api_extractor.nodes.StaticExtractor import StaticExtractorNode
 from ai.api_extractor.nodes.FilesChunker import FilesChunkerNode
 from ai.api_extractor.nodes.Merger import MergeEndpointsNode
 
 from ai.api_extractor.agents.ExtractOpenAPIPythonNode import ExctractOpenAPIPythonNode
 from ai.api_extractor.agents.ExtractOpenAPIJSNode import ExtractOpenAPIJSNode
+from ai.api_extractor.agents.EnrichStaticEndpointsNode import EnrichStaticEndpointsNode
+from jobs.task_queue import TASK_QUEUE_ENABLED, queued_node
+
+BATCH_NODES = {
+    "python": "extract_python_endpoints",
+    "javascript": "extract_js_endpoints",
+    "typescript": "extract_js_endpoints",
+}
+
+def route_batches(state: GraphState) -> List:
+    """Fans out one extraction task per chunk batch, next to the static enrichment."""
+    sends = []
+    for language, node in BATCH_NODES.items():
+        batches = (state.get("chunk_batches") or {}).get(language, [])
+        for i, batch in enumerate(batches):
+            sends.append(Send(node, {"language": language, "batch": batch, "batch_index": i, "batch_count": len(batches)}))
+    return sends + ["enrich_static_endpoints"]
 
 def create_graph() -> StateGraph:
     """Create the graph for loading and chunking backend files."""
     workflow = StateGraph(GraphState)
     # Define the graph structure
     workflow.add_node("load_files",LoadBackendFilesNode)
+    workflow.add_node("static_extract", StaticExtractorNode)
     workflow.add_node("chunk_files",FilesChunkerNode)
-    workflow.add_node("extract_python_endpoints", ExctractOpenAPIPythonNode)  # Placeholder for future nodes
-    workflow.add_node("extract_js_endpoints", ExtractOpenAPIJSNode)
+    # With the task queue, batches are extracted by workers (see worker.py).
+    workflow.add_node("extract_python_endpoints", queued_node("extract_batch") if TASK_QUEUE_ENABLED else ExctractOpenAPIPythonNode)  # Placeholder for future nodes
+    workflow.add_node("extract_js_endpoints", queued_node("extract_batch") if TASK_QUEUE_ENABLED else ExtractOpenAPIJSNode)
+    workflow.add_node("enrich_static_endpoints", EnrichStaticEndpointsNode)
     workflow.add_node("merger", MergeEndpointsNode)  # Placeholder for the end of the workflow
         
     workflow.set_entry_point("load_files")
-    workflow.add_edge("load_files", "chunk_files")
-    workflow.add_edge("chunk_files", "extract_python_endpoints")
-    workflow.add_edge("chunk_files", "extract_js_endpoints")  # Assuming both Python and JS endpoints are extracted from the same chunked files
+    workflow.add_edge("load_files", "static_extract")
+    workflow.add_edge("static_extract", "chunk_files")
+    workflow.add_conditional_edges("chunk_files", route_batches, ["extract_python_endpoints", "extract_js_endpoints", "enrich_static_endpoints"])
     workflow.add_edge("extract_python_endpoints","merger")  # End of the workflow
     workflow.add_edge("extract_js_endpoints","merger")  # End of the workflow
+    workflow.add_edge("enrich_static_endpoints","merger")
     workflow.add_edge("merger", END)  # Final end node
     
     graph = workflow.compile()
@@ -1,27 +1,54 @@
+import asyncio
+from typing import Optional
 from ai.api_extractor.graph.graph import create_graph
 from ai.api_extractor.graph.GraphState import GraphState
+from ai.api_extractor.utils.result_cache import resolve_remote_commit, get_cached_result, store_result
+from ai.api_extractor.utils.batch_chunks import EXTRACTION_CONCURRENCY
+from ai.utils.run_graph import run_graph, UpdateCallback, EventCallback
+from jobs.task_queue import TASK_QUEUE_ENABLED
 from configs.logger import get_custom_logger
 
 logger = get_custom_logger(__name__)
 
 graph = create_graph()
 
-async def invoke_graph(state: GraphState) -> GraphState:
+async def invoke_graph(state: GraphState, on_update: Optional[UpdateCallback] = None, on_event: Optional[EventCallback] = None) -> GraphState:
     """
     Invoke the graph to process backend files and extract OpenAPI endpoints.
+    Runs for a commit that was already extracted are answered from the result
+    cache unless `bypass_cache` is set in the state. `on_update` receives each
+    node's result as it finishes and `on_event` the per-batch events nodes emit.
     """
 
+    if state.get("repo_url") and not state.get("bypass_cache"):
+        commit_sha = await asyncio.to_thread(resolve_remote_commit, state["repo_url"], state.get("branch"))
+        cached = get_cached_result(state, commit_sha) if commit_sha else None
+        if cached:
+            logger.info(f"Returning memoized extraction for {state['repo_url']} at {commit_sha[:10]}.")
+            return {**state, "commit_sha": commit_sha, "endpoints": cached["endpoints"], "from_cache": True}
+
     logger.info("Starting graph invocation...")
     try:
-        updated_state =await graph.ainvoke(state)
+        # Batch tasks run side by side in one step; cap how many are in flight.
+        # Queued batches only wait here while workers extract them, so they are not capped.
+        max_concurrency = None if TASK_QUEUE_ENABLED else EXTRACTION_CONCURRENCY
+        updated_state =await run_graph(graph, state, config={"max_concurrency": max_concurrency}, on_update=on_update, on_event=on_event)
         print(updated_state.keys())
         logger.info("Graph invocation completed successfully.")
     except Exception as e:
         logger.error(f"Graph invocation failed: {e}")
         return state
-    
+
     endpoints = updated_state.get("endpoints", [])
     if not endpoints:
         logger.warning("No endpoints available in the state.")
+    elif updated_state.get("failed_batches"):
+        # Missing the failed batches' endpoints: serving it for the commit would hide the gap.
+        logger.warning(f"Not memoizing a partial extraction: {len(updated_state['failed_batches'])} batches failed.")
+    elif updated_state.get("previous_endpoints") is not None:
+        # Merged with this user's saved (possibly edited) endpoints: not a result to share for the commit.
+        logger.info("Not memoizing an incremental extraction.")
+    elif updated_state.get("commit_sha"):
+        store_result(state, updated_state["commit_sha"], endpoints)
 
     return updated_state
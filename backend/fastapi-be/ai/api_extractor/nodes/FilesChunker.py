@@ -1,6 +1,7 @@
 from ai.api_extractor.utils.chunker import chunk_all_backend_files
-from ai.api_extractor.utils.batch_chunks import prepare_batches
-from ai.api_extractor.utils.file_loader import delete_temp_repo
+from ai.api_extractor.utils.batch_chunks import prepare_batches, split_oversized_chunks
+from ai.api_extractor.utils.file_loader import cleanup_repo
+from ai.api_extractor.utils.extraction_cache import lookup_cached_chunks
 from typing import List, Dict, Optional
 from ai.api_extractor.graph.GraphState import GraphState
 from configs.logger import get_custom_logger
@@ -13,14 +14,25 @@ def FilesChunkerNode(state: GraphState) -> GraphState:
 
     if not backend_files:
         logger.warning("No files provided for chunking.")
-        return state
+        if state.get('repo_path'):
+            cleanup_repo(state['repo_path'])
+        return {'repo_path': None, 'chunks': [], 'chunk_batches': {}}
 
     try:
         logger.info(f"Starting chunking of {len(backend_files)} backend files...")
         all_chunks = chunk_all_backend_files(files=backend_files, repo_path=state.get('repo_path'))
         logger.info(f"Chunked {len(all_chunks)} code blocks.")
 
-        batches = prepare_batches(chunks=all_chunks)
+        static_files = set(state.get('static_files') or [])
+        if static_files:
+            all_chunks = [chunk for chunk in all_chunks if chunk['file_name'] not in static_files]
+            logger.info(f"{len(all_chunks)} chunks left after excluding {len(static_files)} statically extracted files.")
+
+        # Oversize chunks are cached per piece, so they are looked up per piece too.
+        cached_endpoints, uncached_chunks = lookup_cached_chunks(split_oversized_chunks(all_chunks))
+        logger.info(f"Recovered {len(cached_endpoints)} endpoints from cache; {len(uncached_chunks)} chunks need extraction.")
+
+        batches = prepare_batches(chunks=uncached_chunks)
         logger.info(f"Prepared {len(batches)} language-wise batches: {list(batches.keys())}")
 
         # Optionally store chunks
@@ -30,14 +42,15 @@ def FilesChunkerNode(state: GraphState) -> GraphState:
         repo_path = state.get('repo_path')
         if repo_path:
             logger.info(f"Cleaning up cloned repo from {repo_path}...")
-            delete_temp_repo(repo_path)
+            cleanup_repo(repo_path)
             logger.info("Repo cleanup successful.")
 
         # Return updated state
         return {
             'chunks': all_chunks,
             'repo_path': None,
-            'chunk_batches': batches
+            'chunk_batches': batches,
+            'cached_endpoints': cached_endpoints
         }
 
     except Exception as e:
@@ -1,4 +1,5 @@
 from ai.api_extractor.utils.file_loader import clone_repo, load_backend_files
+from ai.api_extractor.utils.incremental import get_head_commit, get_changed_files, load_previous_extraction
 from ai.api_extractor.graph.GraphState import GraphState
 from configs.logger import get_custom_logger
 
@@ -19,20 +20,51 @@ def LoadBackendFilesNode(state: GraphState) -> GraphState:
         return state
 
     try:
-        logger.info(f"Cloning repository: {repo_url} (branch: {branch or 'default'})...")
-        repo_path = clone_repo(repo_url=repo_url, branch=branch)
+        logger.info(f"Cloning repository: {repo_url} (branch: {branch or 'default'}, mode: {state.get('clone_mode') or 'default'})...")
+        repo_path = clone_repo(
+            repo_url=repo_url,
+            branch=branch,
+            clone_mode=state.get("clone_mode"),
+            sparse_paths=state.get("sparse_paths")
+        )
         logger.info(f"Repo cloned successfully to: {repo_path}")
     except Exception as e:
         logger.error(f"Failed to clone repo: {e}")
         return None
 
-    backend_files = load_backend_files(repo_path)
+    commit_sha = get_head_commit(repo_path)
+    incremental_state = {}
+
+    if state.get("incremental") and commit_sha:
+        previous = load_previous_extraction(repo_url, branch, state.get("user_id"))
+        diff = get_changed_files(repo_path, previous["commit_sha"], commit_sha) if previous else None
+        if diff is not None:
+            changed_files, deleted_files = diff
+            logger.info(
+                f"Incremental extraction against {previous['commit_sha'][:10]}: "
+                f"{len(changed_files)} changed/added, {len(deleted_files)} deleted files."
+            )
+            incremental_state = {
+                "base_commit_sha": previous["commit_sha"],
+                "changed_files": changed_files,
+                "deleted_files": deleted_files,
+                "previous_endpoints": previous["endpoints"]
+            }
+        else:
+            logger.info("No usable saved extraction to diff against; running a full extraction.")
+
+    if incremental_state:
+        backend_files = load_backend_files(repo_path, include_paths=incremental_state["changed_files"])
+    else:
+        backend_files = load_backend_files(repo_path)
     logger.info(f"Loaded {len(backend_files)} backend files from cloned repo.")
 
-    if not backend_files:
+    if not backend_files and not incremental_state:
         logger.warning("No backend files detected in the repo.")
 
     return {
         "backend_files": backend_files,
-        "repo_path": repo_path
+        "repo_path": repo_path,
+        "commit_sha": commit_sha,
+        **incremental_state
     }
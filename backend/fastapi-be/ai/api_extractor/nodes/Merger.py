@@ -1,5 +1,6 @@
 from typing import Dict, List, Optional
 from ai.api_extractor.graph.GraphState import GraphState
+from ai.api_extractor.utils.incremental import merge_incremental_endpoints
 from configs.logger import get_custom_logger
 
 logger = get_custom_logger(__name__)
@@ -28,14 +29,26 @@ def MergeEndpointsNode(state:GraphState) -> GraphState:
     """
     python_endpoints = state.get("python_endpoints", [])
     js_endpoints = state.get("js_endpoints", [])
+    cached_endpoints = state.get("cached_endpoints") or []
+    static_endpoints = state.get("static_endpoints") or []
     
-    merged_endpoints = python_endpoints + js_endpoints
+    merged_endpoints = python_endpoints + js_endpoints + cached_endpoints + static_endpoints
+
+    previous_endpoints = state.get("previous_endpoints")
+    if previous_endpoints is not None:
+        merged_endpoints = merge_incremental_endpoints(
+            previous_endpoints,
+            merged_endpoints,
+            changed_files=state.get("changed_files") or [],
+            deleted_files=state.get("deleted_files") or []
+        )
+        logger.info(f"Merged incremental results with saved endpoints from {state.get('base_commit_sha', '')[:10]}.")
     
     if not merged_endpoints:
         logger.warning("No endpoints found to merge.")
         return state
     
-    logger.info(f"Merged {len(merged_endpoints)} endpoints from Python, JavaScript, and TypeScript.")
+    logger.info(f"Merged {len(merged_endpoints)} endpoints from Python, JavaScript, and TypeScript ({len(cached_endpoints)} from cache, {len(static_endpoints)} static).")
     
     # Optionally, group endpoints by file if needed
     grouped_endpoints = group_endpoints_by_file(merged_endpoints)
@@ -0,0 +1,34 @@
+from ai.api_extractor.utils.file_loader import load_backend_files
+from ai.api_extractor.utils.static_extractor import extract_static_endpoints, DEFAULT_EXTRACTION_MODE
+from ai.api_extractor.graph.GraphState import GraphState
+from configs.logger import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+def StaticExtractorNode(state: GraphState) -> GraphState:
+    """Extract endpoints of statically understood files from the AST, before chunking."""
+
+    mode = state.get("extraction_mode") or DEFAULT_EXTRACTION_MODE
+    if mode == "llm":
+        return {}
+
+    repo_path = state.get("repo_path")
+    backend_files = state.get("backend_files") or []
+    incremental = state.get("previous_endpoints") is not None
+
+    if incremental and repo_path:
+        # Router prefixes and models live in unchanged files too, so resolve against the whole tree.
+        backend_files = load_backend_files(repo_path)
+
+    endpoints, sources, static_files = extract_static_endpoints(backend_files, repo_path)
+    logger.info(f"Static extraction ({mode}): {len(endpoints)} endpoints from {len(static_files)} files.")
+
+    update = {
+        "static_endpoints": endpoints,
+        "static_sources": sources,
+        "static_files": static_files
+    }
+    if incremental:
+        # Static results are recomputed for every covered file, so they all replace the saved ones.
+        update["changed_files"] = sorted(set(state.get("changed_files") or []) | set(static_files))
+    return update
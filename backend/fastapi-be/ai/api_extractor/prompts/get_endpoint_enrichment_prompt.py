@@ -0,0 +1,67 @@
+import json
+from typing import List, Dict
+
+# Bump when the prompt changes so cached enrichment results are invalidated.
+PROMPT_VERSION = "1"
+
+def get_endpoint_enrichment_prompt(items: List[Dict]) -> str:
+    endpoint_blocks = "\n\n".join([
+        f"# Endpoint {item['index']}: {item['endpoint']['method']} {item['endpoint']['path']} "
+        f"(handler: {item['endpoint']['handler']}, file: {item['endpoint']['file']})\n"
+        f"# Params: {json.dumps(item['endpoint'].get('params', []))}\n"
+        f"{item['code']}"
+        for item in items
+    ])
+    prompt = f"""
+You are an expert in reading and understanding backend API code.
+
+The endpoints below were already extracted from the code: their path, method, handler and params are correct and must not be changed.
+For each endpoint, read its handler code and return only the descriptive fields as a **JSON list**.
+
+Each item must include:
+- index: The endpoint number given in the "# Endpoint <index>" header
+- summary: A two-line summary (15-20 words) describing what the API does, including any database or CRUD actions.
+- operation (one of: "create", "read", "update", "delete", or "other")
+- responses: A dictionary of status codes to their details, including error responses raised by the handler:
+  - description: Short explanation of the response
+  - content_type: Typically "application/json"
+  - response: An example response body with field names and types
+
+If it performs login/auth/email logic, use "other" as the operation.
+
+Output only a JSON list. No markdown, explanations, or extra formatting.Always use ```json <JSON content> ``` for json response
+
+Example:
+```json
+[
+  {{
+    "index": 0,
+    "summary": "Fetches a user by ID from the database.",
+    "operation": "read",
+    "responses": {{
+      "200": {{
+        "description": "User found",
+        "content_type": "application/json",
+        "response": {{
+          "id": "int",
+          "name": "string"
+        }}
+      }},
+      "404": {{
+        "description": "User not found",
+        "content_type": "application/json",
+        "response": {{
+          "detail": "string"
+        }}
+      }}
+    }}
+  }}
+]
+```
+
+Here are the endpoints:
+{endpoint_blocks}
+
+    """
+
+    return prompt.strip()
@@ -1,5 +1,8 @@
 from typing import List, Dict
 
+# Bump when the prompt changes so cached extraction results are invalidated.
+PROMPT_VERSION = "1"
+
 def get_fastapi_extraction_prompt(batch: List[Dict]) -> str:
     code_blocks = "\n\n".join([f"# File: {chunk['file_name']}\n{chunk['code']}" for chunk in batch])
     prompt = f"""
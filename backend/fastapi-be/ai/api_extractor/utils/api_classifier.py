@@ -0,0 +1,66 @@
+import re
+from typing import Set
+
+CLIENT_RECEIVERS = rb"axios|http|https|client|api|request|requests|session|fetch|ky|superagent|agent|instance"
+CALL_METHODS = rb"get|post|put|delete|patch|all|use|route"
+
+# One precompiled alternation over the raw file bytes; each named group is a signal.
+#   route       - route registration / handler declaration, enough on its own
+#   call        - `app.get('/path', ...)`-style call on any receiver, enough on its own wherever the
+#                 file lives (covers `module.exports = function (app) { app.get(...) }` route modules)
+#   client_call - the same call on a receiver named like an HTTP client (`axios.get('/users')`), only
+#                 counts next to a framework import or an API-like path
+#   import      - server framework import
+SIGNAL_PATTERN = re.compile(
+    rb"(?P<route>"
+    rb"@\w+(?:\.\w+)*\.(?:get|post|put|delete|patch|options|head|route|api_route|websocket)\s*\("
+    rb"|\b(?:add_url_rule|add_api_route|add_api_websocket_route|include_router|register_blueprint)\s*\("
+    rb"|\b(?:APIRouter|Blueprint)\s*\("
+    rb"|^urlpatterns\s*[=+]"
+    rb"|@api_view\s*\("
+    rb"|\((?:\w+\.)*(?:APIView|GenericAPIView|ViewSet|ModelViewSet|GenericViewSet|MethodView|HTTPEndpoint)\)"
+    rb"|@(?:Controller|Get|Post|Put|Delete|Patch|All|Options|Head)\s*\("
+    rb"|\bexport\s+(?:async\s+)?function\s+(?:GET|POST|PUT|DELETE|PATCH|HEAD|OPTIONS)\b"
+    rb"|\.route\s*\(\s*\{"
+    rb"|\bexpress\.Router\s*\(|\bRouter\s*\(\s*\)"
+    rb")"
+    rb"|(?P<call>\b(?!(?:" + CLIENT_RECEIVERS + rb")\.)\w+\.(?:" + CALL_METHODS + rb")\s*\(\s*['\"`]/)"
+    rb"|(?P<client_call>\b(?:" + CLIENT_RECEIVERS + rb")\.(?:" + CALL_METHODS + rb")\s*\(\s*['\"`]/)"
+    rb"|(?P<import>"
+    rb"^[ \t]*(?:from|import)[ \t]+(?:fastapi|flask|starlette|django|rest_framework|aiohttp|sanic|tornado|bottle|falcon|quart|litestar|ninja)\b"
+    rb"|(?:require\s*\(\s*|from\s+)['\"](?:express|fastify|koa|koa-router|@koa/router|@nestjs/[\w-]+|@hapi/hapi|hapi|hono|restify|next/server)['\"]"
+    rb")",
+    re.MULTILINE
+)
+
+API_PATH_PATTERN = re.compile(
+    r"(?:^|/)(?:api|apis|routes?|routers?|controllers?|endpoints?|views?|handlers?|urls|resources)(?:/|\.[^/]*$|$)"
+    r"|(?:^|/)(?:app|main|server|index|wsgi|asgi)\.[^/]*$"
+)
+
+
+def detect_api_signals(content: bytes) -> Set[str]:
+    """Names of the signal groups found in `content`; stops at the first decisive (route or call) signal."""
+    signals = set()
+    for match in SIGNAL_PATTERN.finditer(content):
+        signals.add(match.lastgroup)
+        if match.lastgroup in ("route", "call"):
+            break
+    return signals
+
+
+def has_api_path(relative_path: str) -> bool:
+    return bool(API_PATH_PATTERN.search(relative_path.replace("\\", "/").lower()))
+
+
+def classify_api_file(content: bytes, relative_path: str) -> bool:
+    """
+    Decides whether a backend file declares or mounts API endpoints, from a single
+    scan over its raw bytes plus its repo-relative path.
+    """
+    signals = detect_api_signals(content)
+    if "route" in signals or "call" in signals:
+        return True
+    if "client_call" in signals:
+        return "import" in signals or has_api_path(relative_path)
+    return False
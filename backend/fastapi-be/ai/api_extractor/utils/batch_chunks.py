@@ -1,56 +1,216 @@
-import tiktoken
-from typing import List, Dict, Optional
+import ast
+import asyncio
+import textwrap
+from typing import Awaitable, Callable, List, Dict, Optional, Tuple
 from dotenv import load_dotenv
 import os
 
+from ai.utils.tokenizer import count_tokens, count_tokens_many
+from configs.logger import get_custom_logger
+
 load_dotenv()
 
+logger = get_custom_logger(__name__)
+
 MAX_TOKENS_PER_BATCH = int(os.getenv("MAX_TOKENS_PER_BATCH", 8000))
+# LLM calls each extraction agent keeps in flight.
+EXTRACTION_CONCURRENCY = int(os.getenv("EXTRACTION_CONCURRENCY", 4))
+# Attempts per extraction batch, and the base of the exponential wait between them.
+EXTRACTION_BATCH_ATTEMPTS = int(os.getenv("EXTRACTION_BATCH_ATTEMPTS", 3))
+EXTRACTION_RETRY_BACKOFF_SECONDS = float(os.getenv("EXTRACTION_RETRY_BACKOFF_SECONDS", 2))
 
 def estimate_tokens(text: str) -> int:
     """Estimate the number of tokens in a given text."""
-    encoding = tiktoken.get_encoding("cl100k_base")
-    return len(encoding.encode(text))
+    return count_tokens(text)
 
 def prepare_tokenized_chunks(chunks: List[Dict]) -> List[Dict]:
     """Add token count to each chunk if not already present."""
-    for chunk in chunks:
-        if "tokens" not in chunk:
-            chunk["tokens"] = estimate_tokens(chunk.get("code", ""))
+    missing = [chunk for chunk in chunks if "tokens" not in chunk]
+    for chunk, tokens in zip(missing, count_tokens_many([chunk.get("code", "") for chunk in missing])):
+        chunk["tokens"] = tokens
     return chunks
 
-def prepare_batches(chunks: List[Dict], max_tokens: int = MAX_TOKENS_PER_BATCH) -> List[List[Dict]]:
-    """Batch chunks such that each batch does not exceed max_tokens."""
-    tokenized_chunks = prepare_tokenized_chunks(chunks)
-    batches_by_language = {}
+def _node_start(node: ast.AST) -> int:
+    return min([d.lineno for d in getattr(node, "decorator_list", [])] + [node.lineno])
+
+# A split unit: (header line ranges repeated in every piece, first line, last line), 1-based in the chunk.
+Unit = Tuple[Tuple[Tuple[int, int], ...], int, int]
+
+def _python_units(nodes: List[ast.stmt], headers: tuple, lines: List[str], max_tokens: int) -> List[Unit]:
+    """
+    Statement-level units of an oversize Python chunk. Compound statements that do
+    not fit are opened up: their header (decorators and signature) is repeated in
+    front of each piece of their body.
+    """
+    units = []
+    texts = ["\n".join(lines[_node_start(node) - 1:node.end_lineno]) for node in nodes]
+    for node, tokens in zip(nodes, count_tokens_many(texts)):
+        start, end = _node_start(node), node.end_lineno
+        body = getattr(node, "body", None)
+        if tokens <= max_tokens or not isinstance(body, list) or not body or body[0].lineno <= start:
+            units.append((headers, start, end))
+            continue
+        header = (start, body[0].lineno - 1)
+        units.extend(_python_units(body, headers + (header,), lines, max_tokens))
+        body_end = body[-1].end_lineno
+        if body_end < end:
+            # else/except/finally blocks are kept whole under the same header.
+            units.append((headers + (header,), body_end + 1, end))
+    return units
+
+def _split_units(chunk: Dict, lines: List[str], max_tokens: int) -> List[Unit]:
+    if chunk.get("language") == "python":
+        try:
+            tree = ast.parse(textwrap.dedent(chunk["code"]))
+            units = _python_units(tree.body, (), lines, max_tokens)
+            if units:
+                return units
+        except (SyntaxError, ValueError, RecursionError, MemoryError):
+            pass
+    # No statement structure: split on lines, repeating the first line (the route registration).
+    return [(((1, 1),), i, i) for i in range(2, len(lines) + 1)]
+
+def split_oversized_chunk(chunk: Dict, max_tokens: int = MAX_TOKENS_PER_BATCH) -> List[Dict]:
+    """
+    Splits a chunk over the token budget into pieces at statement boundaries, each
+    prefixed with the headers of the statements it sits in. Pieces keep the chunk's
+    file and line range and are numbered with "part".
+    """
+    if chunk["tokens"] <= max_tokens or "part" in chunk:
+        return [chunk]
+
+    lines = chunk["code"].split("\n")
+    units = _split_units(chunk, lines, max_tokens)
+    unit_tokens = count_tokens_many(["\n".join(lines[start - 1:end]) for _, start, end in units])
+    pieces = []
+    current = None
+    for (headers, start, end), tokens in zip(units, unit_tokens):
+        if current and current["headers"] == headers and current["tokens"] + tokens <= max_tokens:
+            current["end"] = end
+            current["tokens"] += tokens
+            continue
+        header_text = "\n".join("\n".join(lines[a - 1:b]) for a, b in headers)
+        current = {"headers": headers, "start": start, "end": end, "header_text": header_text, "tokens": count_tokens(header_text) + tokens}
+        pieces.append(current)
+
+    if len(pieces) <= 1:
+        return [chunk]
+
+    result = []
+    for i, piece in enumerate(pieces):
+        body = "\n".join(lines[piece["start"] - 1:piece["end"]])
+        code = f"{piece['header_text']}\n{body}" if piece["header_text"] else body
+        result.append({**chunk, "code": code, "tokens": count_tokens(code), "part": f"{i + 1}/{len(pieces)}"})
+    return result
+
+def split_oversized_chunks(chunks: List[Dict], max_tokens: int = MAX_TOKENS_PER_BATCH) -> List[Dict]:
+    """
+    Tokenizes chunks and splits the oversize ones. Done before the extraction cache
+    lookup, so pieces are looked up under the same keys they are stored under.
+    """
+    return [piece for chunk in prepare_tokenized_chunks(chunks) for piece in split_oversized_chunk(chunk, max_tokens)]
+
+def _file_groups(chunks: List[Dict], max_tokens: int) -> List[List[Dict]]:
+    """Consecutive chunks of one file, cut into runs that each fit the budget."""
+    groups, by_file = [], {}
+    for chunk in chunks:
+        by_file.setdefault(chunk.get("file_name"), []).append(chunk)
+    for file_chunks in by_file.values():
+        current, current_tokens = [], 0
+        for chunk in file_chunks:
+            if current and current_tokens + chunk["tokens"] > max_tokens:
+                groups.append(current)
+                current, current_tokens = [], 0
+            current.append(chunk)
+            current_tokens += chunk["tokens"]
+        if current:
+            groups.append(current)
+    return groups
+
+def _drop_bins(bins: List[List[Dict]], loads: List[int], max_tokens: int):
+    """
+    Empties the lightest batches into the free space of the others, one chunk at a
+    time, whenever that removes a whole batch. Files are only split to save a call.
+    """
+    for victim in sorted(range(len(bins)), key=lambda i: loads[i]):
+        if not bins[victim]:
+            continue
+        free = {i: max_tokens - loads[i] for i in range(len(bins)) if i != victim and bins[i]}
+        moves = []
+        for chunk in sorted(bins[victim], key=lambda chunk: chunk["tokens"], reverse=True):
+            target = next((i for i, space in free.items() if chunk["tokens"] <= space), None)
+            if target is None:
+                break
+            free[target] -= chunk["tokens"]
+            moves.append((target, chunk))
+        if len(moves) < len(bins[victim]):
+            continue
+        for target, chunk in moves:
+            bins[target].append(chunk)
+            loads[target] += chunk["tokens"]
+        bins[victim], loads[victim] = [], 0
+
+def pack_batches(chunks: List[Dict], max_tokens: int = MAX_TOKENS_PER_BATCH) -> List[List[Dict]]:
+    """
+    First-fit-decreasing packing of per-file chunk groups into batches of at most
+    max_tokens, followed by a pass that removes batches whose chunks fit elsewhere.
+    Batches list their chunks in the original order.
+    """
+    order = {id(chunk): i for i, chunk in enumerate(chunks)}
+    groups = _file_groups(chunks, max_tokens)
+    groups.sort(key=lambda group: sum(chunk["tokens"] for chunk in group), reverse=True)
+
+    bins: List[List[Dict]] = []
+    loads: List[int] = []
+    for group in groups:
+        tokens = sum(chunk["tokens"] for chunk in group)
+        for i, load in enumerate(loads):
+            if load + tokens <= max_tokens:
+                bins[i].extend(group)
+                loads[i] += tokens
+                break
+        else:
+            bins.append(list(group))
+            loads.append(tokens)
+    _drop_bins(bins, loads, max_tokens)
+
+    batches = [sorted(batch, key=lambda chunk: order[id(chunk)]) for batch in bins if batch]
+    return sorted(batches, key=lambda batch: order[id(batch[0])])
+
+def prepare_batches(chunks: List[Dict], max_tokens: int = MAX_TOKENS_PER_BATCH) -> Dict[str, List[List[Dict]]]:
+    """
+    Batch chunks per language such that each batch does not exceed max_tokens.
+    Oversize chunks are split first (pieces already split are kept); chunks of one
+    file stay in one batch when they fit.
+    """
     chunks_by_language = {}
-    
-    for chunk in tokenized_chunks:
+
+    for chunk in split_oversized_chunks(chunks, max_tokens):
         lang = chunk.get("language", "unknown")
         if lang not in chunks_by_language:
             chunks_by_language[lang] = []
         chunks_by_language[lang].append(chunk)
 
-    for lang, lang_chunks in chunks_by_language.items():
-        current_batch = []
-        batches = []
-        current_batch = []
-        current_tokens = 0
-        
-        for chunk in lang_chunks:
-            chunk_tokens = chunk.get("tokens")
-
-            if current_tokens + chunk_tokens > max_tokens:
-                batches.append(current_batch)
-                current_batch = [chunk]
-                current_tokens = chunk_tokens
+    return {lang: pack_batches(lang_chunks, max_tokens) for lang, lang_chunks in chunks_by_language.items()}
+
+
+async def with_batch_retries(label: str, extract: Callable[[bool], Awaitable[List[Dict]]]) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Runs one batch extraction, retrying failures with exponential backoff up to
+    EXTRACTION_BATCH_ATTEMPTS times. Returns (endpoints, error): a batch that keeps
+    failing contributes no endpoints and the last error, so the run can be reported
+    as partial; the other batches are unaffected. `extract` is called with
+    `bypass_cache` set on retries, so a cached bad response is not served again.
+    """
+    for attempt in range(1, EXTRACTION_BATCH_ATTEMPTS + 1):
+        if attempt > 1:
+            await asyncio.sleep(EXTRACTION_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 2))
+        try:
+            return await extract(attempt > 1), None
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            if attempt < EXTRACTION_BATCH_ATTEMPTS:
+                logger.warning(f"Retrying {label} (attempt {attempt + 1}/{EXTRACTION_BATCH_ATTEMPTS}) after: {e}")
             else:
-                current_batch.append(chunk)
-                current_tokens += chunk_tokens
-        
-        if current_batch:
-            batches.append(current_batch)
-        
-        batches_by_language[lang] = batches
-
-    return batches_by_language
\ No newline at end of file
+                logger.error(f"Giving up on {label} after {attempt} attempts: {e}")
+    return [], error
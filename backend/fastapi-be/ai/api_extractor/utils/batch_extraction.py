@@ -0,0 +1,76 @@
+import asyncio
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langchain_core.runnables import RunnableConfig
+
+from ai.utils.get_llm_response import aget_llm_json_response
+from ai.utils.bisecting_executor import arun_bisecting
+from ai.utils.run_graph import node_events
+from ai.api_extractor.graph.BatchState import BatchState
+from ai.api_extractor.utils.extraction_cache import store_batch_endpoints, settle_batch_endpoints
+from ai.api_extractor.utils.batch_chunks import with_batch_retries
+from configs.logger import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+SYSTEM_PROMPT = "You are an expert in reading backend code and extracting API endpoints."
+
+
+async def extract_batch_endpoints(state: BatchState, config: RunnableConfig, label: str, get_prompt: Callable[[List[Dict]], str]) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Extracts the endpoints of one chunk batch with the extraction prompt `get_prompt`
+    builds for its chunks. Unusable answers are salvaged and bisected, failed
+    requests retried; endpoints are reported as item events while they stream in
+    and the batch's result as a batch event.
+    Returns (endpoints, failed batches): the batch itself if every attempt failed,
+    or the chunks no answer covered, for the run's `failed_batches`.
+    """
+    batch = state["batch"]
+    i = state["batch_index"]
+    logger.info(f"Processing {label} batch {i+1}/{state['batch_count']} with {len(batch)} chunks...")
+
+    emit = node_events(config)
+    reported = set()
+    failed_chunks: List[Dict] = []
+
+    def on_endpoint(endpoint):
+        # Streamed in as soon as the model closes each endpoint object. Bisected and
+        # retried requests can return an endpoint again; it is only reported once.
+        if not isinstance(endpoint, dict):
+            return
+        key = (endpoint.get("method"), endpoint.get("path"), endpoint.get("file"))
+        if key in reported:
+            return
+        reported.add(key)
+        emit({"event": "item", "stage": "extraction", "language": state["language"], "batch_index": i, "item_index": len(reported) - 1, "endpoint": endpoint})
+
+    async def request(chunks, bypass_cache):
+        return await aget_llm_json_response(get_prompt(chunks), SYSTEM_PROMPT, stage="extraction", expected_type=list, bypass_cache=bypass_cache, on_item=on_endpoint)
+
+    async def extract(bypass_cache):
+        # Unusable answers are salvaged and bisected; only transport errors reach with_batch_retries.
+        outcome = await arun_bisecting(f"{label} batch {i+1}", batch, request, settle=settle_batch_endpoints, bypass_cache=bypass_cache)
+        endpoints = outcome.result
+        logger.info(f"Extracted {len(endpoints)} endpoints from {label} batch {i+1}.")
+        done = [chunk for chunk in batch if not any(chunk is failed for failed in outcome.failed)]
+        await asyncio.to_thread(store_batch_endpoints, done, endpoints)
+        failed_chunks[:] = outcome.failed
+        return endpoints
+
+    endpoints, error = await with_batch_retries(f"{label} batch {i+1}", extract)
+    failed = None
+    if error:
+        failed = _failed_batch(state, batch, error)
+    elif failed_chunks:
+        failed = _failed_batch(state, failed_chunks, "no usable answer")
+    emit({"event": "batch", "stage": "extraction", "language": state["language"], "batch_index": i, "batch_count": state["batch_count"], "count": len(endpoints), "endpoints": endpoints, "failed": bool(failed)})
+    return endpoints, [failed] if failed else []
+
+
+def _failed_batch(state: BatchState, chunks: List[Dict], error: Optional[str]) -> Dict:
+    return {
+        "language": state["language"],
+        "batch_index": state["batch_index"],
+        "files": sorted({chunk["file_name"] for chunk in chunks}),
+        "error": error,
+    }
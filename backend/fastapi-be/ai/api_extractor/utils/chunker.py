@@ -1,33 +1,127 @@
 import ast
 import re
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
+from ai.api_extractor.utils.js_routes import JSRouteIndex
+from ai.utils.tokenizer import count_tokens_many
+
+load_dotenv()
+
+# Repos with less API source than this are chunked serially: each spawned worker costs ~0.25 s
+# to start, which only pays off above ~2.5 MB of source (benchmarks/chunker_pool.py).
+PARALLEL_CHUNKING_MIN_BYTES = int(os.getenv("PARALLEL_CHUNKING_MIN_BYTES", 4 * 1024 * 1024))
+CHUNKER_WORKERS = int(os.getenv("CHUNKER_WORKERS", os.cpu_count() or 1))
+# Work units per worker, so one slow unit does not leave the other workers idle.
+CHUNK_UNITS_PER_WORKER = int(os.getenv("CHUNK_UNITS_PER_WORKER", 4))
+
+ROUTE_DECORATORS = ["get", "post", "put", "delete", "patch", "options", "head", "route", "api_route", "websocket", "api_view"]
+# Module-level statements that define routers or register routes; kept as a context chunk.
+ROUTER_FACTORIES = ["APIRouter", "FastAPI", "Blueprint", "Flask", "Namespace", "Api", "Starlette"]
+ROUTE_CALLS = ["include_router", "add_api_route", "add_url_rule", "register_blueprint", "mount", "add_route", "add_resource", "add_namespace"]
+# Class decorators and base classes that make a class a class-based view; a plain
+# decorated class (e.g. @dataclass) or a class with a `get` method is not one.
+VIEW_CLASS_DECORATORS = ROUTE_DECORATORS + ["cbv", "controller", "resource"]
+VIEW_BASES = ["View", "MethodView", "Resource", "HTTPEndpoint", "WebSocketEndpoint"]
+VIEW_BASE_SUFFIXES = ("View", "ViewSet", "Resource")
+
+def _call_attr(node: ast.AST) -> Optional[str]:
+    func = node.func if isinstance(node, ast.Call) else node
+    if isinstance(func, ast.Attribute):
+        return func.attr
+    if isinstance(func, ast.Name):
+        return func.id
+    return None
+
+def _is_route_handler(node: ast.AST) -> bool:
+    return any(isinstance(d, ast.Call) and _call_attr(d) in ROUTE_DECORATORS for d in node.decorator_list)
+
+def _is_route_statement(node: ast.AST) -> bool:
+    value = node.value if isinstance(node, (ast.Assign, ast.AnnAssign, ast.Expr)) else None
+    if not isinstance(value, ast.Call):
+        return False
+    name = _call_attr(value)
+    return name in ROUTE_CALLS if isinstance(node, ast.Expr) else name in ROUTER_FACTORIES
+
+def _is_api_class(node: ast.ClassDef) -> bool:
+    """
+    Class-based views: classes with a router/view decorator (e.g. @cbv(router), @ns.route(...)),
+    a view base class (MethodView, Resource, APIView, HTTPEndpoint, ...), or route-decorated methods.
+    """
+    if any(_call_attr(d) in VIEW_CLASS_DECORATORS for d in node.decorator_list):
+        return True
+    if any(_call_attr(base) in VIEW_BASES or (_call_attr(base) or "").endswith(VIEW_BASE_SUFFIXES) for base in node.bases):
+        return True
+    return any(isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and _is_route_handler(item) for item in node.body)
 
 def chunk_python_file_by_function(file_obj: Dict,repo_path:str) -> List[Dict]:
+    """
+    One pass over the module: a chunk per top-level function (decorators included,
+    exact `end_lineno` extent), a chunk per method of class-based views prefixed with
+    the class header, per-handler chunks for routers built inside factory functions,
+    and one context chunk with module-level router definitions and registrations.
+    """
     chunks = []
     content = file_obj["content"]
     file_path = file_obj["path"]
     relative_path = os.path.relpath(file_path, start=repo_path)
 
+    def extent(node: ast.AST) -> tuple:
+        return min([d.lineno for d in getattr(node, "decorator_list", [])] + [node.lineno]), node.end_lineno
+
+    def add_chunk(name: str, code: str, start_line: int, end_line: int):
+        chunks.append({
+            "file_name": relative_path,
+            "function_name": name,
+            "code": code,
+            "start_line": start_line,
+            "end_line": end_line,
+            "language": "python"
+        })
 
     try:
         tree = ast.parse(content)
         lines = content.splitlines()
+        context = []
 
         for node in tree.body:
             if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                start_line = node.lineno - 1
-                next_index = tree.body.index(node) + 1
-                end_line = tree.body[next_index].lineno - 2 if next_index < len(tree.body) else len(lines) - 1
-                chunk_code = "\n".join(lines[start_line:end_line + 1])
-                chunks.append({
-                    "file_name": relative_path,
-                    "function_name": node.name,
-                    "code": chunk_code,
-                    "start_line": start_line + 1,
-                    "end_line": end_line + 1,
-                    "language": "python"
-                })
+                start_line, end_line = extent(node)
+                handlers = [item for item in node.body if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and _is_route_handler(item)]
+                if not handlers:
+                    add_chunk(node.name, "\n".join(lines[start_line - 1:end_line]), start_line, end_line)
+                    continue
+
+                # Router factory: the factory without its handlers, then each handler on its own.
+                handler_lines = set()
+                for handler in handlers:
+                    handler_start, handler_end = extent(handler)
+                    handler_lines.update(range(handler_start, handler_end + 1))
+                    add_chunk(f"{node.name}.{handler.name}", "\n".join(lines[handler_start - 1:handler_end]), handler_start, handler_end)
+                skeleton = [lines[i - 1] for i in range(start_line, end_line + 1) if i not in handler_lines]
+                add_chunk(node.name, "\n".join(skeleton), start_line, end_line)
+
+            elif isinstance(node, ast.ClassDef) and _is_api_class(node):
+                class_start, _ = extent(node)
+                # The header ends before the first member, including that member's decorators.
+                header_end = extent(node.body[0])[0] - 1 if node.body else node.end_lineno
+                if isinstance(node.body[0], ast.Expr) and isinstance(node.body[0].value, ast.Constant):
+                    header_end = node.body[0].end_lineno
+                header = "\n".join(lines[class_start - 1:header_end])
+                for item in node.body:
+                    if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                        start_line, end_line = extent(item)
+                        method_code = "\n".join(lines[start_line - 1:end_line])
+                        add_chunk(f"{node.name}.{item.name}", f"{header}\n{method_code}", start_line, end_line)
+
+            elif _is_route_statement(node):
+                context.append(node)
+
+        if context:
+            code = "\n".join("\n".join(lines[n.lineno - 1:n.end_lineno]) for n in context)
+            add_chunk("<module>", code, context[0].lineno, context[-1].end_lineno)
 
     except Exception as e:
         print(f"⚠️ Error chunking {file_path}: {e}")
@@ -35,10 +129,22 @@ def chunk_python_file_by_function(file_obj: Dict,repo_path:str) -> List[Dict]:
     return chunks
 
 
-def chunk_javascript_functions(file_obj: Dict,repo_path:str) -> List[Dict]:
+def chunk_javascript_functions(file_obj: Dict, repo_path: str, route_index: Optional[JSRouteIndex] = None) -> List[Dict]:
+    """
+    Chunks JS/TS files per route registration, with brace-balanced extents and the
+    handlers they reference (see `JSRouteIndex`). Pass a repo-wide index to resolve
+    mounts and handlers across files.
+    """
+    route_index = route_index or JSRouteIndex([file_obj], repo_path)
+    chunks = route_index.chunks_for(os.path.relpath(file_obj["path"], start=repo_path))
+    return chunks or chunk_javascript_by_lines(file_obj, repo_path)
+
+
+def chunk_javascript_by_lines(file_obj: Dict,repo_path:str) -> List[Dict]:
     """
     Rough chunking of JS/TS files per API or function block.
     Looks for: app.get/post/put/delete, function xyz(), async function xyz()
+    Fallback for API files in which the route scanner finds no registrations.
     """
     chunks = []
     content = file_obj["content"]
@@ -95,14 +201,92 @@ def chunk_javascript_functions(file_obj: Dict,repo_path:str) -> List[Dict]:
     return chunks
 
 
-def chunk_all_backend_files(files: List[Dict], repo_path:str) -> List[Dict]:
+def _chunk_files(files: List[Dict], repo_path: str) -> List[Dict]:
     all_chunks = []
+    js_files = [file for file in files if file["language"] in ["javascript", "typescript"]]
+    route_index = JSRouteIndex(js_files, repo_path) if js_files else None
 
     for file in files:
         if file["language"] == "python" and file["is_api_file"]:
             all_chunks.extend(chunk_python_file_by_function(file,repo_path))
 
         elif file["language"] in ["javascript", "typescript"] and file["is_api_file"]:
-            all_chunks.extend(chunk_javascript_functions(file,repo_path))
+            all_chunks.extend(chunk_javascript_functions(file,repo_path,route_index))
 
     return all_chunks
+
+
+def _chunk_unit(unit: List[Tuple[int, Dict]], repo_path: str) -> List[Tuple[int, List[Dict]]]:
+    """
+    Process-pool task: chunks one work unit and counts chunk tokens, so the
+    parent only merges results. Returns (file position, chunks) per file.
+    """
+    files = [file for _, file in unit]
+    js_files = [file for file in files if file["language"] in ["javascript", "typescript"]]
+    route_index = JSRouteIndex(js_files, repo_path) if js_files else None
+
+    results = []
+    for position, file in unit:
+        if not file["is_api_file"]:
+            continue
+        if file["language"] == "python":
+            chunks = chunk_python_file_by_function(file, repo_path)
+        else:
+            chunks = chunk_javascript_functions(file, repo_path, route_index)
+        for chunk, tokens in zip(chunks, count_tokens_many([chunk["code"] for chunk in chunks])):
+            chunk["tokens"] = tokens
+        results.append((position, chunks))
+    return results
+
+
+def _balance_units(files: List[Tuple[int, Dict]], unit_count: int) -> List[List[Tuple[int, Dict]]]:
+    """Largest-first assignment of files to the currently smallest unit."""
+    units = [[] for _ in range(unit_count)]
+    sizes = [0] * unit_count
+    for position, file in sorted(files, key=lambda item: len(item[1]["content"]), reverse=True):
+        smallest = sizes.index(min(sizes))
+        units[smallest].append((position, file))
+        sizes[smallest] += len(file["content"])
+    return [sorted(unit, key=lambda item: item[0]) for unit in units if unit]
+
+
+def _chunk_in_pool(api_files: List[Dict], repo_path: str, workers: int) -> List[Dict]:
+    """Chunks `api_files` in a spawn-based pool of `workers` processes; chunks come back in file order, with tokens."""
+    indexed = list(enumerate(api_files))
+    python_files = [(i, file) for i, file in indexed if file["language"] == "python" and file["is_api_file"]]
+    # JS/TS non-API files still feed the route index (mounted routers, imported handlers).
+    js_unit = [(i, file) for i, file in indexed if file["language"] != "python"]
+    units = _balance_units(python_files, max(1, workers * CHUNK_UNITS_PER_WORKER))
+    if any(file["is_api_file"] for _, file in js_unit):
+        units.insert(0, js_unit)
+
+    # Spawned workers: forking the graph thread would copy live Mongo and HTTP clients.
+    with ProcessPoolExecutor(max_workers=min(workers, len(units)), mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = [executor.submit(_chunk_unit, unit, repo_path) for unit in units]
+        by_position = dict(result for future in futures for result in future.result())
+
+    return [chunk for position in sorted(by_position) for chunk in by_position[position]]
+
+
+def chunk_all_backend_files(files: List[Dict], repo_path:str) -> List[Dict]:
+    """
+    Chunks all API files, in file order. Large repos are fanned out to a process
+    pool in size-balanced units; Python files are independent, while JS/TS files
+    form one unit because routes resolve across files. Falls back to serial
+    chunking for small repos or when the pool cannot be used.
+    """
+    languages = ["python", "javascript", "typescript"]
+    api_files = [
+        {key: file[key] for key in ["path", "content", "language", "is_api_file"]}
+        for file in files if file["language"] in languages
+    ]
+    api_bytes = sum(len(file["content"]) for file in api_files if file["is_api_file"])
+    workers = min(CHUNKER_WORKERS, os.cpu_count() or 1)
+    if workers <= 1 or api_bytes < PARALLEL_CHUNKING_MIN_BYTES:
+        return _chunk_files(files, repo_path)
+
+    try:
+        return _chunk_in_pool(api_files, repo_path, workers)
+    except Exception as e:
+        print(f"⚠️ Parallel chunking failed, chunking serially: {e}")
+        return _chunk_files(files, repo_path)
@@ -0,0 +1,151 @@
+import os
+import json
+import hashlib
+from typing import Dict, List, Tuple
+from dotenv import load_dotenv
+
+from ai.utils.persistent_cache import PersistentCache
+from ai.utils.model_router import STAGE_MODELS
+from ai.api_extractor.utils.incremental import normalize_path
+from ai.api_extractor.prompts.get_fastapi_extraction_prompt import PROMPT_VERSION as FASTAPI_PROMPT_VERSION
+from ai.api_extractor.prompts.get_js_extraction_prompt import PROMPT_VERSION as JS_PROMPT_VERSION
+from ai.api_extractor.prompts.get_endpoint_enrichment_prompt import PROMPT_VERSION as ENRICHMENT_PROMPT_VERSION
+from configs.logger import get_custom_logger
+
+load_dotenv()
+
+logger = get_custom_logger(__name__)
+
+EXTRACTION_CACHE_ENABLED = os.getenv("EXTRACTION_CACHE_ENABLED", "true").lower() == "true"
+EXTRACTION_CACHE_LRU_SIZE = int(os.getenv("EXTRACTION_CACHE_LRU_SIZE", 5000))
+
+PROMPT_VERSIONS = {
+    "python": FASTAPI_PROMPT_VERSION,
+    "javascript": JS_PROMPT_VERSION,
+    "typescript": JS_PROMPT_VERSION,
+    "enrichment": ENRICHMENT_PROMPT_VERSION,
+}
+
+# Bump when the attribution of endpoints to chunks changes, so entries stored under the old rules are not served.
+ATTRIBUTION_VERSION = "2"
+
+extraction_cache = PersistentCache("extraction_cache", max_entries=EXTRACTION_CACHE_LRU_SIZE)
+
+
+def chunk_cache_key(chunk: Dict, model: str = STAGE_MODELS["extraction"]) -> str:
+    """Content address of a chunk: hash of code, language, prompt version, model and attribution rules."""
+    language = chunk.get("language", "unknown")
+    payload = json.dumps([chunk.get("code", ""), language, PROMPT_VERSIONS.get(language, "0"), model, ATTRIBUTION_VERSION])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def enrichment_cache_key(endpoint: Dict, code: str, model: str = STAGE_MODELS["enrichment"]) -> str:
+    """Content address of a statically extracted endpoint's enrichment: handler code plus the fixed fields."""
+    payload = json.dumps([
+        "enrichment", code, endpoint.get("method"), endpoint.get("path"), endpoint.get("params"),
+        PROMPT_VERSIONS["enrichment"], model
+    ], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _same_file(endpoint_file: str, chunk_file: str) -> bool:
+    # Exact repo-relative match; a suffix match would credit app/main.py's endpoints to main.py.
+    return normalize_path(endpoint_file) == normalize_path(chunk_file)
+
+
+def lookup_cached_chunks(chunks: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Splits chunks into cache hits and misses.
+    Returns (endpoints recovered from hits, chunks that still need the LLM).
+    Cached endpoints are re-pointed at the chunk's current file name.
+    """
+    if not EXTRACTION_CACHE_ENABLED or not chunks:
+        return [], chunks
+
+    keys = [chunk_cache_key(chunk) for chunk in chunks]
+    cached = extraction_cache.get_many(list(set(keys)))
+
+    endpoints, misses = [], []
+    for chunk, key in zip(chunks, keys):
+        if key not in cached:
+            misses.append(chunk)
+            continue
+        for ep in cached[key]:
+            endpoints.append({**ep, "file": chunk["file_name"]})
+
+    logger.info(f"Extraction cache: {len(chunks) - len(misses)} hits, {len(misses)} misses.")
+    return endpoints, misses
+
+
+def assign_endpoints_to_chunks(batch: List[Dict], endpoints: List[Dict]) -> Tuple[Dict[int, List[Dict]], set]:
+    """
+    Attributes endpoints returned for a batch to the chunk that produced them,
+    by file plus handler name, path literal, or the file's only chunk.
+    Returns ({chunk index: endpoints}, files with endpoints that could not be attributed).
+    An endpoint matching no file in the batch makes every file unattributed.
+    """
+    assigned: Dict[int, List[Dict]] = {i: [] for i in range(len(batch))}
+    unattributed_files = set()
+
+    for ep in endpoints:
+        if not isinstance(ep, dict):
+            continue
+        candidates = [i for i, chunk in enumerate(batch) if ep.get("file") and _same_file(ep["file"], chunk["file_name"])]
+        if not candidates:
+            unattributed_files.update(chunk["file_name"] for chunk in batch)
+            continue
+        match = (
+            [i for i in candidates if batch[i].get("function_name") == ep.get("handler")]
+            or [i for i in candidates if ep.get("path") and str(ep["path"]) in batch[i].get("code", "")]
+            or (candidates if len(candidates) == 1 else [])
+        )
+        if match:
+            assigned[match[0]].append(ep)
+        else:
+            unattributed_files.update(batch[i]["file_name"] for i in candidates)
+
+    return assigned, unattributed_files
+
+
+def settle_batch_endpoints(batch: List[Dict], endpoints: List[Dict], complete: bool) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Checks an extraction answer for the bisecting executor. A complete answer covers
+    the whole batch. Of a salvaged (cut-off) answer, endpoints are kept for the chunks
+    they can be attributed to, except the chunk of the last endpoint, whose remaining
+    endpoints may have been cut off. Returns (endpoints kept, chunks to ask for again).
+    """
+    if complete:
+        return endpoints, []
+    endpoints = [ep for ep in endpoints or [] if isinstance(ep, dict)]
+    if not endpoints:
+        return [], batch
+
+    assigned, unattributed_files = assign_endpoints_to_chunks(batch, endpoints)
+    last = next((i for i, eps in assigned.items() if eps and eps[-1] is endpoints[-1]), None)
+    kept, missing = [], []
+    for i, chunk in enumerate(batch):
+        if assigned[i] and i != last and chunk["file_name"] not in unattributed_files:
+            kept.extend(assigned[i])
+        else:
+            missing.append(chunk)
+    return kept, missing
+
+
+def store_batch_endpoints(batch: List[Dict], endpoints: List[Dict]):
+    """
+    Caches the endpoints parsed for a successfully processed batch, per chunk.
+    Chunks of files whose endpoints could not be attributed are not cached.
+    """
+    if not EXTRACTION_CACHE_ENABLED or not batch or not isinstance(endpoints, list):
+        return
+
+    assigned, unattributed_files = assign_endpoints_to_chunks(batch, endpoints)
+    items = {}
+    for i, chunk in enumerate(batch):
+        if chunk["file_name"] in unattributed_files:
+            continue
+        items[chunk_cache_key(chunk)] = assigned[i]
+
+    extraction_cache.set_many(items)
+    if unattributed_files:
+        logger.debug(f"Skipped caching chunks of {len(unattributed_files)} files with unattributed endpoints.")
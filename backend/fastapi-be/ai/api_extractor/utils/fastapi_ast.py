@@ -0,0 +1,551 @@
+import ast
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+HTTP_METHODS = ["get", "post", "put", "delete", "patch", "options", "head", "trace"]
+ROUTER_FACTORIES = ["APIRouter", "FastAPI"]
+MODEL_BASES = ["BaseModel", "SQLModel"]
+PARAM_SOURCES = {"Query": "query", "Path": "path", "Body": "body", "Header": "header", "Cookie": "cookie", "Form": "body", "File": "body"}
+DEPENDENCY_MARKERS = ["Depends", "Security"]
+SKIPPED_PARAM_TYPES = [
+    "Request", "Response", "BackgroundTasks", "WebSocket", "HTTPConnection",
+    "Session", "AsyncSession", "SecurityScopes", "HTTPAuthorizationCredentials"
+]
+# Route registrations this extractor does not follow; files using them are left to the LLM.
+UNSUPPORTED_ROUTE_CALLS = ["add_api_route", "add_api_websocket_route", "add_route", "mount"]
+
+TYPE_NAMES = {
+    "str": "string", "int": "int", "float": "float", "bool": "boolean", "bytes": "string",
+    "UUID": "uuid", "UUID4": "uuid", "datetime": "datetime", "date": "date", "time": "time",
+    "EmailStr": "string", "HttpUrl": "string", "AnyUrl": "string", "Decimal": "number",
+    "dict": "object", "Dict": "object", "Any": "any", "Json": "object",
+    "UploadFile": "file", "SecretStr": "string",
+}
+LIST_TYPES = ["List", "list", "Set", "set", "Sequence", "Tuple", "tuple", "FrozenSet", "Iterable"]
+AUTH_HINTS = re.compile(r"login|logout|auth|token|register|signup|sign_up|password|verify|otp", re.IGNORECASE)
+PATH_PARAM_PATTERN = re.compile(r"{(\w+)(?::\w+)?}")
+MAX_RESOLVE_DEPTH = 8
+
+
+def infer_operation(method: str, handler: str, path: str) -> str:
+    """CRUD operation of an endpoint from its method, with auth-like handlers and paths as "other"."""
+    if AUTH_HINTS.search(handler or "") or AUTH_HINTS.search(path or ""):
+        return "other"
+    return {"GET": "read", "POST": "create", "PUT": "update", "PATCH": "update", "DELETE": "delete"}.get(method, "other")
+
+
+class _Module:
+    """What the extractor needs from one parsed Python module."""
+
+    def __init__(self, name: str, file_name: str, tree: ast.Module, lines: List[str], is_package: bool):
+        self.name = name
+        self.file_name = file_name
+        self.tree = tree
+        self.lines = lines
+        self.is_package = is_package
+        self.imports: Dict[str, Tuple[str, Optional[str]]] = {}
+        self.constants: Dict[str, ast.AST] = {}
+        self.routers: Dict[str, Optional[ast.AST]] = {}
+        self.includes: List[Tuple[str, Optional[ast.AST], Optional[ast.AST]]] = []
+        self.routes: List[Tuple[ast.AST, ast.AST, ast.Call, List[str]]] = []
+        self.classes: Dict[str, ast.ClassDef] = {}
+        self.uses_fastapi = False
+        self.unsupported = False
+
+
+def _module_name(relative_path: str) -> Tuple[str, bool]:
+    parts = os.path.splitext(relative_path.replace("\\", "/"))[0].split("/")
+    is_package = parts[-1] == "__init__"
+    if is_package:
+        parts = parts[:-1]
+    return ".".join(parts), is_package
+
+
+def _call_name(node: ast.AST) -> Optional[str]:
+    if isinstance(node, ast.Call):
+        node = node.func
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return None
+
+
+def _dotted_name(node: ast.AST) -> Optional[str]:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        owner = _dotted_name(node.value)
+        return f"{owner}.{node.attr}" if owner else None
+    return None
+
+
+def _keyword(call: ast.Call, name: str) -> Optional[ast.AST]:
+    for keyword in call.keywords:
+        if keyword.arg == name:
+            return keyword.value
+    return None
+
+
+def _is_ellipsis(node: Optional[ast.AST]) -> bool:
+    return isinstance(node, ast.Constant) and node.value is Ellipsis
+
+
+class FastAPIExtractor:
+    """
+    Static FastAPI endpoint extraction over a whole repository: route decorators,
+    APIRouter/include_router prefixes across modules, parameters and Pydantic models.
+    Produces the same endpoint dicts as the LLM extraction prompt.
+    """
+
+    def __init__(self, files: List[Dict], repo_path: str):
+        self.modules: Dict[str, _Module] = {}
+        self._model_cache: Dict[Tuple[str, str], bool] = {}
+        for file in files:
+            if file.get("language") != "python":
+                continue
+            relative_path = os.path.relpath(file["path"], start=repo_path)
+            try:
+                tree = ast.parse(file["content"])
+            except (SyntaxError, ValueError):
+                continue
+            name, is_package = _module_name(relative_path)
+            module = _Module(name, relative_path, tree, file["content"].splitlines(), is_package)
+            self._collect(module)
+            self.modules[name] = module
+
+    # ---------- collection ----------
+
+    def _absolute_module(self, module: _Module, name: Optional[str], level: int) -> str:
+        if not level:
+            return name or ""
+        package = module.name.split(".") if module.is_package else module.name.split(".")[:-1]
+        if level > 1:
+            package = package[:-(level - 1)] if level - 1 <= len(package) else []
+        return ".".join(package + ([name] if name else []))
+
+    def _collect(self, module: _Module):
+        for node in module.tree.body:
+            if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+                module.constants[node.targets[0].id] = node.value
+
+        for node in ast.walk(module.tree):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    if alias.name.split(".")[0] == "fastapi":
+                        module.uses_fastapi = True
+                    if alias.asname:
+                        module.imports[alias.asname] = (alias.name, None)
+                    else:
+                        head = alias.name.split(".")[0]
+                        module.imports[head] = (head, None)
+
+            elif isinstance(node, ast.ImportFrom):
+                if not node.level and (node.module or "").split(".")[0] == "fastapi":
+                    module.uses_fastapi = True
+                base = self._absolute_module(module, node.module, node.level)
+                for alias in node.names:
+                    if alias.name != "*":
+                        module.imports[alias.asname or alias.name] = (base, alias.name)
+
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                if len(targets) == 1 and isinstance(targets[0], ast.Name) and isinstance(node.value, ast.Call):
+                    if _call_name(node.value) in ROUTER_FACTORIES:
+                        module.routers[targets[0].id] = _keyword(node.value, "prefix")
+
+            elif isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+                if node.func.attr == "include_router" and isinstance(node.func.value, ast.Name):
+                    child = node.args[0] if node.args else _keyword(node, "router")
+                    prefix = node.args[1] if len(node.args) > 1 else _keyword(node, "prefix")
+                    module.includes.append((node.func.value.id, child, prefix))
+                elif node.func.attr in UNSUPPORTED_ROUTE_CALLS:
+                    module.unsupported = True
+
+            elif isinstance(node, ast.ClassDef):
+                module.classes[node.name] = node
+
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                for decorator in node.decorator_list:
+                    if not (isinstance(decorator, ast.Call) and isinstance(decorator.func, ast.Attribute)):
+                        continue
+                    attr = decorator.func.attr
+                    if attr in HTTP_METHODS:
+                        methods = [attr.upper()]
+                    elif attr == "api_route":
+                        methods_node = _keyword(decorator, "methods")
+                        methods = [
+                            elt.value.upper() for elt in getattr(methods_node, "elts", [])
+                            if isinstance(elt, ast.Constant) and isinstance(elt.value, str)
+                        ] or ["GET"]
+                    else:
+                        continue
+                    module.routes.append((decorator.func.value, node, decorator, methods))
+
+    # ---------- name resolution ----------
+
+    def _find_module(self, dotted: str) -> Optional[_Module]:
+        """Finds a module by dotted name; also matches repos whose import root is a subdirectory."""
+        if not dotted:
+            return None
+        if dotted in self.modules:
+            return self.modules[dotted]
+        candidates = [name for name in self.modules if name.endswith("." + dotted)]
+        return self.modules[min(candidates, key=len)] if candidates else None
+
+    def _resolve_module_ref(self, module: _Module, node: ast.AST) -> Optional[_Module]:
+        dotted = _dotted_name(node)
+        if not dotted:
+            return None
+        head, *rest = dotted.split(".")
+        if head not in module.imports:
+            return None
+        target, attr = module.imports[head]
+        return self._find_module(".".join([target] + ([attr] if attr else []) + rest))
+
+    def _resolve_symbol(self, module: _Module, node: ast.AST, table: str, depth: int = 0) -> Optional[Tuple[_Module, str]]:
+        """Resolves a Name/Attribute to the module defining it in `table` ('routers' or 'classes')."""
+        if depth > MAX_RESOLVE_DEPTH:
+            return None
+        if isinstance(node, ast.Name):
+            return self._symbol_in(module, node.id, table, depth)
+        if isinstance(node, ast.Attribute):
+            owner = self._resolve_module_ref(module, node.value)
+            return self._symbol_in(owner, node.attr, table, depth + 1) if owner else None
+        return None
+
+    def _symbol_in(self, module: _Module, name: str, table: str, depth: int) -> Optional[Tuple[_Module, str]]:
+        if depth > MAX_RESOLVE_DEPTH:
+            return None
+        if name in getattr(module, table):
+            return module, name
+        if name in module.imports:
+            target, attr = module.imports[name]
+            owner = self._find_module(target) if attr else None
+            if owner and owner is not module:
+                return self._symbol_in(owner, attr, table, depth + 1)
+        return None
+
+    def _const_str(self, module: _Module, node: Optional[ast.AST], depth: int = 0) -> Optional[str]:
+        """Evaluates simple string expressions: literals, constants, + and f-strings of those."""
+        if node is None:
+            return ""
+        if depth > MAX_RESOLVE_DEPTH:
+            return None
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            return node.value
+        if isinstance(node, ast.Name):
+            if node.id in module.constants:
+                return self._const_str(module, module.constants[node.id], depth + 1)
+            if node.id in module.imports:
+                target, attr = module.imports[node.id]
+                owner = self._find_module(target) if attr else None
+                if owner and attr in owner.constants:
+                    return self._const_str(owner, owner.constants[attr], depth + 1)
+            return None
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+            left = self._const_str(module, node.left, depth + 1)
+            right = self._const_str(module, node.right, depth + 1)
+            return left + right if left is not None and right is not None else None
+        if isinstance(node, ast.JoinedStr):
+            parts = []
+            for value in node.values:
+                part = self._const_str(module, value.value if isinstance(value, ast.FormattedValue) else value, depth + 1)
+                if part is None:
+                    return None
+                parts.append(part)
+            return "".join(parts)
+        return None
+
+    # ---------- types and models ----------
+
+    def _is_model(self, module: _Module, name: str, depth: int = 0) -> bool:
+        key = (module.name, name)
+        if key not in self._model_cache:
+            self._model_cache[key] = False
+            for base in module.classes[name].bases:
+                if _call_name(base) in MODEL_BASES:
+                    self._model_cache[key] = True
+                    break
+                resolved = self._resolve_symbol(module, base, "classes", depth + 1)
+                if resolved and self._is_model(resolved[0], resolved[1], depth + 1):
+                    self._model_cache[key] = True
+                    break
+        return self._model_cache[key]
+
+    def _resolve_model(self, module: _Module, node: ast.AST) -> Optional[Tuple[_Module, str]]:
+        resolved = self._resolve_symbol(module, node, "classes")
+        return resolved if resolved and self._is_model(*resolved) else None
+
+    def _unwrap(self, node: Optional[ast.AST]) -> Tuple[Optional[ast.AST], bool]:
+        """Strips Optional/Union[..., None]/Annotated; returns (inner annotation, is a list type)."""
+        while node is not None:
+            if isinstance(node, ast.Subscript):
+                base = _call_name(node.value)
+                inner = node.slice
+                elts = inner.elts if isinstance(inner, ast.Tuple) else [inner]
+                if base in ["Optional", "Annotated"]:
+                    node = elts[0]
+                    continue
+                if base == "Union":
+                    non_none = [elt for elt in elts if not (isinstance(elt, ast.Constant) and elt.value is None)]
+                    node = non_none[0] if non_none else None
+                    continue
+                if base in LIST_TYPES:
+                    return elts[0], True
+                return node, False
+            if isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitOr):
+                node = node.right if isinstance(node.left, ast.Constant) and node.left.value is None else node.left
+                continue
+            return node, False
+        return None, False
+
+    def _type_name(self, module: _Module, annotation: Optional[ast.AST]) -> str:
+        if annotation is None:
+            return "string"
+        inner, is_list = self._unwrap(annotation)
+        if is_list:
+            return "array"
+        if isinstance(inner, ast.Subscript):
+            return "object" if _call_name(inner.value) in ["Dict", "dict", "Mapping"] else self._type_name(module, inner.value)
+        if isinstance(inner, ast.Constant) and isinstance(inner.value, str):
+            return TYPE_NAMES.get(inner.value, inner.value)
+        name = _call_name(inner) if inner is not None else None
+        return TYPE_NAMES.get(name, name or "string")
+
+    def _model_fields(self, module: _Module, name: str, depth: int = 0) -> List[Dict]:
+        cls = module.classes[name]
+        fields: Dict[str, Dict] = {}
+        if depth < MAX_RESOLVE_DEPTH:
+            for base in cls.bases:
+                resolved = self._resolve_model(module, base)
+                if resolved:
+                    for field in self._model_fields(resolved[0], resolved[1], depth + 1):
+                        fields[field["name"]] = field
+
+        for statement in cls.body:
+            if not (isinstance(statement, ast.AnnAssign) and isinstance(statement.target, ast.Name)):
+                continue
+            field_name = statement.target.id
+            if field_name.startswith("_") or field_name == "model_config" or _call_name(statement.annotation) == "ClassVar":
+                continue
+            value = statement.value
+            required = value is None or _is_ellipsis(value)
+            description = None
+            if isinstance(value, ast.Call) and _call_name(value) == "Field":
+                has_default = (value.args and not _is_ellipsis(value.args[0])) or any(
+                    keyword.arg in ["default", "default_factory"] and not _is_ellipsis(keyword.value)
+                    for keyword in value.keywords
+                )
+                required = not has_default
+                description_node = _keyword(value, "description")
+                if isinstance(description_node, ast.Constant):
+                    description = description_node.value
+            field = {"name": field_name, "annotation": statement.annotation, "module": module, "required": required}
+            if description:
+                field["description"] = description
+            fields[field_name] = field
+        return list(fields.values())
+
+    def _example(self, module: _Module, annotation: Optional[ast.AST], depth: int = 0):
+        """Response example in the prompt's style: field names mapped to type names."""
+        inner, is_list = self._unwrap(annotation)
+        model = self._resolve_model(module, inner) if inner is not None else None
+        if model and depth < 3:
+            example = {
+                field["name"]: self._example(field["module"], field["annotation"], depth + 1)
+                for field in self._model_fields(*model)
+            }
+        else:
+            example = self._type_name(module, inner) if inner is not None else "any"
+        return [example] if is_list else example
+
+    # ---------- endpoints ----------
+
+    def _params(self, module: _Module, func: ast.AST, path: str) -> List[Dict]:
+        path_params = set(PATH_PARAM_PATTERN.findall(path))
+        args = func.args
+        positional = args.posonlyargs + args.args
+        defaults = [None] * (len(positional) - len(args.defaults)) + list(args.defaults)
+        pairs = list(zip(positional, defaults)) + list(zip(args.kwonlyargs, args.kw_defaults))
+
+        params, body_models = [], []
+        for arg, default in pairs:
+            if arg.arg in ["self", "cls"]:
+                continue
+            annotation = arg.annotation
+            marker = default if isinstance(default, ast.Call) else None
+            if isinstance(annotation, ast.Subscript) and _call_name(annotation.value) == "Annotated":
+                elts = annotation.slice.elts if isinstance(annotation.slice, ast.Tuple) else []
+                marker = next((elt for elt in elts[1:] if isinstance(elt, ast.Call)), marker)
+
+            marker_name = _call_name(marker) if marker is not None else None
+            if marker_name in DEPENDENCY_MARKERS:
+                continue
+            inner, _ = self._unwrap(annotation)
+            if _call_name(inner) in SKIPPED_PARAM_TYPES:
+                continue
+
+            if marker_name in PARAM_SOURCES:
+                location = PARAM_SOURCES[marker_name]
+                marker_default = marker.args[0] if marker.args else _keyword(marker, "default")
+                has_default = (marker_default is not None and not _is_ellipsis(marker_default)) or _keyword(marker, "default_factory") is not None
+                required = not has_default and (marker is default or default is None)
+            else:
+                location, required = None, default is None
+
+            model = self._resolve_model(module, inner) if inner is not None else None
+            if location is None:
+                location = "path" if arg.arg in path_params else "body" if model else "query"
+            if location == "path":
+                required = True
+
+            param_name = arg.arg
+            alias = _keyword(marker, "alias") if marker_name in PARAM_SOURCES else None
+            if isinstance(alias, ast.Constant) and isinstance(alias.value, str):
+                param_name = alias.value
+            elif location == "header":
+                param_name = param_name.replace("_", "-")
+
+            param = {"name": param_name, "in": location, "required": required, "type": self._type_name(module, annotation)}
+            description = _keyword(marker, "description") if marker_name in PARAM_SOURCES else None
+            if isinstance(description, ast.Constant) and isinstance(description.value, str):
+                param["description"] = description.value
+
+            if model and location == "body" and marker_name is None:
+                body_models.append((param, model))
+            params.append(param)
+
+        # A single Pydantic body is sent unwrapped, so its fields are the body params.
+        if len(body_models) == 1:
+            param, model = body_models[0]
+            fields = [
+                {
+                    "name": field["name"], "in": "body", "required": field["required"],
+                    "type": self._type_name(field["module"], field["annotation"]),
+                    **({"description": field["description"]} if field.get("description") else {})
+                }
+                for field in self._model_fields(*model)
+            ]
+            index = params.index(param)
+            params[index:index + 1] = fields
+        return params
+
+    def _responses(self, module: _Module, decorator: ast.Call, method: str) -> Dict:
+        status_node = _keyword(decorator, "status_code")
+        status = "200"
+        if isinstance(status_node, ast.Constant) and isinstance(status_node.value, int):
+            status = str(status_node.value)
+        elif isinstance(status_node, ast.Attribute):
+            digits = re.search(r"\d{3}", status_node.attr)
+            status = digits.group(0) if digits else status
+
+        response_model = _keyword(decorator, "response_model")
+        responses = {
+            status: {
+                "description": "Successful Response",
+                "content_type": "application/json",
+                "response": self._example(module, response_model) if response_model is not None else {}
+            }
+        }
+
+        extra = _keyword(decorator, "responses")
+        if isinstance(extra, ast.Dict):
+            for key, value in zip(extra.keys, extra.values):
+                code = str(key.value) if isinstance(key, ast.Constant) else None
+                if not code or code in responses:
+                    continue
+                entry = {"description": "", "content_type": "application/json", "response": {}}
+                if isinstance(value, ast.Dict):
+                    for item_key, item_value in zip(value.keys, value.values):
+                        if isinstance(item_key, ast.Constant) and item_key.value == "description" and isinstance(item_value, ast.Constant):
+                            entry["description"] = item_value.value
+                        if isinstance(item_key, ast.Constant) and item_key.value == "model":
+                            entry["response"] = self._example(module, item_value)
+                responses[code] = entry
+        return responses
+
+    def _summary(self, decorator: ast.Call, func: ast.AST) -> str:
+        summary = _keyword(decorator, "summary")
+        if isinstance(summary, ast.Constant) and isinstance(summary.value, str):
+            return summary.value
+        docstring = ast.get_docstring(func)
+        if docstring:
+            return docstring.strip().split("\n\n")[0].replace("\n", " ")
+        return func.name.replace("_", " ").strip().capitalize()
+
+    def _mounts(self, router: Tuple[str, str], incoming: Dict, stack: frozenset) -> List[Optional[str]]:
+        """Every prefix a router is mounted under, following include_router edges up to the app."""
+        edges = incoming.get(router)
+        if not edges:
+            return [""]
+        mounts = []
+        for parent, prefix in edges:
+            if parent in stack:
+                continue
+            for mount in self._mounts(parent, incoming, stack | {router}):
+                mounts.append(None if mount is None or prefix is None else mount + prefix)
+        return list(dict.fromkeys(mounts)) or [""]
+
+    def extract(self) -> Tuple[List[Dict], List[str], List[str]]:
+        """
+        Returns (endpoints, handler source per endpoint, files fully covered).
+        A file is covered when it uses FastAPI and every route in it was resolved;
+        uncovered files are left to the LLM extraction.
+        """
+        incoming: Dict[Tuple[str, str], List[Tuple[Tuple[str, str], Optional[str]]]] = {}
+        for module in self.modules.values():
+            for parent_var, child, prefix_node in module.includes:
+                parent = self._symbol_in(module, parent_var, "routers", 0)
+                resolved = self._resolve_symbol(module, child, "routers") if child is not None else None
+                if not parent or not resolved:
+                    module.unsupported = True
+                    continue
+                key = (resolved[0].name, resolved[1])
+                incoming.setdefault(key, []).append(((parent[0].name, parent[1]), self._const_str(module, prefix_node)))
+
+        endpoints, sources, covered = [], [], []
+        for module in self.modules.values():
+            complete = not module.unsupported
+            module_endpoints, module_sources = [], []
+            for receiver, func, decorator, methods in module.routes:
+                resolved = self._resolve_symbol(module, receiver, "routers")
+                route_path = self._const_str(module, decorator.args[0] if decorator.args else _keyword(decorator, "path"))
+                if not resolved or route_path is None:
+                    complete = False
+                    continue
+                router_module, router_var = resolved
+                router_prefix = self._const_str(router_module, router_module.routers[router_var])
+                mounts = self._mounts((router_module.name, router_var), incoming, frozenset())
+                if router_prefix is None or None in mounts:
+                    complete = False
+                    continue
+
+                start = min([d.lineno for d in func.decorator_list] + [func.lineno]) - 1
+                source = "\n".join(module.lines[start:func.end_lineno])
+                for mount in mounts:
+                    full_path = (mount + router_prefix + route_path) or "/"
+                    for method in methods:
+                        module_endpoints.append({
+                            "path": full_path,
+                            "method": method,
+                            "handler": func.name,
+                            "file": module.file_name,
+                            "params": self._params(module, func, full_path),
+                            "summary": self._summary(decorator, func),
+                            "operation": infer_operation(method, func.name, full_path),
+                            "responses": self._responses(module, decorator, method)
+                        })
+                        module_sources.append(source)
+
+            endpoints.extend(module_endpoints)
+            sources.extend(module_sources)
+            if complete and (module.uses_fastapi or module.routes):
+                covered.append(module.file_name)
+        return endpoints, sources, covered
+
+
+def extract_fastapi_endpoints(files: List[Dict], repo_path: str) -> Tuple[List[Dict], List[str], List[str]]:
+    """Static FastAPI extraction over loaded backend files. See `FastAPIExtractor.extract`."""
+    return FastAPIExtractor(files, repo_path).extract()
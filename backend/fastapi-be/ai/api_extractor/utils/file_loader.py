@@ -1,26 +1,108 @@
 import os
+import re
 import shutil
 import tempfile
 from git import Repo
 from typing import List, Dict,Optional
 import stat
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from ai.api_extractor.utils.repo_cache import checkout_worktree, is_cached_worktree, release_worktree
+from ai.api_extractor.utils.ignore_rules import DEFAULT_IGNORED_DIRS, IgnoreRules, has_ignored_dir
+from ai.api_extractor.utils.api_classifier import classify_api_file
+
+load_dotenv()
 
 # from configs.logger import get_custom_logger
 
 # logger = get_custom_logger(__name__)
 
 BACKEND_EXTS = [".py", ".js", ".ts"]
-API_HINTS = ["api", "endpoint", "route", "service", "controller"]
+USE_REPO_CACHE = os.getenv("USE_REPO_CACHE", "true").lower() == "true"
+CLONE_MODES = ["full", "shallow", "blobless", "sparse"]
+DEFAULT_CLONE_MODE = os.getenv("CLONE_MODE", "full")
+
+FILE_LOADER_WORKERS = int(os.getenv("FILE_LOADER_WORKERS", min(32, (os.cpu_count() or 1) * 4)))
+MAX_BACKEND_FILE_BYTES = int(os.getenv("MAX_BACKEND_FILE_BYTES", 512 * 1024))
+GENERATED_SUFFIXES = [".min.js", ".bundle.js", ".chunk.js", ".d.ts", "_pb2.py", "_pb2_grpc.py", ".pb.js", ".pb.ts"]
+# Standard generated-code banners: "@generated" and "Code generated ... DO NOT EDIT.",
+# only looked for in the comment lines the file starts with.
+COMMENT_LINE = re.compile(r"^\s*(?:#|//|/\*|\*)")
+GENERATED_BANNER = re.compile(r"@generated\b|\bCode generated\b.*\bDO NOT EDIT\b")
+GENERATED_HEADER_CHARS = 1024
+MINIFIED_MIN_BYTES = 2048
+MINIFIED_AVG_LINE_LENGTH = 300
+MINIFIED_MAX_LINE_LENGTH = 2000
+
+def get_sparse_patterns(sparse_paths: Optional[List[str]] = None) -> List[str]:
+    """
+    Non-cone sparse-checkout patterns selecting backend sources (and the
+    .gitignore files the loader honours) only,
+    optionally restricted to the given subdirectories.
+    """
+    directories = [path.strip("/") for path in (sparse_paths or []) if path.strip("/")]
+    if not directories:
+        return [f"*{ext}" for ext in BACKEND_EXTS] + [".gitignore"]
+    return [f"/{directory}/**/*{ext}" for directory in directories for ext in BACKEND_EXTS] + [".gitignore"]
+
+def is_sparse_path(path: str, sparse_paths: Optional[List[str]] = None) -> bool:
+    """Python equivalent of `get_sparse_patterns` for a repo-relative, '/'-separated path."""
+    if path.split("/")[-1] == ".gitignore":
+        return True
+    if not any(path.endswith(ext) for ext in BACKEND_EXTS):
+        return False
+    directories = [p.strip("/") for p in (sparse_paths or []) if p.strip("/")]
+    return not directories or any(path.startswith(f"{directory}/") for directory in directories)
+
+def clone_repo(
+    repo_url: str,
+    branch: Optional[str] = None,
+    use_cache: bool = USE_REPO_CACHE,
+    clone_mode: Optional[str] = None,
+    sparse_paths: Optional[List[str]] = None
+) -> str:
+    """
+    Clone a Git repository to a temporary directory.
+    With `use_cache`, a worktree of the persistent mirror cache is returned instead.
+
+    clone_mode:
+        full     - complete history and blobs.
+        shallow  - depth-1 clone of the single branch.
+        blobless - partial clone (`--filter=blob:none`), blobs fetched on checkout.
+        sparse   - depth-1 partial clone checking out only backend files
+                   (under `sparse_paths` if given).
+    The cache mirror is already incremental and blob-filtered, so on the cached
+    path only the sparse selection of worktree files applies.
+    """
+    clone_mode = clone_mode or DEFAULT_CLONE_MODE
+    if clone_mode not in CLONE_MODES:
+        raise ValueError(f"Unsupported clone mode '{clone_mode}'. Expected one of {CLONE_MODES}.")
+
+    sparse_patterns = get_sparse_patterns(sparse_paths) if clone_mode == "sparse" else None
+
+    if use_cache:
+        path_filter = (lambda path: is_sparse_path(path, sparse_paths)) if clone_mode == "sparse" else None
+        return checkout_worktree(repo_url, branch, path_filter=path_filter)
+
+    clone_kwargs = {}
+    if branch:
+        clone_kwargs["branch"] = branch
+    if clone_mode in ["shallow", "sparse"]:
+        clone_kwargs["depth"] = 1
+        clone_kwargs["single_branch"] = True
+    if clone_mode in ["blobless", "sparse"]:
+        clone_kwargs["filter"] = "blob:none"
+    if clone_mode == "sparse":
+        clone_kwargs["no_checkout"] = True
 
-def clone_repo(repo_url: str, branch: Optional[str] = None) -> str:
-    """Clone a Git repository to a temporary directory."""
     temp_dir = tempfile.mkdtemp(prefix="cloned_repo_")
     try:
         # logger.info(f"Cloning repository {repo_url} on branch {branch} to {temp_dir}")
-        if branch:
-            Repo.clone_from(repo_url, temp_dir, branch=branch)
-        else:
-            Repo.clone_from(repo_url, temp_dir)
+        repo = Repo.clone_from(repo_url, temp_dir, **clone_kwargs)
+        if sparse_patterns:
+            repo.git.sparse_checkout("set", "--no-cone", *sparse_patterns)
+            repo.git.checkout(branch or repo.active_branch.name)
         # logger.info(f"Successfully cloned repository to {temp_dir}")
         return temp_dir
     except Exception as e:
@@ -29,31 +111,138 @@ def clone_repo(repo_url: str, branch: Optional[str] = None) -> str:
         shutil.rmtree(temp_dir, ignore_errors=True)
         raise
 
-def load_backend_files(repo_path: str) -> List[str]:
-    """Load all backend files from the cloned repository."""
-    backend_files = []
-    for root, _, files in os.walk(repo_path):
-        for file in files:
-            if any(file.endswith(ext) for ext in BACKEND_EXTS):
-                try:
-                    with open(os.path.join(root, file), 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    language = (
-                        "python" if file.endswith(".py") else
-                        "javascript" if file.endswith(".js") else
-                        "typescript" if file.endswith(".ts") else
-                        "unknown"
-                    )
-                    is_api_file = any(hint in content.lower() for hint in API_HINTS)
-                    backend_files.append({
-                        "path": os.path.join(root, file),
-                        "language": language,
-                        "is_api_file": is_api_file,
-                        "content": content
-                    })
-                except Exception as e:
-                    print(f"Could not read file {file} in {root}: {e}")
-                    # logger.error(f"Could not read file {file} in {root}: {e}")
+def _is_generated_name(file: str) -> bool:
+    return any(file.endswith(suffix) for suffix in GENERATED_SUFFIXES)
+
+def _is_generated_content(content: str) -> bool:
+    """Detects minified bundles and files carrying a generated-code banner."""
+    for line in content[:GENERATED_HEADER_CHARS].split("\n"):
+        if not line.strip():
+            continue
+        if not COMMENT_LINE.match(line):
+            break
+        if GENERATED_BANNER.search(line):
+            return True
+    if len(content) < MINIFIED_MIN_BYTES:
+        return False
+    lines = content.count("\n") + 1
+    return len(content) / lines > MINIFIED_AVG_LINE_LENGTH or max(map(len, content.splitlines())) > MINIFIED_MAX_LINE_LENGTH
+
+def _walk_backend_paths(repo_path: str) -> List[str]:
+    """
+    Iterative scandir walk returning candidate backend files in a deterministic order.
+    Default vendor/build directories and .gitignore'd paths are pruned without being entered,
+    oversized and generated-by-name files are skipped without being opened.
+    """
+    ignore_rules = IgnoreRules()
+    paths = []
+    stack = [""]
+    while stack:
+        relative_dir = stack.pop()
+        try:
+            with os.scandir(os.path.join(repo_path, relative_dir)) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError as e:
+            print(f"Could not list directory {relative_dir or repo_path}: {e}")
+            continue
+
+        if any(entry.name == ".gitignore" for entry in entries):
+            ignore_rules.load_gitignore(repo_path, relative_dir)
+
+        subdirs = []
+        for entry in entries:
+            relative_path = f"{relative_dir}/{entry.name}" if relative_dir else entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in DEFAULT_IGNORED_DIRS and not ignore_rules.is_ignored(relative_path, is_dir=True):
+                        subdirs.append(relative_path)
+                    continue
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                if not any(entry.name.endswith(ext) for ext in BACKEND_EXTS) or _is_generated_name(entry.name):
+                    continue
+                if ignore_rules.is_ignored(relative_path):
+                    continue
+                if entry.stat(follow_symlinks=False).st_size > MAX_BACKEND_FILE_BYTES:
+                    print(f"Skipping {relative_path}: larger than {MAX_BACKEND_FILE_BYTES} bytes")
+                    continue
+            except OSError:
+                continue
+            paths.append(entry.path)
+        stack.extend(reversed(subdirs))
+    return paths
+
+def _iter_candidate_files(repo_path: str, include_paths: Optional[List[str]] = None) -> List[str]:
+    """
+    Candidate file paths for the whole tree, or only for `include_paths` (repo-relative).
+    Both apply the same filters, including the repo's .gitignore rules, so an
+    incremental run loads the files a full run would.
+    """
+    if include_paths is None:
+        return _walk_backend_paths(repo_path)
+
+    ignore_rules = IgnoreRules()
+    paths = []
+    for relative_path in include_paths:
+        relative_path = relative_path.replace("\\", "/")
+        file = os.path.basename(relative_path)
+        if not any(file.endswith(ext) for ext in BACKEND_EXTS) or _is_generated_name(file):
+            continue
+        if has_ignored_dir(relative_path):
+            continue
+        ignore_rules.load_parent_gitignores(repo_path, relative_path)
+        if ignore_rules.is_excluded(relative_path):
+            continue
+        path = os.path.join(repo_path, relative_path)
+        try:
+            if os.path.isfile(path) and os.path.getsize(path) <= MAX_BACKEND_FILE_BYTES:
+                paths.append(path)
+        except OSError:
+            continue
+    return paths
+
+def _read_backend_file(repo_path: str, path: str) -> Optional[Dict]:
+    file = os.path.basename(path)
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        content = data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+    except Exception as e:
+        print(f"Could not read file {file} in {os.path.dirname(path)}: {e}")
+        # logger.error(f"Could not read file {file} in {root}: {e}")
+        return None
+
+    if _is_generated_content(content):
+        return None
+
+    language = (
+        "python" if file.endswith(".py") else
+        "javascript" if file.endswith(".js") else
+        "typescript" if file.endswith(".ts") else
+        "unknown"
+    )
+    is_api_file = classify_api_file(data, os.path.relpath(path, repo_path))
+    return {
+        "path": path,
+        "language": language,
+        "is_api_file": is_api_file,
+        "content": content
+    }
+
+def load_backend_files(repo_path: str, include_paths: Optional[List[str]] = None) -> List[str]:
+    """
+    Load all backend files from the cloned repository,
+    or only `include_paths` (repo-relative) when given.
+    Files are read on a thread pool; the result keeps the walk order.
+    """
+    paths = _iter_candidate_files(repo_path, include_paths)
+    read_file = partial(_read_backend_file, repo_path)
+    if len(paths) <= 1 or FILE_LOADER_WORKERS <= 1:
+        results = [read_file(path) for path in paths]
+    else:
+        with ThreadPoolExecutor(max_workers=min(FILE_LOADER_WORKERS, len(paths))) as executor:
+            results = list(executor.map(read_file, paths))
+    backend_files = [result for result in results if result is not None]
     # logger.info(f"Found {len(backend_files)} backend files in {repo_path}")
     return backend_files
 
@@ -78,4 +267,14 @@ def delete_temp_repo(path: str):
         except Exception as e:
             print(f"Failed to delete {path}: {e}")
     else:
-        print(f"Path does not exist: {path}")
\ No newline at end of file
+        print(f"Path does not exist: {path}")
+
+def cleanup_repo(path: str):
+    """
+    Releases a path returned by `clone_repo`: cached worktrees are detached from
+    their mirror, plain clones are deleted.
+    """
+    if is_cached_worktree(path):
+        release_worktree(path)
+    else:
+        delete_temp_repo(path)
@@ -0,0 +1,141 @@
+import os
+import re
+from typing import List, Optional, Tuple
+
+# Vendor, build and tooling directories that never contain the repo's own API code.
+DEFAULT_IGNORED_DIRS = {
+    ".git", ".hg", ".svn",
+    "node_modules", "bower_components", "jspm_packages", "vendor",
+    "venv", ".venv", "env", ".env", "virtualenv", "site-packages", "__pypackages__",
+    "__pycache__", ".mypy_cache", ".pytest_cache", ".ruff_cache", ".tox", ".nox",
+    "dist", "build", "out", ".next", ".nuxt", ".svelte-kit", ".turbo", ".parcel-cache",
+    ".serverless", ".aws-sam", "coverage", ".nyc_output", "htmlcov",
+    "fixtures", "__fixtures__", "__mocks__", "__snapshots__", "testdata",
+}
+
+
+def _translate(pattern: str) -> str:
+    """Translates the glob part of a gitignore pattern to a regex (without anchors)."""
+    regex = ""
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            regex += "/.*"
+            i += 3
+        elif pattern.startswith("**", i):
+            regex += ".*"
+            i += 2
+        elif pattern[i] == "*":
+            regex += "[^/]*"
+            i += 1
+        elif pattern[i] == "?":
+            regex += "[^/]"
+            i += 1
+        elif pattern[i] == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                regex += re.escape(pattern[i])
+                i += 1
+                continue
+            body = pattern[i + 1:end]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            regex += f"[{body}]"
+            i = end + 1
+        elif pattern[i] == "\\" and i + 1 < len(pattern):
+            regex += re.escape(pattern[i + 1])
+            i += 2
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    return regex
+
+
+def parse_gitignore(text: str) -> List[Tuple[re.Pattern, bool, bool]]:
+    """Parses .gitignore content into (regex, negated, directory_only) rules."""
+    rules = []
+    for raw_line in text.splitlines():
+        line = raw_line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+
+        negated = line.startswith("!")
+        if negated:
+            line = line[1:]
+        directory_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+
+        anchored = "/" in line
+        body = _translate(line.lstrip("/"))
+        regex = f"^{body}$" if anchored else f"^(?:.*/)?{body}$"
+        rules.append((re.compile(regex), negated, directory_only))
+    return rules
+
+
+class IgnoreRules:
+    """
+    .gitignore-aware path filter. Rules are collected per directory while walking;
+    paths are '/'-separated and relative to the repo root. The last matching rule wins.
+    """
+
+    def __init__(self):
+        self._rules: List[Tuple[str, re.Pattern, bool, bool]] = []
+        self._loaded_dirs = set()
+
+    def add_gitignore(self, base_dir: str, text: str):
+        """Adds the rules of the .gitignore located in `base_dir` ('' for the repo root)."""
+        for regex, negated, directory_only in parse_gitignore(text):
+            self._rules.append((base_dir, regex, negated, directory_only))
+
+    def load_gitignore(self, repo_path: str, base_dir: str):
+        path = os.path.join(repo_path, base_dir, ".gitignore")
+        try:
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                self.add_gitignore(base_dir, f.read())
+        except OSError:
+            pass
+
+    def load_parent_gitignores(self, repo_path: str, relative_path: str):
+        """
+        Loads the .gitignore of every directory above `relative_path`, outermost first
+        and each once, for checking single paths without walking the tree.
+        """
+        parts = relative_path.split("/")[:-1]
+        for depth in range(len(parts) + 1):
+            base_dir = "/".join(parts[:depth])
+            if base_dir not in self._loaded_dirs:
+                self._loaded_dirs.add(base_dir)
+                self.load_gitignore(repo_path, base_dir)
+
+    def is_excluded(self, relative_path: str) -> bool:
+        """Whether a walk that prunes ignored directories leaves out the file at `relative_path`."""
+        parts = relative_path.split("/")
+        if any(self.is_ignored("/".join(parts[:depth]), is_dir=True) for depth in range(1, len(parts))):
+            return True
+        return self.is_ignored(relative_path)
+
+    def is_ignored(self, relative_path: str, is_dir: bool = False) -> bool:
+        ignored = False
+        for base_dir, regex, negated, directory_only in self._rules:
+            if directory_only and not is_dir:
+                continue
+            if base_dir:
+                if not relative_path.startswith(base_dir + "/"):
+                    continue
+                candidate = relative_path[len(base_dir) + 1:]
+            else:
+                candidate = relative_path
+            if regex.match(candidate):
+                ignored = not negated
+        return ignored
+
+
+def has_ignored_dir(relative_path: str, ignored_dirs: Optional[set] = None) -> bool:
+    """True if any directory component of `relative_path` is a default-ignored directory."""
+    ignored_dirs = DEFAULT_IGNORED_DIRS if ignored_dirs is None else ignored_dirs
+    return any(part in ignored_dirs for part in relative_path.replace("\\", "/").split("/")[:-1])
@@ -0,0 +1,95 @@
+import os
+from typing import Dict, List, Optional, Tuple
+from git import Repo
+from git.exc import GitCommandError
+
+from db.get_mongo_client import get_mongo_client
+from configs.logger import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+
+def get_head_commit(repo_path: str) -> Optional[str]:
+    """Returns the commit SHA checked out at `repo_path`, or None if it cannot be read."""
+    try:
+        return Repo(repo_path).head.commit.hexsha
+    except Exception as e:
+        logger.warning(f"Could not resolve HEAD commit of {repo_path}: {e}")
+        return None
+
+
+def get_changed_files(repo_path: str, base_sha: str, head_sha: str) -> Optional[Tuple[List[str], List[str]]]:
+    """
+    Diffs `base_sha..head_sha` and returns (changed or added paths, deleted paths),
+    repo-relative with '/' separators. Renames count as delete + add.
+    Returns None when the diff is not possible (e.g. base commit missing from a shallow clone).
+    """
+    try:
+        output = Repo(repo_path).git.diff("--name-status", "-M", "-z", base_sha, head_sha)
+    except GitCommandError as e:
+        logger.warning(f"Cannot diff {base_sha[:10]}..{head_sha[:10]}: {e}")
+        return None
+
+    changed, deleted = [], []
+    fields = [field for field in output.split("\0") if field]
+    i = 0
+    while i < len(fields):
+        status = fields[i]
+        if status.startswith(("R", "C")):
+            old_path, new_path = fields[i + 1], fields[i + 2]
+            if status.startswith("R"):
+                deleted.append(old_path)
+            changed.append(new_path)
+            i += 3
+            continue
+        path = fields[i + 1]
+        if status.startswith("D"):
+            deleted.append(path)
+        else:
+            changed.append(path)
+        i += 2
+
+    return changed, deleted
+
+
+def load_previous_extraction(repo_url: str, branch: Optional[str] = None, user_id: Optional[str] = None) -> Optional[Dict]:
+    """Returns the user's saved endpoints document for repo/branch, if it records a commit SHA."""
+    try:
+        document = get_mongo_client().find_one("endpoints", {"repo_url": repo_url, "branch": branch, "user_id": user_id})
+    except Exception as e:
+        logger.warning(f"Could not load saved endpoints for {repo_url}: {e}")
+        return None
+
+    if not document or not document.get("commit_sha") or not document.get("endpoints"):
+        return None
+    return document
+
+
+def normalize_path(path: str) -> str:
+    """Repo-relative path with '/' separators and no "./" prefix, for exact comparison."""
+    return os.path.normpath(path).replace("\\", "/")
+
+
+def _in_files(endpoint_file: Optional[str], files: set) -> bool:
+    # Exact match only: "main.py" and "app/main.py" are different files.
+    return bool(endpoint_file) and normalize_path(endpoint_file) in files
+
+
+def merge_incremental_endpoints(
+    previous_endpoints: Dict[str, List[Dict]],
+    new_endpoints: List[Dict],
+    changed_files: List[str],
+    deleted_files: List[str]
+) -> List[Dict]:
+    """
+    Combines the stored grouping with freshly extracted endpoints: endpoints of
+    changed or deleted files are dropped from the stored set, new ones are appended.
+    """
+    stale_files = {normalize_path(path) for path in changed_files + deleted_files}
+    kept = [
+        ep
+        for group in previous_endpoints.values()
+        for ep in group
+        if not _in_files(ep.get("file"), stale_files)
+    ]
+    return kept + new_endpoints
@@ -0,0 +1,1059 @@
+import os
+import re
+import bisect
+import posixpath
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from ai.api_extractor.utils.fastapi_ast import infer_operation
+
+HTTP_METHODS = ["get", "post", "put", "delete", "patch", "options", "head", "all"]
+NEST_METHODS = {"Get": "GET", "Post": "POST", "Put": "PUT", "Delete": "DELETE", "Patch": "PATCH", "Options": "OPTIONS", "Head": "HEAD", "All": "ALL"}
+NEST_PARAMS = {"Param": "path", "Query": "query", "Body": "body", "Headers": "header"}
+APP_FACTORIES = ["express", "fastify", "Fastify", "Koa", "Hono", "createServer", "polka"]
+ROUTER_FACTORIES = ["Router", "KoaRouter", "createRouter"]
+# Receivers accepted without a visible factory call (e.g. `module.exports = (app) => { app.get(...) }`).
+ROUTER_NAMES = ["app", "router", "server", "fastify", "instance", "routes", "api", "route"]
+CLIENT_NAMES = ["axios", "http", "https", "client", "request", "fetch", "ky", "superagent", "agent", "$"]
+REQUEST_OBJECTS = ["req", "request", "ctx"]
+REQUEST_SOURCES = {"params": "path", "query": "query", "body": "body", "headers": "header"}
+REGEX_PREFIX_KEYWORDS = ["return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw", "instanceof", "yield", "await"]
+MODULE_EXTENSIONS = ["", ".js", ".ts", ".mjs", ".cjs", ".jsx", ".tsx", "/index.js", "/index.ts"]
+PARAM_ROUTER = "<param>"
+
+TOKEN_PATTERN = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<comment>//[^\n]*|/\*[\s\S]*?(?:\*/|\Z))
+  | (?P<ident>[A-Za-z_$][\w$]*)
+  | (?P<num>\d[\w.]*)
+  | (?P<string>'(?:[^'\\\n]|\\.)*'|"(?:[^"\\\n]|\\.)*")
+  | (?P<punct>=>|\.\.\.|\?\.|[{}()\[\];,.:@=<>!+\-*%&|^~?])
+  | (?P<other>[\s\S])
+""", re.VERBOSE)
+
+
+class JSToken(NamedTuple):
+    kind: str
+    value: str
+    start: int
+    end: int
+
+
+def _skip_string(source: str, i: int) -> int:
+    quote = source[i]
+    j = i + 1
+    while j < len(source) and source[j] != quote and source[j] != "\n":
+        j += 2 if source[j] == "\\" else 1
+    return min(j + 1, len(source))
+
+
+def _skip_template(source: str, i: int) -> Tuple[int, bool]:
+    """Returns (end offset, has ${} expressions) of the template literal starting at `i`."""
+    j, has_expr = i + 1, False
+    while j < len(source):
+        c = source[j]
+        if c == "\\":
+            j += 2
+        elif c == "`":
+            return j + 1, has_expr
+        elif source.startswith("${", j):
+            has_expr, depth, j = True, 1, j + 2
+            while j < len(source) and depth:
+                c = source[j]
+                if c in "'\"":
+                    j = _skip_string(source, j)
+                    continue
+                if c == "`":
+                    j, _ = _skip_template(source, j)
+                    continue
+                depth += 1 if c == "{" else -1 if c == "}" else 0
+                j += 1
+        else:
+            j += 1
+    return len(source), has_expr
+
+
+def _skip_regex(source: str, i: int) -> Optional[int]:
+    j, in_class = i + 1, False
+    while j < len(source):
+        c = source[j]
+        if c == "\n":
+            return None
+        if c == "\\":
+            j += 2
+            continue
+        if c == "[":
+            in_class = True
+        elif c == "]":
+            in_class = False
+        elif c == "/" and not in_class:
+            j += 1
+            while j < len(source) and (source[j].isalnum() or source[j] == "_"):
+                j += 1
+            return j
+        j += 1
+    return None
+
+
+def _regex_allowed(tokens: List[JSToken]) -> bool:
+    if not tokens:
+        return True
+    last = tokens[-1]
+    if last.kind == "punct":
+        return last.value not in [")", "]", "}"]
+    return last.kind == "ident" and last.value in REGEX_PREFIX_KEYWORDS
+
+
+def tokenize_js(source: str) -> List[JSToken]:
+    """
+    Lexes JavaScript/TypeScript into identifiers, numbers, strings, template literals,
+    regex literals and punctuation; whitespace and comments are dropped. Strings carry
+    their unquoted value; templates without ${} are reported as plain strings.
+    """
+    tokens: List[JSToken] = []
+    i = 0
+    while i < len(source):
+        c = source[i]
+        if c == "`":
+            end, has_expr = _skip_template(source, i)
+            tokens.append(JSToken("template" if has_expr else "string", source[i + 1:end - 1], i, end))
+            i = end
+            continue
+        if c == "/" and not source.startswith("//", i) and not source.startswith("/*", i):
+            end = _skip_regex(source, i) if _regex_allowed(tokens) else None
+            if end:
+                tokens.append(JSToken("regex", source[i:end], i, end))
+            else:
+                tokens.append(JSToken("punct", "/", i, i + 1))
+            i = end or i + 1
+            continue
+
+        match = TOKEN_PATTERN.match(source, i)
+        kind = match.lastgroup
+        if kind == "string":
+            tokens.append(JSToken("string", match.group()[1:-1], i, match.end()))
+        elif kind not in ["ws", "comment"]:
+            tokens.append(JSToken("punct" if kind == "other" else kind, match.group(), i, match.end()))
+        i = match.end()
+    return tokens
+
+
+def _match_brackets(tokens: List[JSToken]) -> Dict[int, int]:
+    pairs, stack = {}, []
+    closing = {")": "(", "]": "[", "}": "{"}
+    for i, token in enumerate(tokens):
+        if token.kind != "punct":
+            continue
+        if token.value in "([{":
+            stack.append(i)
+        elif token.value in closing:
+            while stack and tokens[stack[-1]].value != closing[token.value]:
+                stack.pop()
+            if stack:
+                opened = stack.pop()
+                pairs[opened] = i
+                pairs[i] = opened
+    return pairs
+
+
+def join_route_paths(*parts: str) -> str:
+    """Joins mount prefixes and route paths Express-style: single slashes, no trailing slash."""
+    path = "/" + "/".join(part.strip("/") for part in parts if part and part.strip("/"))
+    return re.sub(r"/{2,}", "/", path)
+
+
+class _JSFile:
+    """Tokens and route facts of one JS/TS file."""
+
+    def __init__(self, file_name: str, source: str, language: str):
+        self.file_name = file_name
+        self.source = source
+        self.language = language
+        self.tokens = tokenize_js(source)
+        self.partner = _match_brackets(self.tokens)
+        self.line_starts = [0] + [m.end() for m in re.finditer("\n", source)]
+        self.constants: Dict[str, str] = {}
+        self.routers: Dict[str, Dict] = {}
+        self.imports: Dict[str, Tuple[str, Optional[str]]] = {}
+        self.exports: Dict[str, str] = {}
+        self.functions: Dict[str, Tuple[int, int]] = {}
+        self.routes: List[Dict] = []
+        self.mounts: List[Dict] = []
+        self.global_prefix: Optional[str] = None
+
+    def tok(self, i: int) -> Optional[JSToken]:
+        return self.tokens[i] if 0 <= i < len(self.tokens) else None
+
+    def is_punct(self, i: int, value: str) -> bool:
+        token = self.tok(i)
+        return token is not None and token.kind == "punct" and token.value == value
+
+    def is_ident(self, i: int, value: Optional[str] = None) -> bool:
+        token = self.tok(i)
+        return token is not None and token.kind == "ident" and (value is None or token.value == value)
+
+    def line_of(self, offset: int) -> int:
+        return bisect.bisect_right(self.line_starts, offset)
+
+    def text(self, start_tok: int, end_tok: int) -> str:
+        return self.source[self.tokens[start_tok].start:self.tokens[end_tok].end]
+
+
+class JSRouteIndex:
+    """
+    Repository-wide index of JS/TS route registrations: Express/Koa/Hono style
+    `x.get('/path', ...)`, `router.route('/path').get().post()` chains, Fastify
+    `fastify.get` / `fastify.route({...})`, NestJS controllers, plus `app.use` /
+    `fastify.register` / `routes(app)` mounts resolved across files.
+    Every registration gets a brace-balanced extent used for chunking and, when its
+    path and mounts resolve, a static endpoint.
+    """
+
+    def __init__(self, files: List[Dict], repo_path: str):
+        self.files: Dict[str, _JSFile] = {}
+        for file in files:
+            if file.get("language") not in ["javascript", "typescript"]:
+                continue
+            file_name = os.path.relpath(file["path"], start=repo_path)
+            try:
+                js_file = _JSFile(file_name, file["content"], file["language"])
+                self._scan(js_file)
+            except RecursionError:
+                continue
+            self.files[self._key(file_name)] = js_file
+        self.global_prefix = next((f.global_prefix for f in self.files.values() if f.global_prefix), "")
+        self._incoming = self._mount_graph()
+
+    @staticmethod
+    def _key(file_name: str) -> str:
+        return posixpath.normpath(file_name.replace("\\", "/"))
+
+    # ---------- scanning ----------
+
+    def _args(self, f: _JSFile, open_idx: int) -> List[Tuple[int, int]]:
+        """Token ranges (inclusive) of the top-level arguments of the call whose '(' is at `open_idx`."""
+        close = f.partner.get(open_idx)
+        if close is None or close == open_idx + 1:
+            return []
+        args, start, i = [], open_idx + 1, open_idx + 1
+        while i < close:
+            if f.tokens[i].kind == "punct" and f.tokens[i].value in "([{" and i in f.partner:
+                i = f.partner[i] + 1
+                continue
+            if f.is_punct(i, ","):
+                if i > start:
+                    args.append((start, i - 1))
+                start = i + 1
+            i += 1
+        if start < close:
+            args.append((start, close - 1))
+        return args
+
+    def _template_value(self, f: _JSFile, template: str) -> Optional[str]:
+        """Value of a template literal whose ${} expressions are all string constants."""
+        names = re.findall(r"\$\{\s*([^}]*?)\s*\}", template)
+        if any(name not in f.constants for name in names):
+            return None
+        return re.sub(r"\$\{\s*([^}]*?)\s*\}", lambda m: f.constants[m.group(1)], template)
+
+    def _string_at(self, f: _JSFile, start: int, end: int) -> Optional[str]:
+        """Value of a string literal, a string constant, or a `+` concatenation of those."""
+        parts, i = [], start
+        while i <= end:
+            token = f.tokens[i]
+            if token.kind == "string":
+                parts.append(token.value)
+            elif token.kind == "template":
+                value = self._template_value(f, token.value)
+                if value is None:
+                    return None
+                parts.append(value)
+            elif token.kind == "ident" and token.value in f.constants:
+                parts.append(f.constants[token.value])
+            else:
+                return None
+            if i + 1 <= end and not f.is_punct(i + 1, "+"):
+                return None
+            i += 2
+        return "".join(parts) if parts else None
+
+    def _object_string(self, f: _JSFile, open_idx: int, key: str) -> Optional[str]:
+        """String value of `key` in the object literal whose '{' is at `open_idx`."""
+        close = f.partner.get(open_idx, open_idx)
+        depth = 0
+        for i in range(open_idx + 1, close):
+            token = f.tokens[i]
+            if token.kind == "punct" and token.value in "([{":
+                depth += 1
+            elif token.kind == "punct" and token.value in ")]}":
+                depth -= 1
+            elif depth == 0 and token.kind in ["ident", "string"] and token.value == key and f.is_punct(i + 1, ":"):
+                value = f.tok(i + 2)
+                if value is not None and value.kind == "string":
+                    return value.value
+        return None
+
+    def _chain(self, f: _JSFile, i: int) -> Tuple[List[str], int]:
+        """Reads `a.b.c` starting at token `i`; returns (names, index after the chain)."""
+        names = []
+        while f.is_ident(i):
+            names.append(f.tokens[i].value)
+            if (f.is_punct(i + 1, ".") or f.is_punct(i + 1, "?.")) and f.is_ident(i + 2):
+                i += 2
+            else:
+                return names, i + 1
+        return names, i
+
+    def _chain_start(self, f: _JSFile, i: int) -> int:
+        """Walks back from an identifier to the start of its member chain (`this.router` -> `this`)."""
+        while i >= 2 and (f.is_punct(i - 1, ".") or f.is_punct(i - 1, "?.")) and f.is_ident(i - 2):
+            i -= 2
+        return i
+
+    def _function_extent(self, f: _JSFile, i: int) -> Optional[int]:
+        """End token of the function expression starting at `i` (function, arrow or async of those)."""
+        if f.is_ident(i, "async"):
+            i += 1
+        if f.is_ident(i, "function"):
+            j = i + 1
+            while j < len(f.tokens) and not f.is_punct(j, "("):
+                j += 1
+            j = f.partner.get(j)
+            while j is not None and j < len(f.tokens) and not f.is_punct(j, "{"):
+                j += 1
+            return f.partner.get(j) if j is not None else None
+        if f.is_punct(i, "("):
+            j = f.partner.get(i)
+            if j is None:
+                return None
+            j += 1
+            if f.is_punct(j, ":"):
+                while j < len(f.tokens) and not f.is_punct(j, "=>") and not f.is_punct(j, ";"):
+                    j += 1
+        elif f.is_ident(i):
+            j = i + 1
+        else:
+            return None
+        if not f.is_punct(j, "=>"):
+            return None
+        body = j + 1
+        if f.is_punct(body, "{"):
+            return f.partner.get(body)
+        k = body
+        while k < len(f.tokens):
+            token = f.tokens[k]
+            if token.kind == "punct" and token.value in "([{" and k in f.partner:
+                k = f.partner[k] + 1
+                continue
+            if token.kind == "punct" and token.value in [",", ";", ")", "]", "}"]:
+                break
+            k += 1
+        return k - 1
+
+    def _factory(self, f: _JSFile, i: int) -> Optional[Dict]:
+        """Router/app info if the expression at `i` creates one (`express()`, `express.Router()`, `new Hono()` ...)."""
+        if f.is_ident(i, "await"):
+            i += 1
+        if f.is_ident(i, "new"):
+            i += 1
+        names, j = self._chain(f, i)
+        if names == ["require"] and f.is_punct(j, "(") and f.tok(j + 1) and f.tokens[j + 1].kind == "string":
+            close = f.partner.get(j)
+            spec = f.tokens[j + 1].value
+            if close is None:
+                return None
+            if f.is_punct(close + 1, ".") and f.is_ident(close + 2) and f.is_punct(close + 3, "("):
+                names, j = [f.tokens[close + 2].value], close + 3
+            elif f.is_punct(close + 1, "("):
+                names, j = [spec], close + 1
+            else:
+                return None
+        if not names or not f.is_punct(j, "("):
+            return None
+        if names[-1] in APP_FACTORIES:
+            return {"kind": "app", "prefix": ""}
+        if names[-1] in ROUTER_FACTORIES:
+            args = self._args(f, j)
+            prefix = ""
+            if args and f.is_punct(args[0][0], "{"):
+                prefix = self._object_string(f, args[0][0], "prefix") or ""
+            return {"kind": "router", "prefix": prefix}
+        return None
+
+    def _require_at(self, f: _JSFile, i: int) -> Optional[Tuple[str, Optional[str], int]]:
+        """(spec, member, end token) for `require('spec')` or `require('spec').member` at `i`."""
+        if f.is_ident(i, "await"):
+            i += 1
+        if not (f.is_ident(i, "require") and f.is_punct(i + 1, "(") and f.tok(i + 2) and f.tokens[i + 2].kind == "string"):
+            return None
+        close = f.partner.get(i + 1)
+        if close is None:
+            return None
+        if f.is_punct(close + 1, ".") and f.is_ident(close + 2):
+            return f.tokens[i + 2].value, f.tokens[close + 2].value, close + 2
+        return f.tokens[i + 2].value, None, close
+
+    def _record_function(self, f: _JSFile, name: str, start: int, value_idx: int):
+        end = self._function_extent(f, value_idx)
+        if end is not None:
+            f.functions[name] = (start, end)
+
+    def _destructured_names(self, f: _JSFile, open_idx: int) -> List[Tuple[str, str]]:
+        """(imported name, local name) pairs of `{ a, b: c }` or `{ a, b as c }`."""
+        names, i, close = [], open_idx + 1, f.partner.get(open_idx, open_idx)
+        while i < close:
+            if f.is_ident(i):
+                imported = f.tokens[i].value
+                if (f.is_punct(i + 1, ":") or f.is_ident(i + 1, "as")) and f.is_ident(i + 2):
+                    names.append((imported, f.tokens[i + 2].value))
+                    i += 3
+                    continue
+                names.append((imported, imported))
+            i += 1
+        return names
+
+    def _scan(self, f: _JSFile):
+        tokens = f.tokens
+        consumed = set()
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            if token.kind != "ident" and not (token.kind == "punct" and token.value in [".", "@"]):
+                i += 1
+                continue
+            value = token.value
+
+            if value in ["const", "let", "var"] and token.kind == "ident":
+                self._scan_declaration(f, i)
+            elif value == "import" and token.kind == "ident" and not f.is_punct(i + 1, "("):
+                self._scan_import(f, i)
+            elif value == "function" and f.is_ident(i + 1) and f.is_punct(i + 2, "("):
+                start = i - 1 if f.is_ident(i - 1, "async") else i
+                self._record_function(f, tokens[i + 1].value, start, i)
+            elif value == "export" and token.kind == "ident":
+                self._scan_export(f, i)
+            elif value in ["module", "exports"] and token.kind == "ident":
+                self._scan_commonjs_export(f, i)
+            elif value == "class" and f.is_ident(i + 1):
+                self._scan_class(f, i)
+            elif value == "@" and f.is_ident(i + 1, "Controller"):
+                self._scan_controller(f, i)
+            elif value == "." and i not in consumed and f.is_ident(i + 1) and f.is_punct(i + 2, "("):
+                self._scan_call(f, i, consumed)
+            elif token.kind == "ident" and f.is_punct(i + 1, "(") and not f.is_punct(i - 1, "."):
+                self._scan_call_mount(f, i)
+            i += 1
+
+    def _scan_declaration(self, f: _JSFile, i: int):
+        if f.is_punct(i + 1, "{") and i + 1 in f.partner:
+            close = f.partner[i + 1]
+            if f.is_punct(close + 1, "="):
+                required = self._require_at(f, close + 2)
+                if required:
+                    for imported, local in self._destructured_names(f, i + 1):
+                        f.imports[local] = (required[0], imported)
+            return
+        if not f.is_ident(i + 1):
+            return
+        name, j = f.tokens[i + 1].value, i + 2
+        if f.is_punct(j, ":"):
+            while j < len(f.tokens) and j < i + 40 and not f.is_punct(j, "=") and not f.is_punct(j, ";"):
+                j = f.partner.get(j, j) + 1 if f.tokens[j].value in "([{" else j + 1
+        if not f.is_punct(j, "="):
+            return
+        value_idx = j + 1
+
+        value, after = f.tok(value_idx), f.tok(value_idx + 1)
+        if value is not None and value.kind == "string" and (after is None or after.kind != "punct" or after.value in [";", ",", ")"]):
+            f.constants[name] = value.value
+            return
+        factory = self._factory(f, value_idx)
+        if factory:
+            f.routers[name] = factory
+            return
+        required = self._require_at(f, value_idx)
+        if required:
+            f.imports[name] = (required[0], required[1])
+            return
+        self._record_function(f, name, i, value_idx)
+
+    def _scan_import(self, f: _JSFile, i: int):
+        j, end = i + 1, min(len(f.tokens), i + 200)
+        while j < end and not f.is_ident(j, "from") and not (f.tok(j) and f.tokens[j].kind == "string"):
+            j += 1
+        spec_idx = j + 1 if f.is_ident(j, "from") else j
+        spec = f.tok(spec_idx)
+        if spec is None or spec.kind != "string":
+            return
+        k = i + 1
+        if f.is_ident(k, "type"):
+            k += 1
+        while k < j:
+            if f.is_ident(k) and not f.is_ident(k, "from"):
+                f.imports[f.tokens[k].value] = (spec.value, None)
+            elif f.is_punct(k, "*") and f.is_ident(k + 1, "as") and f.is_ident(k + 2):
+                f.imports[f.tokens[k + 2].value] = (spec.value, "*")
+                k += 2
+            elif f.is_punct(k, "{"):
+                for imported, local in self._destructured_names(f, k):
+                    f.imports[local] = (spec.value, imported)
+                k = f.partner.get(k, k)
+            k += 1
+
+    def _scan_export(self, f: _JSFile, i: int):
+        nxt = f.tok(i + 1)
+        if nxt is None:
+            return
+        if nxt.value == "default":
+            target = i + 2
+            if f.is_ident(target) and not f.is_ident(target, "function") and not f.is_ident(target, "async") \
+                    and not f.is_ident(target, "class") and not f.is_punct(target + 1, "=>") and not f.is_punct(target + 1, "("):
+                f.exports["default"] = f.tokens[target].value
+            else:
+                f.exports["default"] = "default"
+                self._record_function(f, "default", i, target)
+        elif nxt.value in ["const", "let", "var", "function", "class"] and f.is_ident(i + 2):
+            f.exports[f.tokens[i + 2].value] = f.tokens[i + 2].value
+        elif nxt.value == "async" and f.is_ident(i + 2, "function") and f.is_ident(i + 3):
+            f.exports[f.tokens[i + 3].value] = f.tokens[i + 3].value
+        elif f.is_punct(i + 1, "{"):
+            for local, exported in self._destructured_names(f, i + 1):
+                f.exports[exported] = local
+
+    def _scan_commonjs_export(self, f: _JSFile, i: int):
+        if f.is_punct(i - 1, "."):
+            return
+        j = i
+        if f.is_ident(j, "module") and f.is_punct(j + 1, ".") and f.is_ident(j + 2, "exports"):
+            j += 2
+        elif not f.is_ident(j, "exports"):
+            return
+        if f.is_punct(j + 1, "=") and not f.is_punct(j + 2, "="):
+            value = j + 2
+            if f.is_punct(value, "{") and value in f.partner:
+                close = f.partner[value]
+                k = value + 1
+                while k < close:
+                    if f.is_ident(k) and (f.is_punct(k + 1, ",") or k + 1 == close):
+                        f.exports[f.tokens[k].value] = f.tokens[k].value
+                    elif f.is_ident(k) and f.is_punct(k + 1, ":"):
+                        key = f.tokens[k].value
+                        if f.is_ident(k + 2) and (f.is_punct(k + 3, ",") or k + 3 == close):
+                            f.exports[key] = f.tokens[k + 2].value
+                        else:
+                            f.exports[key] = key
+                            self._record_function(f, key, k, k + 2)
+                    elif f.is_ident(k) and f.is_punct(k + 1, "(") and k + 1 in f.partner and f.is_punct(f.partner[k + 1] + 1, "{"):
+                        f.exports[f.tokens[k].value] = f.tokens[k].value
+                        f.functions[f.tokens[k].value] = (k, f.partner.get(f.partner[k + 1] + 1, k))
+                    if f.tokens[k].kind == "punct" and f.tokens[k].value in "([{" and k in f.partner:
+                        k = f.partner[k]
+                    k += 1
+            elif f.is_ident(value) and not f.is_punct(value + 1, "=>") and not f.is_punct(value + 1, "(") \
+                    and not f.is_ident(value, "function") and not f.is_ident(value, "async"):
+                f.exports["default"] = f.tokens[value].value
+            else:
+                f.exports["default"] = "default"
+                self._record_function(f, "default", i, value)
+        elif f.is_punct(j + 1, ".") and f.is_ident(j + 2) and f.is_punct(j + 3, "="):
+            name = f.tokens[j + 2].value
+            if f.is_ident(j + 4) and not f.is_punct(j + 5, "=>") and not f.is_ident(j + 4, "function") and not f.is_ident(j + 4, "async"):
+                f.exports[name] = f.tokens[j + 4].value
+            else:
+                f.exports[name] = name
+                self._record_function(f, name, i, j + 4)
+
+    def _class_methods(self, f: _JSFile, open_idx: int):
+        """Yields (name, decorator start, name token, body '{' token) of the methods in a class body."""
+        close = f.partner.get(open_idx, open_idx)
+        i = open_idx + 1
+        decorator_start = None
+        while i < close:
+            if f.is_punct(i, "@") and f.is_ident(i + 1):
+                decorator_start = i if decorator_start is None else decorator_start
+                _, j = self._chain(f, i + 1)
+                i = f.partner[j] + 1 if f.is_punct(j, "(") and j in f.partner else j
+                continue
+            if f.is_ident(i) and f.tokens[i].value in ["public", "private", "protected", "static", "async", "readonly", "get", "set"] and f.is_ident(i + 1):
+                i += 1
+                continue
+            if f.is_ident(i) and f.is_punct(i + 1, "(") and i + 1 in f.partner:
+                j = f.partner[i + 1] + 1
+                if f.is_punct(j, ":"):
+                    while j < close and not f.is_punct(j, "{") and not f.is_punct(j, ";"):
+                        j = f.partner.get(j, j) + 1 if f.tokens[j].value in "([<" and j in f.partner else j + 1
+                if f.is_punct(j, "{") and j in f.partner:
+                    yield f.tokens[i].value, decorator_start if decorator_start is not None else i, i, j
+                    decorator_start = None
+                    i = f.partner[j] + 1
+                    continue
+            if f.tokens[i].kind == "punct" and f.tokens[i].value in "([{" and i in f.partner:
+                i = f.partner[i]
+            decorator_start = None
+            i += 1
+
+    def _scan_class(self, f: _JSFile, i: int):
+        name = f.tokens[i + 1].value
+        j = i + 2
+        while j < len(f.tokens) and not f.is_punct(j, "{"):
+            j += 1
+        if j not in f.partner:
+            return
+        for method, start, _, body in self._class_methods(f, j):
+            f.functions[f"{name}.{method}"] = (start, f.partner[body])
+
+    def _decorator_string(self, f: _JSFile, open_idx: int) -> Optional[str]:
+        args = self._args(f, open_idx)
+        if not args:
+            return ""
+        if f.is_punct(args[0][0], "{"):
+            return self._object_string(f, args[0][0], "path")
+        return self._string_at(f, *args[0])
+
+    def _scan_controller(self, f: _JSFile, i: int):
+        prefix = self._decorator_string(f, i + 2) if f.is_punct(i + 2, "(") else ""
+        j = i + 1
+        while j < len(f.tokens) and not f.is_ident(j, "class"):
+            j += 1
+        k = j
+        while k < len(f.tokens) and not f.is_punct(k, "{"):
+            k += 1
+        if k not in f.partner:
+            return
+        header = f.source[f.tokens[i].start:f.tokens[k].end]
+        for method, start, name_idx, body in self._class_methods(f, k):
+            decorators = []
+            d = start
+            while d < name_idx:
+                if f.is_punct(d, "@") and f.is_ident(d + 1):
+                    decorators.append(d)
+                d += 1
+            http_codes = [
+                f.tokens[d + 3].value for d in decorators
+                if f.tokens[d + 1].value == "HttpCode" and f.tok(d + 3) and f.tokens[d + 3].kind == "num"
+            ]
+            for d in decorators:
+                verb = f.tokens[d + 1].value
+                if verb not in NEST_METHODS or not f.is_punct(d + 2, "("):
+                    continue
+                sub_path = self._decorator_string(f, d + 2)
+                path = None if prefix is None or sub_path is None else join_route_paths(prefix, sub_path)
+                f.routes.append({
+                    "receiver": None,
+                    "method": NEST_METHODS[verb],
+                    "path": path,
+                    "nest": True,
+                    "handler": method,
+                    "start": start,
+                    "end": f.partner[body],
+                    "header": header,
+                    "handler_refs": [],
+                    "scan_range": (start, f.partner[body]),
+                    "param_range": (name_idx + 1, f.partner[name_idx + 1]),
+                    "status_codes": http_codes
+                })
+
+    def _route_entry(self, f: _JSFile, receiver: Optional[str], method: str, path_range, handler_args, start, end) -> Dict:
+        path = self._string_at(f, *path_range) if path_range else None
+        handler, refs = None, []
+        for arg_start, arg_end in handler_args:
+            if f.is_punct(arg_start, "{") and f.partner.get(arg_start) == arg_end:
+                continue
+            names, after = self._chain(f, arg_start)
+            if names and names[-1] in ["bind", "call"] and f.is_punct(after, "(") and f.partner.get(after) == arg_end:
+                after = arg_end + 1
+            if names and after > arg_end:
+                names = [n for n in names if n not in ["bind", "call"]]
+                refs = [names]
+                handler = ".".join(names)
+            elif self._function_extent(f, arg_start) is not None:
+                refs = []
+                handler = None
+        return {
+            "receiver": receiver,
+            "method": method.upper(),
+            "path": path,
+            "nest": False,
+            "handler": handler,
+            "start": start,
+            "end": end,
+            "handler_refs": refs,
+            "scan_range": (start, end),
+            "status_codes": []
+        }
+
+    def _is_router_receiver(self, f: _JSFile, name: str) -> bool:
+        return name in f.routers or (name in ROUTER_NAMES and name not in CLIENT_NAMES and name not in f.imports)
+
+    def _scan_call(self, f: _JSFile, dot: int, consumed: set):
+        name = f.tokens[dot + 1].value
+        open_idx = dot + 2
+        close = f.partner.get(open_idx)
+        if close is None or not f.is_ident(dot - 1):
+            if name == "setGlobalPrefix" and close is not None:
+                args = self._args(f, open_idx)
+                f.global_prefix = self._string_at(f, *args[0]) if args else f.global_prefix
+            return
+        receiver = f.tokens[dot - 1].value
+        start = self._chain_start(f, dot - 1)
+        args = self._args(f, open_idx)
+
+        if name == "setGlobalPrefix":
+            f.global_prefix = self._string_at(f, *args[0]) if args else None
+            return
+        if not self._is_router_receiver(f, receiver):
+            return
+
+        if name in HTTP_METHODS:
+            if not args:
+                return
+            first = f.tokens[args[0][0]]
+            if first.kind in ["string", "template"] or (first.kind == "ident" and first.value in f.constants):
+                f.routes.append(self._route_entry(f, receiver, name, args[0], args[1:], start, close))
+            return
+
+        if name == "route" and args:
+            if f.is_punct(args[0][0], "{"):
+                obj = args[0][0]
+                method = self._object_string(f, obj, "method")
+                path = self._object_string(f, obj, "url") or self._object_string(f, obj, "path")
+                f.routes.append({
+                    "receiver": receiver, "method": (method or "GET").upper(), "path": path if method else None,
+                    "nest": False, "handler": None, "start": start, "end": close, "handler_refs": [],
+                    "scan_range": (start, close), "status_codes": []
+                })
+                return
+            # router.route('/path').get(h).post(h): one statement, one route per chained method.
+            chained, k = [], close + 1
+            while f.is_punct(k, ".") and f.is_ident(k + 1) and f.tokens[k + 1].value in HTTP_METHODS and f.is_punct(k + 2, "("):
+                consumed.add(k)
+                chained.append((f.tokens[k + 1].value, k + 2))
+                k = f.partner.get(k + 2, k + 2) + 1
+            end = k - 1
+            for method, method_open in chained:
+                entry = self._route_entry(f, receiver, method, args[0], self._args(f, method_open), start, end)
+                entry["scan_range"] = (method_open, f.partner.get(method_open, end))
+                f.routes.append(entry)
+            return
+
+        if name in ["use", "register"]:
+            prefix, children = "", []
+            for arg_start, arg_end in args:
+                token = f.tokens[arg_start]
+                is_path = token.kind in ["string", "template"] or (token.kind == "ident" and token.value in f.constants)
+                if is_path and name == "use" and not children:
+                    prefix = self._string_at(f, arg_start, arg_end)
+                elif f.is_punct(arg_start, "{") and name == "register":
+                    prefix = self._object_string(f, arg_start, "prefix") or ""
+                elif f.is_punct(arg_start, "[") and name == "use" and not children:
+                    prefix = None
+                else:
+                    children.append((arg_start, arg_end))
+            if children:
+                f.mounts.append({"parent": receiver, "prefix": prefix, "children": children, "start": start, "end": close})
+
+    def _scan_call_mount(self, f: _JSFile, i: int):
+        """`routes(app)` / `require('./routes')(app)`: the callee's parameter routers are mounted on `app`."""
+        close = f.partner.get(i + 1)
+        if close is None:
+            return
+        callee = (i, i)
+        if f.is_ident(i, "require"):
+            if not f.is_punct(close + 1, "("):
+                return
+            callee = (i, close)
+            close = f.partner.get(close + 1)
+            open_idx = callee[1] + 1
+        else:
+            if f.tokens[i].value not in f.imports:
+                return
+            open_idx = i + 1
+        if close is None:
+            return
+        args = self._args(f, open_idx)
+        if args and f.is_ident(args[0][0]) and args[0][0] == args[0][1] and self._is_router_receiver(f, f.tokens[args[0][0]].value):
+            f.mounts.append({
+                "parent": f.tokens[args[0][0]].value, "prefix": "", "children": [callee],
+                "start": i, "end": close, "call": True
+            })
+
+    # ---------- cross-file resolution ----------
+
+    def _resolve_spec(self, f: _JSFile, spec: str) -> Optional[_JSFile]:
+        if not spec.startswith("."):
+            return None
+        base = posixpath.normpath(posixpath.join(posixpath.dirname(self._key(f.file_name)), spec))
+        candidates = [base + ext for ext in MODULE_EXTENSIONS]
+        if base.endswith(".js"):
+            candidates += [base[:-3] + ".ts", base[:-3] + ".tsx"]
+        return next((self.files[c] for c in candidates if c in self.files), None)
+
+    def _exported_router(self, f: _JSFile, member: Optional[str], depth: int = 0) -> Optional[Tuple[str, str]]:
+        if depth > 8:
+            return None
+        local = f.exports.get(member or "default", member)
+        if local in f.routers:
+            return self._key(f.file_name), local
+        if local in f.imports:
+            spec, imported = f.imports[local]
+            target = self._resolve_spec(f, spec)
+            if target is not None and target is not f:
+                return self._exported_router(target, imported, depth + 1)
+        if any(route["receiver"] not in f.routers for route in f.routes if not route["nest"]) or \
+                any(mount["parent"] not in f.routers for mount in f.mounts):
+            return self._key(f.file_name), PARAM_ROUTER
+        return None
+
+    def _resolve_router_ref(self, f: _JSFile, start: int, end: int) -> Optional[Tuple[str, str]]:
+        required = self._require_at(f, start)
+        if required and required[2] == end:
+            target = self._resolve_spec(f, required[0])
+            return self._exported_router(target, required[1]) if target else None
+
+        names, after = self._chain(f, start)
+        if not names:
+            return None
+        # Koa: router.routes() / router.allowedMethods()
+        if after <= end and f.is_punct(after, "(") and names[-1] in ["routes", "middleware"]:
+            names = names[:-1]
+            after = f.partner.get(after, end) + 1
+        if after <= end or not names:
+            return None
+
+        head = names[0]
+        if len(names) == 1 and head in f.routers:
+            return self._key(f.file_name), head
+        if head in f.imports:
+            spec, imported = f.imports[head]
+            target = self._resolve_spec(f, spec)
+            if target is None:
+                return None
+            member = names[1] if len(names) > 1 and imported in [None, "*"] else imported
+            if imported is None and len(names) == 1:
+                member = None
+            return self._exported_router(target, None if member == "*" else member)
+        return None
+
+    def _is_local_ref(self, f: _JSFile, start: int) -> bool:
+        required = self._require_at(f, start)
+        if required:
+            return required[0].startswith(".")
+        head = f.tokens[start].value if f.is_ident(start) else None
+        return head in f.routers or (head in f.imports and f.imports[head][0].startswith("."))
+
+    def _parent_router(self, f: _JSFile, name: str) -> Tuple[str, str]:
+        return (self._key(f.file_name), name if name in f.routers else PARAM_ROUTER)
+
+    def _mount_graph(self) -> Dict[Tuple[str, str], List[Tuple[Tuple[str, str], Optional[str]]]]:
+        incoming: Dict[Tuple[str, str], List[Tuple[Tuple[str, str], Optional[str]]]] = {}
+        for f in self.files.values():
+            for mount in f.mounts:
+                parent = self._parent_router(f, mount["parent"])
+                mount["resolved"] = True
+                for child_start, child_end in mount["children"]:
+                    child = self._resolve_router_ref(f, child_start, child_end)
+                    if child is not None:
+                        incoming.setdefault(child, []).append((parent, mount["prefix"]))
+                    elif self._is_local_ref(f, child_start):
+                        # A local router or module we could not follow; plain middleware is ignored.
+                        mount["resolved"] = False
+        return incoming
+
+    def _mounts(self, router: Tuple[str, str], stack: frozenset) -> List[Optional[str]]:
+        edges = self._incoming.get(router)
+        if not edges:
+            f = self.files.get(router[0])
+            info = f.routers.get(router[1]) if f else None
+            return [""] if info and info["kind"] == "app" else [None]
+        mounts = []
+        for parent, prefix in edges:
+            if parent in stack:
+                continue
+            for mount in self._mounts(parent, stack | {router}):
+                mounts.append(None if mount is None or prefix is None else join_route_paths(mount, prefix))
+        return list(dict.fromkeys(mounts)) or [None]
+
+    def _resolve_function(self, f: _JSFile, names: List[str], depth: int = 0) -> Optional[Tuple[_JSFile, Tuple[int, int]]]:
+        if depth > 8 or not names:
+            return None
+        head = names[0]
+        if len(names) == 1 and head in f.functions:
+            return f, f.functions[head]
+        if len(names) == 2:
+            for key, extent in f.functions.items():
+                if key.endswith("." + names[1]) and (key.split(".")[0] == head or head not in f.imports):
+                    return f, extent
+        if head in f.imports:
+            spec, imported = f.imports[head]
+            target = self._resolve_spec(f, spec)
+            if target is None or target is f:
+                return None
+            if imported in [None, "*"]:
+                member = names[1] if len(names) > 1 else target.exports.get("default", "default")
+                local = target.exports.get(member, member)
+                return self._resolve_function(target, [local] + names[2:], depth + 1) or \
+                    self._resolve_function(target, ["*", member], depth + 1)
+            local = target.exports.get(imported, imported)
+            return self._resolve_function(target, [local] + names[1:], depth + 1)
+        return None
+
+    # ---------- outputs ----------
+
+    def _route_router(self, f: _JSFile, route: Dict) -> Tuple[str, str]:
+        return self._parent_router(f, route["receiver"])
+
+    def _route_mounts(self, f: _JSFile, route: Dict) -> List[Optional[str]]:
+        if route["nest"]:
+            return [self.global_prefix or ""]
+        return self._mounts(self._route_router(f, route), frozenset())
+
+    def _handlers(self, f: _JSFile, route: Dict) -> List[Tuple[_JSFile, Tuple[int, int]]]:
+        handlers = []
+        for ref in route["handler_refs"]:
+            resolved = self._resolve_function(f, ref)
+            if resolved and not (resolved[0] is f and route["start"] <= resolved[1][0] <= route["end"]):
+                handlers.append(resolved)
+        return handlers
+
+    def _route_code(self, f: _JSFile, route: Dict, mounts: List[Optional[str]]) -> str:
+        parts = []
+        known = [mount for mount in mounts if mount]
+        if known:
+            parts.append(f"// Mounted at: {', '.join(known)}")
+        if route.get("header"):
+            parts.append(route["header"])
+            parts.append(f.text(route["start"], route["end"]))
+            parts.append("}")
+        else:
+            parts.append(f.text(route["start"], route["end"]))
+        for handler_file, (start, end) in self._handlers(f, route):
+            parts.append(f"\n// Handler from {handler_file.file_name}\n{handler_file.text(start, end)}")
+        return "\n".join(parts)
+
+    def chunks_for(self, file_name: str) -> List[Dict]:
+        """One chunk per route statement: its own extent plus the extents of handlers it references."""
+        f = self.files.get(self._key(file_name))
+        if f is None:
+            return []
+        chunks, seen = [], set()
+        for route in f.routes:
+            key = (route["start"], route["end"])
+            if key in seen:
+                continue
+            seen.add(key)
+            mounts = self._route_mounts(f, route)
+            chunks.append({
+                "file_name": f.file_name,
+                "function_name": route["handler"] or f"{route['method']} {route['path'] or ''}".strip(),
+                "code": self._route_code(f, route, mounts),
+                "start_line": f.line_of(f.tokens[route["start"]].start),
+                "end_line": f.line_of(f.tokens[route["end"]].end),
+                "language": f.language
+            })
+        return chunks
+
+    def _params(self, f: _JSFile, route: Dict, path: str) -> List[Dict]:
+        params: Dict[Tuple[str, str], Dict] = {}
+        for name in re.findall(r":(\w+)", path):
+            params[("path", name)] = {"name": name, "in": "path", "required": True, "type": "string"}
+
+        if route["nest"]:
+            i, end = route["param_range"]
+            while i < end:
+                if f.is_punct(i, "@") and f.is_ident(i + 1) and f.tokens[i + 1].value in NEST_PARAMS and f.is_punct(i + 2, "("):
+                    location = NEST_PARAMS[f.tokens[i + 1].value]
+                    args = self._args(f, i + 2)
+                    close = f.partner.get(i + 2, i + 2)
+                    name = self._string_at(f, *args[0]) if args else None
+                    type_name = f.tokens[close + 3].value if f.is_punct(close + 2, ":") and f.is_ident(close + 3) else "string"
+                    if name is None and f.is_ident(close + 1):
+                        name = f.tokens[close + 1].value
+                    if name:
+                        params[(location, name)] = {
+                            "name": name, "in": location, "required": location in ["path", "body"],
+                            "type": {"number": "number", "boolean": "boolean", "string": "string"}.get(type_name, type_name)
+                        }
+                    i = close
+                i += 1
+            return list(params.values())
+
+        ranges = [(f, *route["scan_range"])] + [(hf, s, e) for hf, (s, e) in self._handlers(f, route)]
+        for source_file, start, end in ranges:
+            tokens = source_file.tokens
+            for i in range(start, end + 1):
+                token = tokens[i]
+                if token.kind != "ident" or token.value not in REQUEST_SOURCES or not source_file.is_punct(i - 1, "."):
+                    continue
+                if not source_file.is_ident(i - 2) or tokens[i - 2].value not in REQUEST_OBJECTS:
+                    continue
+                location = REQUEST_SOURCES[token.value]
+                if source_file.is_punct(i + 1, ".") and source_file.is_ident(i + 2):
+                    names = [tokens[i + 2].value]
+                elif source_file.is_punct(i - 3, "=") and source_file.is_punct(i - 4, "}") and (i - 4) in source_file.partner:
+                    names = [imported for imported, _ in self._destructured_names(source_file, source_file.partner[i - 4])]
+                else:
+                    names = []
+                for name in names:
+                    if location == "header":
+                        continue
+                    params.setdefault((location, name), {
+                        "name": name, "in": location, "required": location != "query", "type": "string"
+                    })
+        return list(params.values())
+
+    def _responses(self, f: _JSFile, route: Dict) -> Dict:
+        codes = list(route["status_codes"])
+        ranges = [(f, *route["scan_range"])] + [(hf, s, e) for hf, (s, e) in self._handlers(f, route)]
+        for source_file, start, end in ranges:
+            for i in range(start, end + 1):
+                token = source_file.tokens[i]
+                if token.kind == "ident" and token.value in ["status", "sendStatus", "code"] and source_file.is_punct(i - 1, ".") \
+                        and source_file.is_punct(i + 1, "(") and source_file.tok(i + 2) and source_file.tokens[i + 2].kind == "num":
+                    codes.append(source_file.tokens[i + 2].value)
+        if not any(code.startswith("2") for code in codes):
+            codes.insert(0, "201" if route["nest"] and route["method"] == "POST" else "200")
+        return {
+            code: {"description": "", "content_type": "application/json", "response": {}}
+            for code in dict.fromkeys(codes)
+        }
+
+    def _route_resolved(self, f: _JSFile, route: Dict) -> bool:
+        return route["path"] is not None and None not in self._route_mounts(f, route)
+
+    def extract(self) -> Tuple[List[Dict], List[str], List[str]]:
+        """
+        Returns (endpoints, chunk code per endpoint, files fully covered). A file is
+        covered when it registers or mounts routes and all of them were resolved.
+        """
+        endpoints, sources, covered = [], [], []
+        for f in self.files.values():
+            complete = all(mount.get("resolved") for mount in f.mounts)
+            for route in f.routes:
+                if not self._route_resolved(f, route):
+                    complete = False
+                    continue
+                mounts = self._route_mounts(f, route)
+                code = self._route_code(f, route, mounts)
+                handler = (route["handler"] or "").split(".")[-1]
+                for mount in mounts:
+                    path = join_route_paths(mount, route["path"])
+                    summary = re.sub(r"(?<!^)(?=[A-Z])", " ", handler).replace("_", " ").strip().capitalize() \
+                        if handler else f"{route['method']} {path}"
+                    endpoints.append({
+                        "path": path,
+                        "method": route["method"],
+                        "handler": handler or None,
+                        "file": f.file_name,
+                        "params": self._params(f, route, path),
+                        "summary": summary,
+                        "operation": infer_operation(route["method"], handler, path),
+                        "responses": self._responses(f, route)
+                    })
+                    sources.append(code)
+            if complete and (f.routes or f.mounts):
+                covered.append(f.file_name)
+        return endpoints, sources, covered
+
+
+def extract_js_endpoints(files: List[Dict], repo_path: str) -> Tuple[List[Dict], List[str], List[str]]:
+    """Static JS/TS extraction over loaded backend files. See `JSRouteIndex.extract`."""
+    return JSRouteIndex(files, repo_path).extract()
@@ -0,0 +1,412 @@
+import os
+import time
+import uuid
+import shutil
+import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+from git import Repo
+from git.exc import GitCommandError, InvalidGitRepositoryError, NoSuchPathError
+from dotenv import load_dotenv
+from configs.logger import get_custom_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+load_dotenv()
+
+logger = get_custom_logger(__name__)
+
+REPO_CACHE_DIR = os.getenv("REPO_CACHE_DIR", os.path.join(tempfile.gettempdir(), "apidocs_repo_cache"))
+REPO_CACHE_MAX_BYTES = int(os.getenv("REPO_CACHE_MAX_BYTES", 5 * 1024 * 1024 * 1024))
+REPO_CACHE_MAX_REPOS = int(os.getenv("REPO_CACHE_MAX_REPOS", 50))
+REPO_CACHE_WORKTREE_TTL = int(os.getenv("REPO_CACHE_WORKTREE_TTL", 6 * 60 * 60))
+REPO_CACHE_BLOBLESS = os.getenv("REPO_CACHE_BLOBLESS", "true").lower() == "true"
+
+LAST_USED_MARKER = "apidocs-last-used"
+SIZE_MARKER = "apidocs-size"
+
+_locks: Dict[str, threading.RLock] = {}
+_locks_guard = threading.Lock()
+_lock_depth: Dict[str, int] = {}
+# Open lease files of the worktrees this process holds, by worktree name.
+_leases: Dict[str, object] = {}
+_leases_guard = threading.Lock()
+
+
+def _mirrors_dir() -> str:
+    return os.path.join(REPO_CACHE_DIR, "mirrors")
+
+
+def _worktrees_dir() -> str:
+    return os.path.join(REPO_CACHE_DIR, "worktrees")
+
+
+def _locks_dir() -> str:
+    return os.path.join(REPO_CACHE_DIR, "locks")
+
+
+def _lease_path(worktree_name: str) -> str:
+    return os.path.join(REPO_CACHE_DIR, "leases", f"{worktree_name}.lease")
+
+
+def repo_cache_key(repo_url: str) -> str:
+    """Stable cache key for a repository URL (trailing slashes and `.git` are ignored)."""
+    normalized = repo_url.strip().rstrip("/")
+    if normalized.endswith(".git"):
+        normalized = normalized[:-4]
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:20]
+
+
+def _mirror_path(key: str) -> str:
+    return os.path.join(_mirrors_dir(), f"{key}.git")
+
+
+@contextmanager
+def _repo_lock(key: str):
+    """
+    Serializes work on one mirror: a re-entrant lock for threads of this process
+    plus an flock on a lock file for other worker processes. The flock is only
+    taken by the outermost acquisition since it does not nest across descriptors.
+    """
+    with _locks_guard:
+        thread_lock = _locks.setdefault(key, threading.RLock())
+
+    with thread_lock:
+        if fcntl is None or _lock_depth.get(key, 0) > 0:
+            _lock_depth[key] = _lock_depth.get(key, 0) + 1
+            try:
+                yield
+            finally:
+                _lock_depth[key] -= 1
+            return
+
+        os.makedirs(_locks_dir(), exist_ok=True)
+        with open(os.path.join(_locks_dir(), f"{key}.lock"), "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            _lock_depth[key] = 1
+            try:
+                yield
+            finally:
+                _lock_depth[key] = 0
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _touch(mirror_path: str):
+    with open(os.path.join(mirror_path, LAST_USED_MARKER), "w") as f:
+        f.write(str(time.time()))
+
+
+def _last_used(mirror_path: str) -> float:
+    marker = os.path.join(mirror_path, LAST_USED_MARKER)
+    try:
+        return os.path.getmtime(marker)
+    except OSError:
+        return 0.0
+
+
+def _recorded_size(mirror_path: str) -> Optional[int]:
+    try:
+        with open(os.path.join(mirror_path, SIZE_MARKER)) as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def _record_size(mirror_path: str) -> int:
+    """Measures a mirror and stores its size in its marker. Returns how much it grew."""
+    previous = _recorded_size(mirror_path) or 0
+    size = _mirror_size(mirror_path)
+    with open(os.path.join(mirror_path, SIZE_MARKER), "w") as f:
+        f.write(str(size))
+    return size - previous
+
+
+def _mirror_size(mirror_path: str) -> int:
+    # The worktree admin entries are created per checkout and do not count as growth.
+    return _dir_size(mirror_path, skip_top=("worktrees",))
+
+
+def _dir_size(path: str, skip_top: tuple = ()) -> int:
+    total = 0
+    for root, dirs, files in os.walk(path):
+        if root == path:
+            dirs[:] = [d for d in dirs if d not in skip_top]
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _open_mirror(mirror_path: str) -> Optional[Repo]:
+    try:
+        return Repo(mirror_path)
+    except (InvalidGitRepositoryError, NoSuchPathError):
+        return None
+
+
+def _ensure_mirror(repo_url: str) -> Tuple[str, int]:
+    """`ensure_mirror`, also returning how many bytes the mirror grew by."""
+    key = repo_cache_key(repo_url)
+    mirror_path = _mirror_path(key)
+
+    with _repo_lock(key):
+        repo = _open_mirror(mirror_path) if os.path.isdir(mirror_path) else None
+
+        if repo is not None:
+            logger.info(f"Fetching updates into cached mirror {mirror_path}")
+            repo.git.fetch("--prune", "origin")
+        else:
+            if os.path.exists(mirror_path):
+                logger.warning(f"Discarding unreadable mirror at {mirror_path}")
+                shutil.rmtree(mirror_path, ignore_errors=True)
+            os.makedirs(_mirrors_dir(), exist_ok=True)
+            logger.info(f"Creating mirror of {repo_url} at {mirror_path}")
+            clone_kwargs = {"filter": "blob:none"} if REPO_CACHE_BLOBLESS else {}
+            try:
+                Repo.clone_from(repo_url, mirror_path, mirror=True, **clone_kwargs)
+            except Exception:
+                shutil.rmtree(mirror_path, ignore_errors=True)
+                raise
+
+        _touch(mirror_path)
+        growth = _record_size(mirror_path)
+
+    return mirror_path, growth
+
+
+def ensure_mirror(repo_url: str) -> str:
+    """
+    Returns the path of an up-to-date bare mirror of `repo_url`.
+    The first call clones with `--mirror` (blob-filtered unless REPO_CACHE_BLOBLESS
+    is off, so blobs are only fetched when a worktree checks them out); later calls
+    only `git fetch --prune`. The mirror's size is recorded after either.
+    """
+    return _ensure_mirror(repo_url)[0]
+
+
+def resolve_commit(repo: Repo, branch: Optional[str] = None) -> str:
+    """Resolves a branch, tag or commit SHA (or HEAD when omitted) to a full commit SHA."""
+    ref = branch or "HEAD"
+    try:
+        return repo.git.rev_parse("--verify", f"{ref}^{{commit}}")
+    except GitCommandError:
+        raise ValueError(f"Branch or commit '{ref}' not found in repository.")
+
+
+def _checkout_paths(mirror: Repo, worktree_path: str, commit_sha: str, path_filter: Callable[[str], bool]) -> int:
+    """
+    Checks out only the files of `commit_sha` accepted by `path_filter`.
+    `git sparse-checkout` is avoided here because it switches the shared bare mirror
+    to per-worktree config, which git then no longer recognizes as a repository.
+    """
+    tree_paths = mirror.git.ls_tree("-r", "-z", "--name-only", commit_sha).split("\0")
+    selected = [path for path in tree_paths if path and path_filter(path)]
+    if not selected:
+        return 0
+
+    pathspec_file = os.path.join(_worktrees_dir(), f"{os.path.basename(worktree_path)}.pathspec")
+    with open(pathspec_file, "w", encoding="utf-8") as f:
+        f.write("\0".join(selected))
+    try:
+        Repo(worktree_path).git.checkout(
+            commit_sha,
+            f"--pathspec-from-file={pathspec_file}",
+            "--pathspec-file-nul",
+            env={"GIT_LITERAL_PATHSPECS": "1"}
+        )
+    finally:
+        os.remove(pathspec_file)
+    return len(selected)
+
+
+def _take_lease(worktree_name: str):
+    """
+    Creates and locks the lease file of a worktree. The lock is held until
+    `release_worktree`, and the OS drops it when this process dies, which is how
+    worktrees of crashed runs are told apart from ones still in use.
+    """
+    path = _lease_path(worktree_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    lease = open(path, "w")
+    if fcntl is not None:
+        fcntl.flock(lease.fileno(), fcntl.LOCK_EX)
+    lease.write(str(os.getpid()))
+    lease.flush()
+    with _leases_guard:
+        _leases[worktree_name] = lease
+
+
+def _drop_lease(worktree_name: str):
+    with _leases_guard:
+        lease = _leases.pop(worktree_name, None)
+    try:
+        os.remove(_lease_path(worktree_name))
+    except OSError:
+        pass
+    if lease is not None:
+        lease.close()
+
+
+def _lease_abandoned(worktree_name: str) -> bool:
+    """True if no live process holds the worktree's lease (or it never got one)."""
+    with _leases_guard:
+        if worktree_name in _leases:
+            return False
+    path = _lease_path(worktree_name)
+    if not os.path.exists(path):
+        return True
+    if fcntl is None:
+        # No cross-process locks: fall back to the age of the lease.
+        return os.path.getmtime(path) < time.time() - REPO_CACHE_WORKTREE_TTL
+    with open(path, "a") as lease:
+        try:
+            fcntl.flock(lease.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        fcntl.flock(lease.fileno(), fcntl.LOCK_UN)
+    return True
+
+
+def checkout_worktree(repo_url: str, branch: Optional[str] = None, path_filter: Optional[Callable[[str], bool]] = None) -> str:
+    """
+    Fetches the cached mirror of `repo_url` and checks out `branch` (branch name,
+    tag or commit SHA) into a fresh detached worktree. Release it with `release_worktree`.
+    With `path_filter`, only repo-relative paths it accepts are checked out.
+    The cache is only checked for eviction when the mirror grew.
+    """
+    key = repo_cache_key(repo_url)
+
+    with _repo_lock(key):
+        mirror_path, growth = _ensure_mirror(repo_url)
+        repo = Repo(mirror_path)
+        commit_sha = resolve_commit(repo, branch)
+
+        os.makedirs(_worktrees_dir(), exist_ok=True)
+        worktree_name = f"{key}-{uuid.uuid4().hex[:12]}"
+        worktree_path = os.path.join(_worktrees_dir(), worktree_name)
+        # Leased before the worktree exists, so it never looks abandoned.
+        _take_lease(worktree_name)
+        try:
+            if path_filter:
+                repo.git.worktree("add", "--no-checkout", "--detach", worktree_path, commit_sha)
+                _checkout_paths(repo, worktree_path, commit_sha, path_filter)
+            else:
+                repo.git.worktree("add", "--detach", worktree_path, commit_sha)
+        except Exception:
+            _drop_lease(worktree_name)
+            raise
+        if REPO_CACHE_BLOBLESS:
+            # A blob-filtered mirror fetches the blobs it checks out.
+            growth += _record_size(mirror_path)
+        logger.info(f"Checked out {branch or 'HEAD'} ({commit_sha[:10]}) to worktree {worktree_path}")
+
+    if growth > 0:
+        evict_cache()
+    return worktree_path
+
+
+def is_cached_worktree(path: str) -> bool:
+    """True if `path` is a worktree handed out by `checkout_worktree`."""
+    worktrees_dir = os.path.abspath(_worktrees_dir())
+    return os.path.abspath(path).startswith(worktrees_dir + os.sep)
+
+
+def release_worktree(path: str):
+    """Removes a worktree created by `checkout_worktree`; the mirror itself stays cached."""
+    worktree_name = os.path.basename(os.path.normpath(path))
+    key = worktree_name.rsplit("-", 1)[0]
+    mirror_path = _mirror_path(key)
+
+    with _repo_lock(key):
+        repo = _open_mirror(mirror_path) if os.path.isdir(mirror_path) else None
+        if repo is not None:
+            try:
+                repo.git.worktree("remove", "--force", path)
+            except GitCommandError as e:
+                logger.warning(f"git worktree remove failed for {path}: {e}")
+        shutil.rmtree(path, ignore_errors=True)
+        if repo is not None:
+            repo.git.worktree("prune")
+        _drop_lease(worktree_name)
+
+    logger.info(f"Released worktree {path}")
+
+
+def _has_live_worktrees(mirror_path: str) -> bool:
+    """Mirrors with registered worktrees are in use (by this or another process)."""
+    repo = _open_mirror(mirror_path)
+    if repo is None:
+        return False
+    repo.git.worktree("prune")
+    admin_dir = os.path.join(mirror_path, "worktrees")
+    return os.path.isdir(admin_dir) and bool(os.listdir(admin_dir))
+
+
+def _remove_stale_worktrees():
+    """
+    Deletes worktrees left behind by crashed runs so their mirrors become evictable.
+    A worktree is abandoned when no process holds its lease, however old it is.
+    """
+    worktrees_dir = _worktrees_dir()
+    if not os.path.isdir(worktrees_dir):
+        return
+
+    for entry in os.scandir(worktrees_dir):
+        try:
+            if entry.is_dir() and _lease_abandoned(entry.name):
+                logger.info(f"Removing stale worktree {entry.path}")
+                release_worktree(entry.path)
+        except OSError as e:
+            logger.warning(f"Could not inspect worktree {entry.path}: {e}")
+
+
+def evict_cache(max_bytes: int = REPO_CACHE_MAX_BYTES, max_repos: int = REPO_CACHE_MAX_REPOS) -> List[str]:
+    """
+    Evicts least-recently-used mirrors until the cache is under both the size and
+    the repository-count limits. Mirrors with live worktrees are never evicted.
+    Sizes come from each mirror's size marker; only unmeasured mirrors are walked.
+    Returns the evicted mirror paths.
+    """
+    mirrors_dir = _mirrors_dir()
+    if not os.path.isdir(mirrors_dir):
+        return []
+
+    _remove_stale_worktrees()
+
+    mirrors = []
+    for entry in os.scandir(mirrors_dir):
+        if entry.is_dir() and entry.name.endswith(".git"):
+            size = _recorded_size(entry.path)
+            mirrors.append({
+                "key": entry.name[:-4],
+                "path": entry.path,
+                "last_used": _last_used(entry.path),
+                "size": size if size is not None else _mirror_size(entry.path),
+            })
+
+    total_bytes = sum(m["size"] for m in mirrors)
+    count = len(mirrors)
+    evicted = []
+
+    for mirror in sorted(mirrors, key=lambda m: m["last_used"]):
+        if total_bytes <= max_bytes and count <= max_repos:
+            break
+
+        with _repo_lock(mirror["key"]):
+            if _has_live_worktrees(mirror["path"]):
+                continue
+            shutil.rmtree(mirror["path"], ignore_errors=True)
+
+        logger.info(f"Evicted cached mirror {mirror['path']} ({mirror['size']} bytes)")
+        total_bytes -= mirror["size"]
+        count -= 1
+        evicted.append(mirror["path"])
+
+    return evicted
@@ -0,0 +1,98 @@
+import os
+import re
+import json
+import hashlib
+from typing import Dict, Optional
+from git.cmd import Git
+from dotenv import load_dotenv
+
+from ai.utils.persistent_cache import PersistentCache
+from ai.utils.model_router import STAGE_MODELS
+from ai.api_extractor.utils.extraction_cache import PROMPT_VERSIONS
+from ai.api_extractor.utils.repo_cache import repo_cache_key
+from ai.api_extractor.utils.static_extractor import DEFAULT_EXTRACTION_MODE
+from configs.logger import get_custom_logger
+
+load_dotenv()
+
+logger = get_custom_logger(__name__)
+
+# Bump when loading, chunking or merging changes the extracted result for the same commit.
+EXTRACTOR_VERSION = "5"
+
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+RESULT_CACHE_LRU_SIZE = int(os.getenv("RESULT_CACHE_LRU_SIZE", 100))
+
+SHA_PATTERN = re.compile(r"^[0-9a-f]{40}$")
+
+result_cache = PersistentCache("extraction_results", max_entries=RESULT_CACHE_LRU_SIZE)
+
+
+def resolve_remote_commit(repo_url: str, branch: Optional[str] = None) -> Optional[str]:
+    """
+    Resolves the commit a branch (or the default HEAD) points to with `git ls-remote`,
+    without cloning. Returns None if the ref cannot be resolved.
+    """
+    if branch and SHA_PATTERN.match(branch):
+        return branch
+
+    try:
+        output = Git().ls_remote(repo_url, branch or "HEAD")
+    except Exception as e:
+        logger.warning(f"git ls-remote failed for {repo_url}: {e}")
+        return None
+
+    refs = {}
+    for line in output.splitlines():
+        sha, _, ref = line.partition("\t")
+        refs[ref] = sha
+
+    if not branch:
+        return refs.get("HEAD")
+    for ref in [f"refs/heads/{branch}", f"refs/tags/{branch}^{{}}", f"refs/tags/{branch}"]:
+        if ref in refs:
+            return refs[ref]
+    return None
+
+
+def result_cache_key(state: Dict, commit_sha: str) -> str:
+    """Key of a whole extraction run: repository, commit and everything that shapes the output."""
+    options = {
+        "sparse_paths": sorted(state.get("sparse_paths") or []) if state.get("clone_mode") == "sparse" else None,
+        "extraction_mode": state.get("extraction_mode") or DEFAULT_EXTRACTION_MODE,
+    }
+    payload = json.dumps([
+        repo_cache_key(state["repo_url"]),
+        commit_sha,
+        EXTRACTOR_VERSION,
+        PROMPT_VERSIONS,
+        STAGE_MODELS,
+        options
+    ], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_cached_result(state: Dict, commit_sha: str) -> Optional[Dict]:
+    if not RESULT_CACHE_ENABLED:
+        return None
+    return result_cache.get(result_cache_key(state, commit_sha))
+
+
+def store_result(state: Dict, commit_sha: str, endpoints: Dict):
+    """Memoizes a fresh extraction of the commit; runs merged with a user's saved endpoints must not be stored."""
+    if not RESULT_CACHE_ENABLED or not endpoints:
+        return
+    result_cache.set(result_cache_key(state, commit_sha), {
+        "repo_url": state["repo_url"],
+        "repo_key": repo_cache_key(state["repo_url"]),
+        "commit_sha": commit_sha,
+        "endpoints": endpoints
+    })
+
+
+def invalidate_results(repo_url: str):
+    """Drops every memoized run of `repo_url`, whatever the commit or the spelling of the URL (`.git`, trailing slash)."""
+    result_cache.delete_matching("repo_key", repo_cache_key(repo_url))
+    # Entries stored before they carried a repo_key.
+    result_cache.delete_matching("repo_url", repo_url)
+    logger.info(f"Invalidated memoized extraction results for {repo_url}")
@@ -0,0 +1,37 @@
+import os
+from typing import Dict, List, Tuple
+from dotenv import load_dotenv
+
+from ai.api_extractor.utils.fastapi_ast import extract_fastapi_endpoints
+from ai.api_extractor.utils.js_routes import extract_js_endpoints
+from configs.logger import get_custom_logger
+
+load_dotenv()
+
+logger = get_custom_logger(__name__)
+
+# llm    - every API file is sent to the LLM extraction prompts.
+# hybrid - statically understood files are extracted from the Python AST or the
+#          JS/TS route scanner; the LLM only
+#          enriches their summaries, operations and response examples.
+# static - statically understood files never reach the LLM; the rest still do.
+EXTRACTION_MODES = ["llm", "hybrid", "static"]
+DEFAULT_EXTRACTION_MODE = os.getenv("EXTRACTION_MODE", "llm")
+
+
+def extract_static_endpoints(files: List[Dict], repo_path: str) -> Tuple[List[Dict], List[str], List[str]]:
+    """
+    Runs the static extractors over the loaded backend files.
+    Returns (endpoints, handler source per endpoint, repo-relative files fully covered).
+    """
+    endpoints, sources, covered_files = [], [], []
+    for name, extractor in [("FastAPI", extract_fastapi_endpoints), ("JS/TS", extract_js_endpoints)]:
+        try:
+            found, found_sources, found_files = extractor(files, repo_path)
+        except Exception as e:
+            logger.error(f"Static {name} extraction failed, falling back to the LLM: {e}")
+            continue
+        endpoints.extend(found)
+        sources.extend(found_sources)
+        covered_files.extend(found_files)
+    return endpoints, sources, covered_files
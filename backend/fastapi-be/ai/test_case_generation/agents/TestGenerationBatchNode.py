@@ -1,6 +1,5 @@
 from typing import List, Dict
-from ai.utils.parse_json_response import parse_json_response
-from ai.utils.get_llm_response import get_llm_response
+from ai.utils.get_llm_response import get_llm_json_response
 from ai.test_case_generation.graph.TestGraphState import TestGraphState
 from ai.test_case_generation.prompts.get_test_generation_prompt import get_test_generation_prompt
 from configs.logger import get_custom_logger
@@ -38,9 +37,8 @@ def TestGenerationNode(state: TestGraphState) -> TestGraphState:
 
         try:
             system_prompt = "You are an expert at generating test cases for API endpoints"
-            response = get_llm_response(prompt, system_prompt)
-            if response:
-                test_cases = parse_json_response(response)
+            test_cases = get_llm_json_response(prompt, system_prompt, stage="test_generation", expected_type=dict)
+            if test_cases:
                 logger.info(f"Generated test cases for batch {i+1} with {len(test_cases)} entries.")
                 # Assign test cases to endpoints based on ID
                 for ep in all_endpoints:
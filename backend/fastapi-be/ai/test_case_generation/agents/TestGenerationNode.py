@@ -1,30 +1,52 @@
 from typing import List, Dict
-from ai.utils.parse_json_response import parse_json_response
-from ai.utils.get_llm_response import get_llm_response
+from ai.utils.get_llm_response import get_llm_json_response, is_unusable_answer
+from ai.utils.bisecting_executor import run_bisecting
+from langchain_core.runnables import RunnableConfig
+from ai.utils.run_graph import node_events
+from jobs.task_queue import enqueue_task, wait_for_tasks, replay_task_result
 from ai.test_case_generation.graph.TestGraphState import TestGraphState
 from ai.test_case_generation.prompts.get_test_generation_prompt import get_test_generation_prompt
+from ai.test_case_generation.utils.batch_endpoints import split_by_output_budget
 from configs.logger import get_custom_logger
 import uuid
 import time
 import json
+import asyncio
 import concurrent.futures
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception
 from requests.exceptions import RequestException
 
 logger = get_custom_logger(__name__)
 
+CRUD_ORDER = ["create", "read_after_create", "update", "read_after_update", "delete", "read_after_delete", "list", "other"]
+AUTH_ORDER = ["register", "login_success", "login_failure", "list", "other"]
+
 @retry(
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=1, min=2, max=10),
-    retry=retry_if_exception_type((RequestException, ValueError)),
+    # An answer that came back unusable is split up by the bisecting executor instead of re-sent whole.
+    retry=retry_if_exception(lambda e: isinstance(e, (RequestException, ValueError)) and not is_unusable_answer(e)),
+    # The last error itself, not a RetryError, so the bisecting executor sees an UnusableLLMResponse.
+    reraise=True,
     before_sleep=lambda retry_state: logger.info(f"Retrying LLM call (attempt {retry_state.attempt_number})...")
 )
-def get_llm_response_with_retry(prompt: str, system_prompt: str) -> str:
-    """Wrapper for get_llm_response with retry logic."""
-    response = get_llm_response(prompt, system_prompt)
-    if not response:
-        raise ValueError("Empty response from LLM")
-    return response
+def get_llm_response_with_retry(prompt: str, system_prompt: str, on_item=None, bypass_cache: bool = False) -> Dict:
+    """Wrapper for get_llm_json_response with retry logic; returns the parsed test cases."""
+    return get_llm_json_response(prompt, system_prompt, stage="test_generation", expected_type=dict, bypass_cache=bypass_cache, on_item=on_item)
+
+def settle_test_cases(endpoints: List[Dict], answer: Dict, complete: bool):
+    """
+    Keeps the well-formed test cases of the endpoints an answer covers (keys are
+    endpoint IDs, optionally with a "_suffix"); the other endpoints are asked for again.
+    """
+    ids = {ep["id"] for ep in endpoints}
+    kept = {
+        _id: tc for _id, tc in (answer or {}).items()
+        if _id.split("_")[0] in ids and isinstance(tc, dict)
+        and isinstance(tc.get("success"), list) and isinstance(tc.get("failure"), list)
+    }
+    covered = {_id.split("_")[0] for _id in kept}
+    return kept, [ep for ep in endpoints if ep["id"] not in covered]
 
 def validate_test_case(case: Dict, operation: str, collection_name: str, endpoint_id: str) -> bool:
     """Validate a single test case for required fields and data consistency."""
@@ -41,7 +63,26 @@ def validate_test_case(case: Dict, operation: str, collection_name: str, endpoin
             return False
     return True
 
-def TestGenerationNode(state: TestGraphState) -> TestGraphState:
+def group_test_cases(endpoints: List[Dict]) -> List[Dict]:
+    """Groups endpoints with their test cases by collection, each in CRUD/auth order."""
+    collection_map = {}
+    for ep in endpoints:
+        collection = ep.get("collection", "Unknown")
+        collection_map.setdefault(collection, []).append(ep)
+
+    # Ensure output follows the specified order
+    grouped_output = []
+    for collection_name, collection_endpoints in collection_map.items():
+        is_auth_collection = collection_name.lower() in ["login", "register", "auth"]
+        order = AUTH_ORDER if is_auth_collection else CRUD_ORDER
+        ordered_endpoints = sorted(
+            collection_endpoints,
+            key=lambda ep: order.index(ep["test_cases"].get("operation", "other"))
+        )
+        grouped_output.append({collection_name: ordered_endpoints})
+    return grouped_output
+
+def TestGenerationNode(state: TestGraphState, config: RunnableConfig) -> TestGraphState:
     """
     Generates test cases for API endpoints from batched collections using an LLM.
     Strictly enforces CRUD/auth order and ensures logical consistency.
@@ -58,15 +99,16 @@ def TestGenerationNode(state: TestGraphState) -> TestGraphState:
     expected_ids = set()
     metrics = {"total_endpoints": 0, "total_test_cases": 0, "success_cases": 0, "failure_cases": 0}
 
-    crud_order = ["create", "read_after_create", "update", "read_after_update", "delete", "read_after_delete", "list", "other"]
-    auth_order = ["register", "login_success", "login_failure", "list", "other"]
+    emit = node_events(config)
+    collection_count = sum(len(batch) for batch in batches)
 
     def process_batch(batch: Dict, batch_idx: int) -> List[Dict]:
         batch_endpoints = []
         for collection_name, endpoints in batch.items():
             logger.info(f"Processing collection {collection_name} with {len(endpoints)} endpoints in batch {batch_idx+1}...")
+            first = len(batch_endpoints)
             is_auth_collection = collection_name.lower() in ["login", "register", "auth"]
-            order = auth_order if is_auth_collection else crud_order
+            order = AUTH_ORDER if is_auth_collection else CRUD_ORDER
 
             # Assign unique IDs and validate endpoints
             endpoint_map = {}
@@ -77,8 +119,6 @@ def TestGenerationNode(state: TestGraphState) -> TestGraphState:
                 endpoint_map[ep["id"]] = ep
                 metrics["total_endpoints"] += 1
 
-            # Generate prompt
-            prompt = get_test_generation_prompt([{collection_name: endpoints}])
             system_prompt = (
                 "You are an expert at generating test cases for API endpoints. "
                 "Generate comprehensive test cases for ALL provided endpoints, using unique endpoint IDs. "
@@ -91,11 +131,32 @@ def TestGenerationNode(state: TestGraphState) -> TestGraphState:
                 "Return test cases in JSON format with unique IDs, operation, payload, expected_response, and response_code."
             )
 
+            reported = set()
+
+            def on_test_case(item, collection_name=collection_name, reported=reported):
+                # Streamed in as soon as the model closes each endpoint's test cases. Parts
+                # asked for again after bisection can repeat an endpoint; it is only reported once.
+                _id, test_cases = item
+                if _id in reported:
+                    return
+                reported.add(_id)
+                emit({"event": "item", "stage": "test_generation", "batch_index": batch_idx, "collection": collection_name,
+                      "item_index": len(reported) - 1, "endpoint_id": _id, "test_cases": test_cases})
+
+            def request_test_cases(subset, bypass_cache, collection_name=collection_name, system_prompt=system_prompt, on_test_case=on_test_case):
+                prompt = get_test_generation_prompt([{collection_name: subset}])
+                return get_llm_response_with_retry(prompt, system_prompt, on_test_case, bypass_cache)
+
             try:
-                response = get_llm_response_with_retry(prompt, system_prompt)
-                test_cases = parse_json_response(response)
-                if not test_cases or not isinstance(test_cases, dict):
-                    logger.error(f"Invalid JSON response for collection {collection_name} in batch {batch_idx+1}: {response}")
+                # Collections whose test cases would not fit one completion are asked for in parts.
+                test_cases = {}
+                for part in split_by_output_budget(endpoints):
+                    test_cases.update(run_bisecting(
+                        f"Test cases for {collection_name} (batch {batch_idx+1})", part, request_test_cases,
+                        expected_type=dict, settle=settle_test_cases
+                    ).result)
+                if not test_cases:
+                    logger.error(f"Empty test cases for collection {collection_name} in batch {batch_idx+1}.")
                     for ep in endpoints:
                         logger.error(f"Missing test cases for endpoint ID {ep['id']} ({ep.get('operation', 'unknown')}, {ep.get('path', 'unknown')})")
                         ep["test_cases"] = {"success": [], "failure": []}
@@ -180,6 +241,11 @@ def TestGenerationNode(state: TestGraphState) -> TestGraphState:
                 for ep in endpoints:
                     ep["test_cases"] = {"success": [], "failure": []}
                     batch_endpoints.append(ep)
+            finally:
+                collection_endpoints = batch_endpoints[first:]
+                case_count = sum(len(ep["test_cases"].get("success", [])) + len(ep["test_cases"].get("failure", [])) for ep in collection_endpoints)
+                emit({"event": "collection", "stage": "test_generation", "batch_index": batch_idx, "collection": collection_name,
+                      "collection_count": collection_count, "count": case_count, "endpoints": collection_endpoints})
 
         return batch_endpoints
 
@@ -193,24 +259,37 @@ def TestGenerationNode(state: TestGraphState) -> TestGraphState:
             except Exception as e:
                 logger.error(f"Batch {batch_idx+1} failed: {e}")
 
-    # Group endpoints by collection
-    collection_map = {}
-    for ep in all_endpoints:
-        collection = ep.get("collection", "Unknown")
-        collection_map.setdefault(collection, []).append(ep)
-
-    # Ensure output follows the specified order
-    grouped_output = []
-    for collection_name, endpoints in collection_map.items():
-        is_auth_collection = collection_name.lower() in ["login", "register", "auth"]
-        order = auth_order if is_auth_collection else crud_order
-        ordered_endpoints = sorted(
-            endpoints,
-            key=lambda ep: order.index(ep["test_cases"].get("operation", "other"))
-        )
-        grouped_output.append({collection_name: ordered_endpoints})
+    grouped_output = group_test_cases(all_endpoints)
 
     metrics["execution_time"] = time.time() - start_time
     logger.info(f"Finished generating {metrics['total_test_cases']} test cases for {metrics['total_endpoints']} endpoints in {metrics['execution_time']:.2f} seconds.")
     logger.info(f"Metrics: {metrics}")
-    return {**state, "test_cases": grouped_output, "metrics": metrics}
\ No newline at end of file
+    return {**state, "test_cases": grouped_output, "metrics": metrics}
+
+async def QueuedTestGenerationNode(state: TestGraphState, config: RunnableConfig) -> TestGraphState:
+    """
+    TestGenerationNode with each batch handed to a worker as a "test_batch" task;
+    the batches' test cases are regrouped and their metrics summed here.
+    """
+    batches = state.get("batched_endpoints", [])
+    if not batches:
+        return TestGenerationNode(state, config)
+
+    start_time = time.time()
+    task_ids = [await asyncio.to_thread(enqueue_task, "test_batch", {"batched_endpoints": [batch]}) for batch in batches]
+    logger.info(f"Queued {len(task_ids)} test generation batches.")
+    results = await wait_for_tasks(task_ids, on_done=lambda task: replay_task_result(task["result"], config))
+
+    all_endpoints = []
+    metrics = {"total_endpoints": 0, "total_test_cases": 0, "success_cases": 0, "failure_cases": 0}
+    for result in results.values():
+        update = result["update"]
+        for group in update.get("test_cases", []):
+            for endpoints in group.values():
+                all_endpoints.extend(endpoints)
+        for key in metrics:
+            metrics[key] += update.get("metrics", {}).get(key, 0)
+
+    metrics["execution_time"] = time.time() - start_time
+    logger.info(f"Finished generating {metrics['total_test_cases']} test cases for {metrics['total_endpoints']} endpoints in {metrics['execution_time']:.2f} seconds.")
+    return {**state, "test_cases": group_test_cases(all_endpoints), "metrics": metrics}
@@ -1,15 +1,16 @@
 from langgraph.graph import StateGraph,END
 
 from ai.test_case_generation.nodes.EndpointBatcherNode import EndpointBatcherNode
-from ai.test_case_generation.agents.TestGenerationNode import TestGenerationNode
+from ai.test_case_generation.agents.TestGenerationNode import TestGenerationNode, QueuedTestGenerationNode
 from ai.test_case_generation.graph.TestGraphState import TestGraphState
+from jobs.task_queue import TASK_QUEUE_ENABLED
 
 
 def create_test_graph():
     workflow = StateGraph(TestGraphState)
     
     workflow.add_node("batcher",EndpointBatcherNode)
-    workflow.add_node("test_case_generator",TestGenerationNode)
+    workflow.add_node("test_case_generator",QueuedTestGenerationNode if TASK_QUEUE_ENABLED else TestGenerationNode)
     
     workflow.set_entry_point("batcher")
     workflow.add_edge("batcher","test_case_generator")
@@ -1,20 +1,24 @@
 from ai.test_case_generation.graph.test_graph import create_test_graph
 from ai.test_case_generation.graph.TestGraphState import TestGraphState
 import traceback
+from typing import Optional
+from ai.utils.run_graph import run_graph, UpdateCallback, EventCallback
 from configs.logger import get_custom_logger
 
 logger = get_custom_logger(__name__)
 
 test_graph = create_test_graph()
 
-async def invoke_graph(state: TestGraphState) -> TestGraphState:
+async def invoke_graph(state: TestGraphState, on_update: Optional[UpdateCallback] = None, on_event: Optional[EventCallback] = None) -> TestGraphState:
     """
     Invoke the graph to process backend files and extract OpenAPI endpoints.
+    `on_update` receives each node's result as it finishes and `on_event`
+    the per-batch events nodes emit.
     """
 
     logger.info("Starting graph invocation...")
     try:
-        updated_state =await test_graph.ainvoke(state)
+        updated_state =await run_graph(test_graph, state, on_update=on_update, on_event=on_event)
         logger.info("Graph invocation completed successfully.")
     except Exception as e:
         logger.error(f"Graph invocation failed: {e}")
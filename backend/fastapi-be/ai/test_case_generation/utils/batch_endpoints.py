@@ -1,17 +1,44 @@
 from typing import Dict, List
-import tiktoken
 from dotenv import load_dotenv
 import os
 
+from ai.utils.tokenizer import count_tokens, count_tokens_many, count_json_tokens
+from ai.utils.model_router import LLM_MAX_COMPLETION_TOKENS
+
 load_dotenv()
 
 MAX_TOKENS_PER_TEST_BATCH = int(os.getenv("MAX_TOKENS_PER_TEST_BATCH"))
-# Initialize tokenizer for your LLM model (update model name if needed)
-encoding = tiktoken.get_encoding("cl100k_base")  # or "gpt-3.5-turbo", etc.
+# The prompts ask for about 3 success and 5 failure cases per endpoint; each case is
+# roughly some fixed JSON plus a payload and response shaped like the endpoint's own.
+TEST_CASES_PER_ENDPOINT = int(os.getenv("TEST_CASES_PER_ENDPOINT", 8))
+TEST_CASE_OVERHEAD_TOKENS = int(os.getenv("TEST_CASE_OVERHEAD_TOKENS", 60))
+# Completion tokens one answer may take; the rest of the limit is left for reasoning.
+MAX_OUTPUT_TOKENS_PER_TEST_BATCH = int(os.getenv("MAX_OUTPUT_TOKENS_PER_TEST_BATCH", LLM_MAX_COMPLETION_TOKENS // 2))
 
 def estimate_tokens(text: str) -> int:
     """Accurately estimate token count using tiktoken."""
-    return len(encoding.encode(text))
+    return count_tokens(text)
+
+def estimate_output_tokens(endpoints: List[Dict]) -> List[int]:
+    """Expected completion tokens of the test cases generated for each endpoint."""
+    shapes = count_json_tokens([{"params": ep.get("params"), "responses": ep.get("responses")} for ep in endpoints])
+    return [TEST_CASES_PER_ENDPOINT * (TEST_CASE_OVERHEAD_TOKENS + tokens // 2) for tokens in shapes]
+
+def split_by_output_budget(endpoints: List[Dict], max_output_tokens: int = MAX_OUTPUT_TOKENS_PER_TEST_BATCH) -> List[List[Dict]]:
+    """
+    Splits endpoints, in order, into groups whose expected test cases fit one completion,
+    so a large collection is asked for in parts instead of being cut off mid-answer.
+    """
+    groups, current, current_tokens = [], [], 0
+    for ep, tokens in zip(endpoints, estimate_output_tokens(endpoints)):
+        if current and current_tokens + tokens > max_output_tokens:
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(ep)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    return groups
 
 def batch_endpoints_by_collection(
     collection_to_endpoints: Dict[str, List[Dict]],
@@ -19,23 +46,29 @@ def batch_endpoints_by_collection(
 ) -> List[Dict[str, List[Dict]]]:
     """
     Batches API endpoints grouped by collection into multiple batches
-    without exceeding a max token limit per batch.
+    without exceeding a max token limit per batch, for the prompt as well as
+    for the expected answer.
     """
     batches = []
     current_batch = {}
     current_tokens = 0
+    current_output_tokens = 0
 
     for collection, endpoints in collection_to_endpoints.items():
-        total_collection_tokens = sum(estimate_tokens(str(ep)) for ep in endpoints)
+        total_collection_tokens = sum(count_tokens_many([str(ep) for ep in endpoints]))
+        collection_output_tokens = sum(estimate_output_tokens(endpoints))
 
-        if current_tokens + total_collection_tokens > max_tokens_per_batch:
+        if (current_tokens + total_collection_tokens > max_tokens_per_batch
+                or current_output_tokens + collection_output_tokens > MAX_OUTPUT_TOKENS_PER_TEST_BATCH):
             if current_batch:
                 batches.append(current_batch)
             current_batch = {}
             current_tokens = 0
+            current_output_tokens = 0
 
         current_batch[collection] = endpoints
         current_tokens += total_collection_tokens
+        current_output_tokens += collection_output_tokens
 
     if current_batch:
         batches.append(current_batch)
@@ -0,0 +1,134 @@
+from typing import Any, Awaitable, Callable, List, NamedTuple, Optional, Tuple
+
+from ai.utils.get_llm_response import UnusableLLMResponse
+from ai.utils.stream_json_parser import salvage_json
+from configs.logger import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+# settle(items, answer, complete) -> (part of the answer to keep, items still to do)
+Settle = Callable[[List[Any], Any, bool], Tuple[Any, List[Any]]]
+
+
+class BatchOutcome(NamedTuple):
+    result: Any  # the kept answers, concatenated (list) or merged (dict)
+    failed: List[Any]  # items no answer covered, even on their own
+
+
+def _settle_all(items: List[Any], answer: Any, complete: bool) -> Tuple[Any, List[Any]]:
+    return answer, [] if complete else items
+
+
+def _empty(expected_type):
+    return [] if expected_type is list else {}
+
+
+def _combine(result, answer):
+    if isinstance(result, list):
+        result.extend(answer or [])
+    else:
+        result.update(answer or {})
+
+
+def _next_batches(label: str, batch: List[Any], missing: List[Any], failed: List[Any], truncated: bool = False) -> List[List[Any]]:
+    """
+    What to ask for next after an answer left `missing` uncovered: the missing items
+    together if the answer covered anything (a continuation, when it was cut off at
+    the output limit), else the two halves of the batch.
+    """
+    if not missing:
+        return []
+    if len(missing) < len(batch):
+        if truncated:
+            logger.info(f"{label}: answer cut off after {len(batch) - len(missing)}/{len(batch)} items, continuing with the other {len(missing)}.")
+        else:
+            logger.info(f"{label}: salvaged {len(batch) - len(missing)}/{len(batch)} items, retrying the other {len(missing)}.")
+        return [missing]
+    if len(batch) == 1:
+        logger.error(f"{label}: giving up on an item no answer covered.")
+        failed.extend(batch)
+        return []
+    half = len(batch) // 2
+    logger.warning(f"{label}: unusable answer for {len(batch)} items, retrying halves of {half} and {len(batch) - half}.")
+    return [batch[half:], batch[:half]]
+
+
+class _Bisection:
+    """
+    The split/merge state shared by `run_bisecting` and `arun_bisecting`; they only
+    differ in how they call the model for the next batch.
+    """
+
+    def __init__(self, label: str, items: List[Any], expected_type, settle: Optional[Settle], bypass_cache: bool):
+        self.label = label
+        self.expected_type = expected_type
+        self.settle = settle or _settle_all
+        self.bypass_cache = bypass_cache
+        self.result, self.failed = _empty(expected_type), []
+        self.pending = [items] if items else []
+        self.answered = False
+
+    def next(self) -> Tuple[List[Any], bool]:
+        """The next batch to ask for, and whether to bypass the cache (only the first request does)."""
+        bypass_cache, self.bypass_cache = self.bypass_cache, False
+        return self.pending.pop(), bypass_cache
+
+    def answer(self, batch: List[Any], answer: Any):
+        self.answered = True
+        self._settle(batch, answer, True)
+
+    def unusable(self, batch: List[Any], error: UnusableLLMResponse):
+        if error.response:
+            self.answered = True
+            self._settle(batch, salvage_json(error.response, self.expected_type), False, error.truncated)
+        elif len(batch) > 1 or self.answered:
+            # No answer at all, e.g. a prompt the provider rejects: halves may still get one.
+            self._settle(batch, None, False)
+        else:
+            # Not a single request was answered: the provider is likely down, splitting will not help.
+            raise error
+
+    def _settle(self, batch: List[Any], answer: Any, complete: bool, truncated: bool = False):
+        kept, missing = self.settle(batch, answer, complete)
+        _combine(self.result, kept)
+        self.pending.extend(_next_batches(self.label, batch, missing, self.failed, truncated))
+
+    def outcome(self) -> BatchOutcome:
+        return BatchOutcome(self.result, self.failed)
+
+
+def run_bisecting(label: str, items: List[Any], call: Callable[[List[Any], bool], Any], expected_type=list, settle: Optional[Settle] = None, bypass_cache: bool = False) -> BatchOutcome:
+    """
+    Runs `call` (one LLM request for a list of items, returning the parsed JSON
+    answer) on `items`. When the answer cannot be used, every complete object is
+    salvaged from it and only the items it did not cover are asked for again; an
+    answer with nothing usable splits the batch in half, down to single items, so
+    one bad item costs O(log n) extra calls instead of re-running the batch.
+    `settle` checks an answer against its items (the schema check) and defaults to
+    accepting complete answers whole. Errors other than an unusable answer propagate,
+    as does a missing answer when no request of the run was answered.
+    """
+    bisection = _Bisection(label, items, expected_type, settle, bypass_cache)
+    while bisection.pending:
+        batch, bypass = bisection.next()
+        try:
+            answer = call(batch, bypass)
+        except UnusableLLMResponse as e:
+            bisection.unusable(batch, e)
+        else:
+            bisection.answer(batch, answer)
+    return bisection.outcome()
+
+
+async def arun_bisecting(label: str, items: List[Any], call: Callable[[List[Any], bool], Awaitable[Any]], expected_type=list, settle: Optional[Settle] = None, bypass_cache: bool = False) -> BatchOutcome:
+    """Async `run_bisecting`."""
+    bisection = _Bisection(label, items, expected_type, settle, bypass_cache)
+    while bisection.pending:
+        batch, bypass = bisection.next()
+        try:
+            answer = await call(batch, bypass)
+        except UnusableLLMResponse as e:
+            bisection.unusable(batch, e)
+        else:
+            bisection.answer(batch, answer)
+    return bisection.outcome()
@@ -0,0 +1,17 @@
+import asyncio
+from typing import Any, Awaitable, Callable, List
+
+
+async def gather_bounded(items: List[Any], worker: Callable[[int, Any], Awaitable[Any]], limit: int) -> List[Any]:
+    """
+    Runs `worker(index, item)` for every item with at most `limit` running at once.
+    Results come back in item order; an item that fails yields its exception
+    instead of cancelling the others.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(index: int, item: Any) -> Any:
+        async with semaphore:
+            return await worker(index, item)
+
+    return await asyncio.gather(*(run(i, item) for i, item in enumerate(items)), return_exceptions=True)
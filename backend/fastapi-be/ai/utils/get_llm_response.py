@@ -1,41 +1,416 @@
+import time
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 from langchain_groq import ChatGroq
 import os
 
-GROQ_API_KEY = str(os.getenv("GROQ_API_KEY"))
+from ai.utils.rate_limiter import llm_rate_limiter, rate_limit_wait, LLM_EXPECTED_OUTPUT_TOKENS, LLM_RATE_LIMIT_RETRIES
+from ai.utils.tokenizer import count_tokens
+from ai.utils.llm_response_cache import llm_response_cache, llm_cache_key, LLM_CACHE_ENABLED
+from ai.utils.model_router import model_router, models, DEFAULT_MODEL, LLM_MAX_COMPLETION_TOKENS
+from ai.utils.parse_json_response import parse_json_response, loads
+from ai.utils.stream_json_parser import StreamingJSONParser, is_truncated_json
+from configs.logger import get_custom_logger
+
+logger = get_custom_logger(__name__)
 
-models = [
-    "deepseek-r1-distill-llama-70b",
-    "llama-3.1-8b-instant"
-]
+GROQ_API_KEY = str(os.getenv("GROQ_API_KEY"))
+# JSON calls that report items as they arrive stream the completion instead of waiting for it.
+LLM_STREAMING = os.getenv("LLM_STREAMING", "true").lower() == "true"
 
+# 429s are retried by the shared rate limiter, which pauses every caller, not by the client.
 llm = ChatGroq(
     temperature=0.0,
-    model=models[0],  
-    api_key=GROQ_API_KEY
+    model=DEFAULT_MODEL,  
+    api_key=GROQ_API_KEY,
+    max_tokens=LLM_MAX_COMPLETION_TOKENS,
+    max_retries=0
 )
+_clients: Dict[str, ChatGroq] = {DEFAULT_MODEL: llm}
+
+class UnusableLLMResponse(ValueError):
+    """
+    No model gave a usable JSON answer; `response` is the last answer received, if
+    any, and `truncated` tells whether it stopped inside its JSON (the output limit).
+    """
+
+    def __init__(self, response: Optional[str] = None):
+        self.response = response
+        self.truncated = is_truncated_json(response)
+        super().__init__("LLM response was cut off before its JSON ended." if self.truncated else "No usable JSON response from LLM.")
+
+def is_unusable_answer(error: BaseException) -> bool:
+    """True when the model did answer but the answer could not be used, so repeating the same prompt is wasteful."""
+    return isinstance(error, UnusableLLMResponse) and bool(error.response)
+
+def get_llm(model: str = DEFAULT_MODEL) -> ChatGroq:
+    """Client for `model`, created on first use."""
+    if model not in _clients:
+        _clients[model] = ChatGroq(temperature=0.0, model=model, api_key=GROQ_API_KEY, max_tokens=LLM_MAX_COMPLETION_TOKENS, max_retries=0)
+    return _clients[model]
+
+def _estimate_request_tokens(messages) -> int:
+    return sum(count_tokens(message.content) for message in messages) + LLM_EXPECTED_OUTPUT_TOKENS
+
+def _used_tokens(response) -> int|None:
+    usage = getattr(response, "usage_metadata", None) or {}
+    return usage.get("total_tokens")
+
+def _stream_usage(used: Optional[int], streamed: bool) -> Optional[int]:
+    """Usage to settle a stream with: a stream that produced nothing is refunded, an unfinished one keeps its reservation."""
+    if used is None and not streamed:
+        return 0
+    return used
+
+def _check_finish(response, model: str):
+    if (getattr(response, "response_metadata", None) or {}).get("finish_reason") == "length":
+        logger.warning(f"{model} stopped at the {LLM_MAX_COMPLETION_TOKENS}-token completion limit.")
+
+def invoke_llm(messages, model: str = DEFAULT_MODEL):
+    """
+    Invokes the LLM within the request/token budget (shared by every process with
+    LLM_RATE_LIMIT_SHARED), waiting out 429s.
+    The reservation of a call that fails is refunded.
+    """
+    tokens = _estimate_request_tokens(messages)
+    for attempt in range(LLM_RATE_LIMIT_RETRIES + 1):
+        reserved = llm_rate_limiter.acquire(tokens)
+        used = 0
+        try:
+            response = get_llm(model).invoke(messages)
+            used = _used_tokens(response)
+            _check_finish(response, model)
+        except Exception as e:
+            wait = rate_limit_wait(e)
+            if wait is None or attempt == LLM_RATE_LIMIT_RETRIES:
+                raise
+            llm_rate_limiter.pause(wait)
+            continue
+        finally:
+            llm_rate_limiter.settle(reserved, used)
+        return response
+
+async def ainvoke_llm(messages, model: str = DEFAULT_MODEL):
+    """Async `invoke_llm`."""
+    tokens = _estimate_request_tokens(messages)
+    for attempt in range(LLM_RATE_LIMIT_RETRIES + 1):
+        reserved = await llm_rate_limiter.aacquire(tokens)
+        used = 0
+        try:
+            response = await get_llm(model).ainvoke(messages)
+            used = _used_tokens(response)
+            _check_finish(response, model)
+        except Exception as e:
+            wait = rate_limit_wait(e)
+            if wait is None or attempt == LLM_RATE_LIMIT_RETRIES:
+                raise
+            llm_rate_limiter.pause(wait)
+            continue
+        finally:
+            llm_rate_limiter.settle(reserved, used)
+        return response
+
+def stream_llm(messages, model: str = DEFAULT_MODEL) -> Iterator[str]:
+    """`invoke_llm` yielding the content in pieces as the model produces them."""
+    tokens = _estimate_request_tokens(messages)
+    for attempt in range(LLM_RATE_LIMIT_RETRIES + 1):
+        reserved = llm_rate_limiter.acquire(tokens)
+        used, streamed = None, False
+        try:
+            for chunk in get_llm(model).stream(messages):
+                used = _used_tokens(chunk) or used
+                _check_finish(chunk, model)
+                if chunk.content:
+                    streamed = True
+                    yield chunk.content
+        except Exception as e:
+            wait = rate_limit_wait(e)
+            # Pieces already handed out cannot be taken back, so only a 429 before the first one is retried.
+            if wait is None or streamed or attempt == LLM_RATE_LIMIT_RETRIES:
+                raise
+            llm_rate_limiter.pause(wait)
+            continue
+        finally:
+            llm_rate_limiter.settle(reserved, _stream_usage(used, streamed))
+        return
+
+async def astream_llm(messages, model: str = DEFAULT_MODEL) -> AsyncIterator[str]:
+    """Async `stream_llm`."""
+    tokens = _estimate_request_tokens(messages)
+    for attempt in range(LLM_RATE_LIMIT_RETRIES + 1):
+        reserved = await llm_rate_limiter.aacquire(tokens)
+        used, streamed = None, False
+        try:
+            async for chunk in get_llm(model).astream(messages):
+                used = _used_tokens(chunk) or used
+                _check_finish(chunk, model)
+                if chunk.content:
+                    streamed = True
+                    yield chunk.content
+        except Exception as e:
+            wait = rate_limit_wait(e)
+            if wait is None or streamed or attempt == LLM_RATE_LIMIT_RETRIES:
+                raise
+            llm_rate_limiter.pause(wait)
+            continue
+        finally:
+            llm_rate_limiter.settle(reserved, _stream_usage(used, streamed))
+        return
+
+class _LLMCall:
+    """
+    One request for an answer, shared by every response function: model routing,
+    the response cache and router bookkeeping, with a method per way of reaching
+    the model. `from_cache` tells whether the answer was served from the cache.
+    """
+
+    def __init__(self, prompt: str, system_prompt: str, stage: Optional[str] = None, model: Optional[str] = None):
+        if not GROQ_API_KEY:
+            raise ValueError("GROQ_API_KEY environment variable is not set.")
+        self.model = model or model_router.select(stage, count_tokens(prompt))
+        self.key = llm_cache_key(self.model, system_prompt, prompt)
+        self.messages = [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=prompt)
+        ]
+        self.from_cache = False
+        self.started = time.monotonic()
+
+    def _cached(self, bypass_cache: bool) -> Optional[str]:
+        if not LLM_CACHE_ENABLED or bypass_cache:
+            return None
+        cached = llm_response_cache.get(self.key)
+        if cached:
+            self.from_cache = True
+            model_router.record_cache_hit(self.model)
+        return cached
+
+    def _done(self, response: str) -> Optional[str]:
+        """Records the answer and caches it; returns it, or None if it is empty."""
+        response = response.strip()
+        model_router.record(self.model, time.monotonic() - self.started, bool(response))
+        if response and LLM_CACHE_ENABLED:
+            llm_response_cache.set(self.key, response)
+        return response or None
+
+    def _failed(self, error: Exception) -> None:
+        model_router.record(self.model, time.monotonic() - self.started, False)
+        logger.error(f"Error getting LLM response from {self.model}: {error}")
+
+    def respond(self, bypass_cache: bool = False) -> Optional[str]:
+        cached = self._cached(bypass_cache)
+        if cached:
+            return cached
+        try:
+            response = invoke_llm(self.messages, self.model).content
+        except Exception as e:
+            return self._failed(e)
+        return self._done(response)
 
-def get_llm_response(prompt: str,system_prompt:str) -> str|None:
+    async def arespond(self, bypass_cache: bool = False) -> Optional[str]:
+        cached = await asyncio.to_thread(self._cached, bypass_cache)
+        if cached:
+            return cached
+        try:
+            response = (await ainvoke_llm(self.messages, self.model)).content
+        except Exception as e:
+            return self._failed(e)
+        return await asyncio.to_thread(self._done, response)
+
+    def stream(self, bypass_cache: bool = False) -> Iterator[str]:
+        cached = self._cached(bypass_cache)
+        if cached:
+            yield cached
+            return
+        pieces = []
+        try:
+            for piece in stream_llm(self.messages, self.model):
+                pieces.append(piece)
+                yield piece
+        except Exception as e:
+            self._failed(e)
+            return
+        self._done("".join(pieces))
+
+    async def astream(self, bypass_cache: bool = False) -> AsyncIterator[str]:
+        cached = await asyncio.to_thread(self._cached, bypass_cache)
+        if cached:
+            yield cached
+            return
+        pieces = []
+        try:
+            async for piece in astream_llm(self.messages, self.model):
+                pieces.append(piece)
+                yield piece
+        except Exception as e:
+            self._failed(e)
+            return
+        await asyncio.to_thread(self._done, "".join(pieces))
+
+def get_llm_response(prompt: str,system_prompt:str,bypass_cache:bool=False,stage:Optional[str]=None,model:Optional[str]=None) -> str|None:
     """
     Get a response from the LLM using the provided prompt.
+    Responses are cached per model and messages (calls run at temperature 0);
+    `bypass_cache` skips the lookup but still stores the fresh response.
     
     Args:
         prompt (str): The input prompt for the LLM.
+        system_prompt (str): The system message.
+        bypass_cache (bool): Ask the model even if a cached response exists.
+        stage (str): Call site, used by the model router to pick the model.
+        model (str): Explicit model, overriding the router.
         
     Returns:
         str: The response from the LLM.
     """
-    if not GROQ_API_KEY:
-        raise ValueError("GROQ_API_KEY environment variable is not set.")
+    return _LLMCall(prompt, system_prompt, stage, model).respond(bypass_cache)
+
+async def aget_llm_response(prompt: str,system_prompt:str,bypass_cache:bool=False,stage:Optional[str]=None,model:Optional[str]=None) -> str|None:
+    """
+    Async variant of `get_llm_response`, so several prompts can be in flight at once.
+    """
+    return await _LLMCall(prompt, system_prompt, stage, model).arespond(bypass_cache)
 
+def stream_llm_response(prompt: str,system_prompt:str,bypass_cache:bool=False,stage:Optional[str]=None,model:Optional[str]=None) -> Iterator[str]:
+    """
+    Streaming mode of `get_llm_response`: yields the answer in pieces as they are
+    generated. A cached answer is yielded whole; a streamed one is cached once complete.
+    """
+    return _LLMCall(prompt, system_prompt, stage, model).stream(bypass_cache)
+
+def astream_llm_response(prompt: str,system_prompt:str,bypass_cache:bool=False,stage:Optional[str]=None,model:Optional[str]=None) -> AsyncIterator[str]:
+    """Async `stream_llm_response`."""
+    return _LLMCall(prompt, system_prompt, stage, model).astream(bypass_cache)
+
+def _parse_expected(response: Optional[str], expected_type) -> Optional[Any]:
+    if not response:
+        return None
     try:
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=prompt)
-        ]
-        
-        response = llm.invoke(messages).content.strip()
-        return response if response else None
-    except Exception as e:
-        print(f"Error getting LLM response: {e}")
-        return None
\ No newline at end of file
+        parsed = parse_json_response(response, expected_type)
+    except Exception:
+        return None
+    return parsed if isinstance(parsed, expected_type) else None
+
+def _streamed_result(response: str, parser: StreamingJSONParser, expected_type) -> Optional[Any]:
+    if parser.complete:
+        try:
+            parsed = loads(parser.answer)
+            return parsed if isinstance(parsed, expected_type) else None
+        except ValueError:
+            pass
+    return _parse_expected(response, expected_type)
+
+class _JSONCall:
+    """
+    The model ladder shared by the JSON response functions: parses each model's
+    answer, reports its items, and escalates while the answers cannot be used.
+    Each item index is reported once: after an escalation, only the items past
+    those the smaller model already reported are passed on.
+    """
+
+    def __init__(self, prompt: str, system_prompt: str, stage: Optional[str], expected_type, on_item: Optional[Callable[[Any], None]]):
+        self.prompt = prompt
+        self.system_prompt = system_prompt
+        self.expected_type = expected_type
+        self.on_item = on_item
+        self.streaming = bool(on_item) and LLM_STREAMING
+        self.model = model_router.select(stage, count_tokens(prompt))
+        self.response = None
+        self.last_response = None
+        self.reported = 0
+        self.llm_call: Optional[_LLMCall] = None
+        self._reset()
+
+    def ask(self) -> _LLMCall:
+        """The request for the current model's answer."""
+        self.llm_call = _LLMCall(self.prompt, self.system_prompt, model=self.model)
+        return self.llm_call
+
+    def _reset(self):
+        self.parser = StreamingJSONParser()
+        self.pieces = []
+        self.items = 0
+
+    def _report(self, items):
+        for item in items:
+            if self.items >= self.reported:
+                self.on_item(item)
+                self.reported += 1
+            self.items += 1
+
+    def feed(self, piece: str):
+        """Takes the next streamed piece of the current model's answer."""
+        self.pieces.append(piece)
+        items = self.parser.feed(piece)
+        # Items are only passed on if the answer's top-level type is the expected one.
+        if items and isinstance([] if self.parser.root == "[" else {}, self.expected_type):
+            self._report(items)
+
+    def result(self, response: Optional[str] = None) -> Optional[Any]:
+        """Parses the current model's answer (the streamed pieces, or `response`); None if unusable."""
+        if self.streaming:
+            response = "".join(self.pieces)
+            parsed = _streamed_result(response, self.parser, self.expected_type)
+        else:
+            parsed = _parse_expected(response, self.expected_type)
+            if self.on_item and parsed is not None:
+                self._report(parsed.items() if isinstance(parsed, dict) else parsed)
+        self.response = response
+        if parsed is None:
+            self.last_response = response or self.last_response
+        return parsed
+
+    def escalate(self):
+        """
+        Drops an unusable cached answer and moves to the model to escalate to, if any.
+        An answer cut off at the completion limit is not escalated: a larger model
+        would hit the same limit, so callers continue with the remaining items instead.
+        """
+        model = self.model
+        self.model = None if is_truncated_json(self.response) else model_router.escalate(model)
+        if self.response:
+            llm_response_cache.delete_many([llm_cache_key(model, self.system_prompt, self.prompt)])
+            model_router.record_parse_failure(model, self.model, cached=self.llm_call.from_cache)
+        self._reset()
+
+def get_llm_json_response(prompt: str, system_prompt: str, stage: Optional[str] = None, expected_type=(list, dict), bypass_cache: bool = False, on_item: Optional[Callable[[Any], None]] = None):
+    """
+    Calls the routed model and parses its JSON answer. An empty or unparseable
+    answer, or JSON of the wrong type, is retried on the next larger model.
+    Raises UnusableLLMResponse (a ValueError) when no model gives a usable answer.
+
+    With `on_item`, the completion is streamed and every element of a top-level
+    list, or (key, value) member of a top-level dict, is passed to `on_item` as
+    soon as it is complete. Items already reported from an answer that is then
+    escalated are not reported again.
+    """
+    call = _JSONCall(prompt, system_prompt, stage, expected_type, on_item)
+    while call.model:
+        llm_call = call.ask()
+        if call.streaming:
+            for piece in llm_call.stream(bypass_cache):
+                call.feed(piece)
+            parsed = call.result()
+        else:
+            parsed = call.result(llm_call.respond(bypass_cache))
+        if parsed is not None:
+            return parsed
+        call.escalate()
+    raise UnusableLLMResponse(call.last_response)
+
+async def aget_llm_json_response(prompt: str, system_prompt: str, stage: Optional[str] = None, expected_type=(list, dict), bypass_cache: bool = False, on_item: Optional[Callable[[Any], None]] = None):
+    """Async `get_llm_json_response`."""
+    call = _JSONCall(prompt, system_prompt, stage, expected_type, on_item)
+    while call.model:
+        llm_call = call.ask()
+        if call.streaming:
+            async for piece in llm_call.astream(bypass_cache):
+                call.feed(piece)
+            parsed = call.result()
+        else:
+            parsed = call.result(await llm_call.arespond(bypass_cache))
+        if parsed is not None:
+            return parsed
+        await asyncio.to_thread(call.escalate)
+    raise UnusableLLMResponse(call.last_response)
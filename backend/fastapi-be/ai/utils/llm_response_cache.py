@@ -0,0 +1,21 @@
+import json
+import hashlib
+from dotenv import load_dotenv
+import os
+
+from ai.utils.persistent_cache import PersistentCache
+
+load_dotenv()
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 500))
+
+# Responses of temperature-0 calls, keyed by model and messages.
+llm_response_cache = PersistentCache("llm_response_cache", max_entries=LLM_CACHE_MAX_ENTRIES, ttl_seconds=LLM_CACHE_TTL_SECONDS)
+
+
+def llm_cache_key(model: str, system_prompt: str, prompt: str) -> str:
+    """Hash of the model and the exact messages sent."""
+    payload = json.dumps([model, system_prompt, prompt])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
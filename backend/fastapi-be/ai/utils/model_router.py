@@ -0,0 +1,104 @@
+import threading
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+import os
+
+from configs.logger import get_custom_logger
+
+load_dotenv()
+
+logger = get_custom_logger(__name__)
+
+# Largest first; escalation moves a call one step towards the front.
+models = [
+    "deepseek-r1-distill-llama-70b",
+    "llama-3.1-8b-instant"
+]
+DEFAULT_MODEL = models[0]
+FAST_MODEL = models[-1]
+
+# Model per call site, overridable with LLM_MODEL_<STAGE> (e.g. LLM_MODEL_DOC_SNIPPETS).
+STAGE_MODELS = {
+    "extraction": DEFAULT_MODEL,
+    "enrichment": FAST_MODEL,
+    "doc_snippets": FAST_MODEL,
+    "doc_builder": DEFAULT_MODEL,
+    "test_generation": DEFAULT_MODEL,
+}
+STAGE_MODELS = {stage: os.getenv(f"LLM_MODEL_{stage.upper()}", model) for stage, model in STAGE_MODELS.items()}
+# Prompts above this size go to the larger model even for fast-model stages.
+FAST_MODEL_MAX_PROMPT_TOKENS = int(os.getenv("FAST_MODEL_MAX_PROMPT_TOKENS", 4000))
+# Completion limit requested from every model; reasoning and answer share it.
+LLM_MAX_COMPLETION_TOKENS = int(os.getenv("LLM_MAX_COMPLETION_TOKENS", 8192))
+
+
+class ModelRouter:
+    """
+    Picks the model for a call from its stage and prompt size, escalates to the
+    next larger model when an answer cannot be used, and keeps per-model latency
+    and success counts so routing decisions can be checked. Answers served from
+    the response cache are counted apart from model calls, with their own parse
+    failures, so `success_rate` only covers calls the model answered.
+    """
+
+    def __init__(self, stage_models: Dict[str, str] = STAGE_MODELS, ladder: List[str] = models):
+        self.stage_models = stage_models
+        self.ladder = ladder
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def select(self, stage: Optional[str], prompt_tokens: int = 0) -> str:
+        model = self.stage_models.get(stage, DEFAULT_MODEL) if stage else DEFAULT_MODEL
+        if model == FAST_MODEL and prompt_tokens > FAST_MODEL_MAX_PROMPT_TOKENS:
+            return self.escalate(model) or model
+        return model
+
+    def escalate(self, model: str) -> Optional[str]:
+        """The next larger model, or None if `model` is already the largest."""
+        if model not in self.ladder:
+            return None
+        index = self.ladder.index(model)
+        return self.ladder[index - 1] if index > 0 else None
+
+    def _model_stats(self, model: str) -> Dict[str, float]:
+        return self._stats.setdefault(model, {"calls": 0, "errors": 0, "parse_failures": 0, "escalations": 0, "latency_seconds": 0.0,
+                                              "cache_hits": 0, "cached_parse_failures": 0})
+
+    def record(self, model: str, latency: float, success: bool):
+        """Records one model call; `success` is False for errors and empty answers."""
+        with self._lock:
+            stats = self._model_stats(model)
+            stats["calls"] += 1
+            stats["latency_seconds"] += latency
+            if not success:
+                stats["errors"] += 1
+
+    def record_cache_hit(self, model: str):
+        with self._lock:
+            self._model_stats(model)["cache_hits"] += 1
+
+    def record_parse_failure(self, model: str, escalated_to: Optional[str], cached: bool = False):
+        """Records an unusable answer; `cached` if it was served from the response cache."""
+        with self._lock:
+            stats = self._model_stats(model)
+            stats["cached_parse_failures" if cached else "parse_failures"] += 1
+            if escalated_to:
+                stats["escalations"] += 1
+        if escalated_to:
+            logger.warning(f"Unusable output from {model}, escalating to {escalated_to}.")
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            result = {}
+            for model, stats in self._stats.items():
+                calls = stats["calls"] or 1
+                result[model] = {
+                    **stats,
+                    "latency_seconds": round(stats["latency_seconds"], 3),
+                    "avg_latency_seconds": round(stats["latency_seconds"] / calls, 3),
+                    "success_rate": round((stats["calls"] - stats["errors"] - stats["parse_failures"]) / calls, 3),
+                }
+            return result
+
+
+model_router = ModelRouter()
@@ -1,44 +1,171 @@
 import json
 import re
+from typing import Any, List, NamedTuple, Tuple
 
-def parse_json_response(response: str) -> dict | list:
+from configs.logger import get_custom_logger
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = get_custom_logger(__name__)
+
+# Where a top-level value (or a reasoning block) may start, and the tokens that delimit a span.
+_OUTSIDE = re.compile(r"<think>|[\[{]")
+_INSIDE = re.compile(r'["\[\]{}]')
+# The rest of a JSON string after its opening quote, escapes included.
+_STRING_REST = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_CLOSERS = {"]": "[", "}": "{"}
+_decoder = json.JSONDecoder()
+
+
+class JSONScan(NamedTuple):
+    values: List[Any]
+    spans: List[Tuple[int, int]]
+    failures: List[Tuple[int, int, str]]  # (start, end, reason) of spans that did not parse
+
+
+def loads(text: str) -> Any:
+    """json.loads, using orjson when it is installed."""
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            # orjson is stricter than json in a few places (e.g. lone surrogates).
+            pass
+    return json.loads(text)
+
+
+def _span_end(text: str, start: int) -> Tuple[int, str]:
+    """End of the bracketed span opening at `start`, tracking string state; "truncated" if it never closes."""
+    stack = [text[start]]
+    position = start + 1
+    while stack:
+        match = _INSIDE.search(text, position)
+        if not match:
+            return len(text), "truncated"
+        token = match.group()
+        position = match.end()
+        if token == '"':
+            string = _STRING_REST.match(text, position)
+            if not string:
+                return len(text), "truncated"
+            position = string.end()
+        elif token in "[{":
+            stack.append(token)
+        elif stack.pop() != _CLOSERS[token]:
+            return position, "mismatched brackets"
+    return position, ""
+
+
+def _closed_spans(text: str, start: int, end: int) -> List[Tuple[int, int]]:
     """
-    Extracts and parses JSON (list or dict) from LLM output,
-    even if surrounded by non-JSON text, markdown, or with multiple top-level JSON objects.
+    Outermost bracketed spans that open after `start` and close before `end`, in
+    one pass with a bracket stack; text[start:end] is a valid prefix of a JSON value.
     """
-    response = response.strip()
-
-    # Step 1: Remove markdown-style ```json blocks if any
-    markdown_match = re.search(r"```(?:json)?\s*([\s\S]*?)\s*```", response, re.DOTALL)
-    if markdown_match:
-        response = markdown_match.group(1).strip()
-
-    # Step 2: Try direct parse first
-    try:
-        return json.loads(response)
-    except json.JSONDecodeError:
-        pass
-
-    # Step 3: Try to extract all individual JSON objects
-    json_objects = re.findall(r"\{[^{}]+\}", response, re.DOTALL)
-    if json_objects:
-        result = {}
-        for obj in json_objects:
-            try:
-                parsed = json.loads(obj)
-                if isinstance(parsed, dict):
-                    result.update(parsed)
-            except json.JSONDecodeError:
-                continue
-        if result:
-            return result
-
-    # Step 4: Try list matching
-    json_list_match = re.search(r"\[\s*[\s\S]+?\s*\]", response)
-    if json_list_match:
+    closed, stack = [], []
+    position = start + 1
+    while True:
+        match = _INSIDE.search(text, position, end)
+        if not match:
+            return closed
+        token = match.group()
+        position = match.end()
+        if token == '"':
+            string = _STRING_REST.match(text, position, end)
+            if not string:
+                return closed
+            position = string.end()
+        elif token in "[{":
+            stack.append(match.start())
+        elif stack:
+            opened = stack.pop()
+            # Spans closed inside this one are part of it.
+            while closed and closed[-1][0] > opened:
+                closed.pop()
+            closed.append((opened, position))
+
+
+def _ran_out(text: str, error: json.JSONDecodeError) -> bool:
+    """True when decoding failed because the text ended, not because it is not JSON."""
+    return error.pos >= len(text.rstrip()) or error.msg.startswith("Unterminated string")
+
+
+def scan_json_values(text: str) -> JSONScan:
+    """
+    Finds and parses every top-level JSON object or array in `text` in one pass.
+    Reasoning blocks (<think>...</think>), markdown fences and prose between values
+    are skipped. Each value is decoded in place by the C decoder, which also finds
+    where it ends. A span that is not JSON is reported in `failures`, the complete
+    values nested in its valid prefix are kept, and the scan resumes where decoding
+    failed, so no text is decoded more than twice. A span cut off by the end of the
+    text is delimited by bracket and string-state tracking and reported as truncated.
+    """
+    values, spans, failures = [], [], []
+    stripped = text.strip()
+    if stripped[:1] in ("[", "{") and stripped[-1:] in ("]", "}"):
+        # The whole answer is a single value: one parse with the fastest decoder.
         try:
-            return json.loads(json_list_match.group().strip())
-        except json.JSONDecodeError:
+            start = text.index(stripped)
+            return JSONScan([loads(stripped)], [(start, start + len(stripped))], [])
+        except ValueError:
             pass
 
-    raise ValueError("Invalid JSON after fallback attempt.")
+    position = 0
+    while True:
+        match = _OUTSIDE.search(text, position)
+        if not match:
+            break
+        if match.group() == "<think>":
+            end = text.find("</think>", match.end())
+            if end < 0:
+                break
+            position = end + len("</think>")
+            continue
+
+        start = match.start()
+        try:
+            value, position = _decoder.raw_decode(text, start)
+            values.append(value)
+            spans.append((start, position))
+        except json.JSONDecodeError as e:
+            if _ran_out(text, e):
+                # A cut-off answer: its complete inner elements are fragments, not answers.
+                position, reason = _span_end(text, start)
+                failures.append((start, position, reason or f"{e.msg} at char {e.pos}"))
+            else:
+                # A stray bracket (e.g. in prose before the answer): the answer may start inside it.
+                failures.append((start, e.pos, f"{e.msg} at char {e.pos}"))
+                for inner_start, inner_end in _closed_spans(text, start, e.pos):
+                    values.append(loads(text[inner_start:inner_end]))
+                    spans.append((inner_start, inner_end))
+                position = max(e.pos, start + 1)
+    return JSONScan(values, spans, failures)
+
+
+def parse_json_response(response: str, expected_type=None) -> dict | list:
+    """
+    Extracts and parses JSON (list or dict) from LLM output,
+    even if surrounded by reasoning, non-JSON text, markdown, or with multiple top-level JSON objects.
+    Several top-level objects are merged into one dict, or returned as a list when
+    `expected_type` is list; otherwise the largest value wins.
+    """
+    scan = scan_json_values(response)
+    if scan.failures:
+        logger.debug(f"Unparseable JSON spans in {len(response)} chars of LLM output: {scan.failures}")
+
+    if not scan.values:
+        failed = ", ".join(f"[{start}:{end}] {reason}" for start, end, reason in scan.failures)
+        raise ValueError(f"Invalid JSON after fallback attempt{': ' + failed if failed else ''}.")
+    if len(scan.values) == 1:
+        return scan.values[0]
+    if all(isinstance(value, dict) for value in scan.values):
+        if expected_type is list:
+            return scan.values
+        result = {}
+        for value in scan.values:
+            result.update(value)
+        return result
+    largest = max(range(len(scan.values)), key=lambda i: scan.spans[i][1] - scan.spans[i][0])
+    return scan.values[largest]
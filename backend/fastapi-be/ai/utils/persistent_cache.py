@@ -0,0 +1,172 @@
+import time
+import threading
+from datetime import datetime, timezone, timedelta
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from dotenv import load_dotenv
+import os
+
+from pymongo import UpdateOne
+
+from db.get_mongo_client import get_mongo_client
+from configs.logger import get_custom_logger
+
+load_dotenv()
+
+logger = get_custom_logger(__name__)
+
+# After a MongoDB error the persistent tier is skipped for this long, so an
+# unreachable database does not add a server-selection timeout to every lookup.
+PERSISTENT_CACHE_RETRY_SECONDS = int(os.getenv("PERSISTENT_CACHE_RETRY_SECONDS", 60))
+
+
+class PersistentCache:
+    """
+    Two-tier key/value cache: a thread-safe in-process LRU in front of a MongoDB
+    collection ({"_id": key, "value": value}). MongoDB failures are logged and
+    treated as misses, so callers never fail because of the cache.
+    With `ttl_seconds`, entries expire in both tiers; MongoDB drops them through
+    a TTL index on "expires_at".
+    """
+
+    def __init__(self, collection_name: str, max_entries: int = 1000, ttl_seconds: Optional[int] = None):
+        self.collection_name = collection_name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lru: "OrderedDict[str, Any]" = OrderedDict()
+        self._expires_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._mongo_disabled_until = 0.0
+        self._ttl_index_created = False
+        self.hits = 0
+        self.misses = 0
+
+    def _collection(self):
+        if time.time() < self._mongo_disabled_until:
+            return None
+        collection = get_mongo_client().get_collection(self.collection_name)
+        if self.ttl_seconds and not self._ttl_index_created:
+            with self._lock:
+                # Checked again under the lock so concurrent first calls create the index once.
+                if not self._ttl_index_created:
+                    collection.create_index("expires_at", expireAfterSeconds=0)
+                    self._ttl_index_created = True
+        return collection
+
+    def _mongo_failed(self, action: str, error: Exception):
+        self._mongo_disabled_until = time.time() + PERSISTENT_CACHE_RETRY_SECONDS
+        logger.warning(f"{self.collection_name}: MongoDB {action} failed, using in-memory tier only: {error}")
+
+    def _remember(self, key: str, value: Any, expires_at: Optional[float] = None):
+        with self._lock:
+            self._lru[key] = value
+            self._lru.move_to_end(key)
+            if self.ttl_seconds:
+                self._expires_at[key] = expires_at or time.time() + self.ttl_seconds
+            while len(self._lru) > self.max_entries:
+                evicted, _ = self._lru.popitem(last=False)
+                self._expires_at.pop(evicted, None)
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Returns the cached values for the keys that are present."""
+        found: Dict[str, Any] = {}
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                if key in self._expires_at and self._expires_at[key] <= now:
+                    self._lru.pop(key, None)
+                    del self._expires_at[key]
+                if key in self._lru:
+                    self._lru.move_to_end(key)
+                    found[key] = self._lru[key]
+
+        missing = [key for key in keys if key not in found]
+        if missing:
+            try:
+                collection = self._collection()
+                if collection is not None:
+                    query = {"_id": {"$in": missing}}
+                    if self.ttl_seconds:
+                        # The TTL monitor only runs once a minute; skip expired documents it has not removed yet.
+                        query["expires_at"] = {"$gt": datetime.now(timezone.utc)}
+                    for doc in collection.find(query):
+                        found[doc["_id"]] = doc["value"]
+                        expires_at = doc.get("expires_at")
+                        if expires_at is not None and expires_at.tzinfo is None:
+                            expires_at = expires_at.replace(tzinfo=timezone.utc)
+                        self._remember(doc["_id"], doc["value"], expires_at.timestamp() if expires_at else None)
+            except Exception as e:
+                self._mongo_failed("lookup", e)
+
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.get_many([key]).get(key)
+
+    def set_many(self, items: Dict[str, Any]):
+        """Stores values in both tiers (upsert)."""
+        if not items:
+            return
+        for key, value in items.items():
+            self._remember(key, value)
+
+        try:
+            collection = self._collection()
+            if collection is None:
+                return
+            now = datetime.now(timezone.utc)
+            fields = {"updated_at": now}
+            if self.ttl_seconds:
+                fields["expires_at"] = now + timedelta(seconds=self.ttl_seconds)
+            collection.bulk_write(
+                [UpdateOne({"_id": key}, {"$set": {"value": value, **fields}}, upsert=True) for key, value in items.items()],
+                ordered=False,
+            )
+        except Exception as e:
+            self._mongo_failed("write", e)
+
+    def set(self, key: str, value: Any):
+        self.set_many({key: value})
+
+    def delete_many(self, keys: List[str]):
+        with self._lock:
+            for key in keys:
+                self._lru.pop(key, None)
+                self._expires_at.pop(key, None)
+        try:
+            collection = self._collection()
+            if collection is not None:
+                collection.delete_many({"_id": {"$in": keys}})
+        except Exception as e:
+            self._mongo_failed("delete", e)
+
+    def delete_matching(self, field: str, value: Any):
+        """Deletes entries whose stored value is a dict with `value[field] == value`."""
+        with self._lock:
+            for key in [k for k, v in self._lru.items() if isinstance(v, dict) and v.get(field) == value]:
+                del self._lru[key]
+                self._expires_at.pop(key, None)
+        try:
+            collection = self._collection()
+            if collection is not None:
+                collection.delete_many({f"value.{field}": value})
+        except Exception as e:
+            self._mongo_failed("delete", e)
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+            self._expires_at.clear()
+        try:
+            collection = self._collection()
+            if collection is not None:
+                collection.delete_many({})
+        except Exception as e:
+            self._mongo_failed("clear", e)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "memory_entries": len(self._lru)}
@@ -0,0 +1,365 @@
+import re
+import time
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+from dotenv import load_dotenv
+import os
+
+from pymongo import errors
+
+from db.get_mongo_client import get_mongo_client
+from configs.logger import get_custom_logger
+
+load_dotenv()
+
+logger = get_custom_logger(__name__)
+
+# Provider limits; 0 disables a budget.
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", 30))
+# Room for a full LLM_MAX_COMPLETION_TOKENS answer plus its prompt in one minute.
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", 12000))
+# Output tokens reserved per request until the response reports its real usage.
+LLM_EXPECTED_OUTPUT_TOKENS = int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", 1024))
+# Pause applied after a 429 that carries no Retry-After header.
+LLM_RATE_LIMIT_BACKOFF_SECONDS = float(os.getenv("LLM_RATE_LIMIT_BACKOFF_SECONDS", 10))
+LLM_RATE_LIMIT_RETRIES = int(os.getenv("LLM_RATE_LIMIT_RETRIES", 3))
+# Keep the budgets in Mongo, shared by every API and worker process using the database,
+# instead of per process. On by default with the task queue, whose workers run as
+# separate processes: with per-process budgets N workers would spend N times the limit.
+LLM_RATE_LIMIT_SHARED = os.getenv("LLM_RATE_LIMIT_SHARED", os.getenv("TASK_QUEUE_ENABLED", "false")).lower() == "true"
+# How often a caller waiting on the shared budgets looks again, since other processes' refunds are not signalled.
+LLM_RATE_LIMIT_POLL_SECONDS = float(os.getenv("LLM_RATE_LIMIT_POLL_SECONDS", 1))
+RATE_LIMITS_COLLECTION = "rate_limits"
+# Compare-and-set rounds a shared reservation tries before backing off under contention.
+SHARED_BUCKET_ATTEMPTS = 5
+
+_DURATION_PART = re.compile(r"([\d.]+)(ms|s|m|h)")
+
+
+def _refilled(level: float, capacity: int, elapsed: float) -> float:
+    return min(capacity, level + elapsed * capacity / 60) if capacity else level
+
+
+def _wait_time(requests: float, tokens_left: float, paused_until: float, now: float,
+               requests_per_minute: int, tokens_per_minute: int, tokens: int) -> float:
+    """Seconds until a request of `tokens` fits both budgets (0 if it fits now)."""
+    wait = max(0.0, paused_until - now)
+    if requests_per_minute and requests < 1:
+        wait = max(wait, (1 - requests) * 60 / requests_per_minute)
+    if tokens_per_minute and tokens_left < tokens:
+        wait = max(wait, (tokens - tokens_left) * 60 / tokens_per_minute)
+    return wait
+
+
+class LocalBuckets:
+    """The request and token buckets of this process."""
+
+    shared = False
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._refilled_at
+        self._refilled_at = now
+        self._requests = _refilled(self._requests, self.requests_per_minute, elapsed)
+        self._tokens = _refilled(self._tokens, self.tokens_per_minute, elapsed)
+
+    def take(self, tokens: int) -> float:
+        """Reserves one request of `tokens` and returns 0, or returns the seconds until it fits."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = _wait_time(self._requests, self._tokens, self._paused_until, now, self.requests_per_minute, self.tokens_per_minute, tokens)
+            if wait > 0:
+                return wait
+            self._requests -= 1 if self.requests_per_minute else 0
+            self._tokens -= tokens
+            return 0
+
+    def give(self, tokens: int):
+        """Returns `tokens` to the token bucket, or takes them when negative."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.tokens_per_minute, self._tokens + tokens)
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def paused_for(self) -> float:
+        with self._lock:
+            return max(0.0, self._paused_until - time.monotonic())
+
+
+class MongoBuckets:
+    """
+    The request and token buckets kept in one document of the `rate_limits`
+    collection, so every process using the database draws from the same provider
+    budget. Updates are compare-and-set on a version counter; times are epoch
+    seconds, so hosts are assumed to have roughly synchronized clocks.
+    """
+
+    shared = True
+
+    def __init__(self, name: str, requests_per_minute: int, tokens_per_minute: int):
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+
+    def _collection(self):
+        return get_mongo_client().get_collection(RATE_LIMITS_COLLECTION)
+
+    def _load(self, collection) -> Dict:
+        doc = collection.find_one({"_id": self.name})
+        if doc is not None:
+            return doc
+        try:
+            collection.insert_one({
+                "_id": self.name,
+                "requests": float(self.requests_per_minute),
+                "tokens": float(self.tokens_per_minute),
+                "refilled_at": time.time(),
+                "paused_until": 0.0,
+                "version": 0,
+            })
+        except errors.DuplicateKeyError:  # another process created it first
+            pass
+        return collection.find_one({"_id": self.name})
+
+    def _refill(self, doc: Dict, now: float) -> Tuple[float, float, float]:
+        refilled_at = max(now, doc["refilled_at"])
+        elapsed = refilled_at - doc["refilled_at"]
+        return (
+            _refilled(doc["requests"], self.requests_per_minute, elapsed),
+            _refilled(doc["tokens"], self.tokens_per_minute, elapsed),
+            refilled_at,
+        )
+
+    def _swap(self, collection, doc: Dict, fields: Dict) -> bool:
+        """Writes `fields` if nobody changed the document since `doc` was read."""
+        result = collection.update_one({"_id": self.name, "version": doc["version"]}, {"$set": fields, "$inc": {"version": 1}})
+        return result.modified_count == 1
+
+    def take(self, tokens: int) -> float:
+        """`LocalBuckets.take` on the shared document."""
+        collection = self._collection()
+        for _ in range(SHARED_BUCKET_ATTEMPTS):
+            doc = self._load(collection)
+            requests, tokens_left, now = self._refill(doc, time.time())
+            wait = _wait_time(requests, tokens_left, doc["paused_until"], now, self.requests_per_minute, self.tokens_per_minute, tokens)
+            if wait > 0:
+                return wait
+            requests -= 1 if self.requests_per_minute else 0
+            if self._swap(collection, doc, {"requests": requests, "tokens": tokens_left - tokens, "refilled_at": now}):
+                return 0
+        # Lost every round to other processes; look again shortly.
+        return 0.05
+
+    def give(self, tokens: int):
+        collection = self._collection()
+        for _ in range(SHARED_BUCKET_ATTEMPTS):
+            doc = self._load(collection)
+            requests, tokens_left, now = self._refill(doc, time.time())
+            if self._swap(collection, doc, {"requests": requests, "tokens": min(self.tokens_per_minute, tokens_left + tokens), "refilled_at": now}):
+                return
+
+    def pause(self, seconds: float):
+        self._load(self._collection())
+        self._collection().update_one({"_id": self.name}, {"$max": {"paused_until": time.time() + seconds}})
+
+
+class TokenBucketRateLimiter:
+    """
+    Request and token budgets as two continuously refilled buckets, kept in this
+    process or, with `shared`, in Mongo for every process (see MongoBuckets).
+    Callers of one process are served strictly first come, first served: a large
+    request at the head of the queue is not overtaken by smaller ones, so nobody
+    starves. A 429 pauses every caller until the provider's Retry-After has passed.
+    Threads wait on a condition and coroutines on an asyncio event, in the same
+    queue. If Mongo fails, the process falls back to its own buckets.
+    """
+
+    def __init__(self, requests_per_minute: int = LLM_REQUESTS_PER_MINUTE, tokens_per_minute: int = LLM_TOKENS_PER_MINUTE,
+                 shared: bool = LLM_RATE_LIMIT_SHARED, name: str = "llm"):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._local = LocalBuckets(requests_per_minute, tokens_per_minute)
+        self._shared = MongoBuckets(name, requests_per_minute, tokens_per_minute) if shared else None
+        # Refunds and pauses are written to Mongo in the background; callers do not wait for them.
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rate-limit") if shared else None
+        self._queue: deque = deque()
+        self._condition = threading.Condition()
+        # Events of waiting coroutines, with the loop each one belongs to.
+        self._async_waiters: Dict[asyncio.Event, asyncio.AbstractEventLoop] = {}
+        self.waited_seconds = 0.0
+        self.rate_limited = 0
+
+    def _notify_all(self):
+        """Wakes every waiting thread and coroutine; called with the condition held."""
+        self._condition.notify_all()
+        for event, loop in self._async_waiters.items():
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:  # the waiter's loop is closed
+                pass
+
+    def _take(self, tokens: int) -> float:
+        """Reserves a request from the shared buckets if there are any, else from this process's."""
+        if self._shared:
+            # A 429 seen here holds this process back before its pause reaches Mongo.
+            paused = self._local.paused_for()
+            if paused > 0:
+                return paused
+            try:
+                wait = self._shared.take(tokens)
+            except Exception as e:
+                logger.warning(f"Shared LLM rate limit unavailable, using this process's budget: {e}")
+            else:
+                # Other processes' refunds are not signalled here, so look again at least this often.
+                return min(wait, LLM_RATE_LIMIT_POLL_SECONDS)
+        return self._local.take(tokens)
+
+    def _write(self, action: str, *args):
+        """Applies a refund or pause to this process's buckets, and to the shared ones in the background."""
+        getattr(self._local, action)(*args)
+        if self._shared:
+            self._writer.submit(self._shared_write, action, *args)
+
+    def _shared_write(self, action: str, *args):
+        try:
+            getattr(self._shared, action)(*args)
+        except Exception as e:
+            logger.warning(f"Updating the shared LLM rate limit failed: {e}")
+
+    def _budget(self, tokens: int) -> Optional[int]:
+        """Tokens to reserve for a request, or None when no budget is enforced."""
+        if not self.requests_per_minute and not self.tokens_per_minute:
+            return None
+        # A request larger than the whole bucket would otherwise never fit.
+        return min(tokens, self.tokens_per_minute) if self.tokens_per_minute else 0
+
+    def acquire(self, tokens: int) -> int:
+        """
+        Blocks until this caller is first in line and both budgets allow the request.
+        Returns the tokens reserved, to be passed to `settle` once usage is known.
+        """
+        tokens = self._budget(tokens)
+        if tokens is None:
+            return 0
+        ticket = object()
+        started = time.monotonic()
+        with self._condition:
+            self._queue.append(ticket)
+        try:
+            while True:
+                with self._condition:
+                    while self._queue[0] is not ticket:
+                        self._condition.wait()
+                # Only the head of the queue takes budget, so it is safe outside the condition.
+                wait = self._take(tokens)
+                if wait == 0:
+                    break
+                with self._condition:
+                    self._condition.wait(wait)
+        finally:
+            with self._condition:
+                self._queue.remove(ticket)
+                self._notify_all()
+        self.waited_seconds += time.monotonic() - started
+        return tokens
+
+    async def aacquire(self, tokens: int) -> int:
+        """
+        `acquire` for coroutines, waiting on an asyncio event instead of blocking a
+        thread. A cancelled waiter leaves the queue without reserving anything.
+        """
+        tokens = self._budget(tokens)
+        if tokens is None:
+            return 0
+        ticket = asyncio.Event()
+        started = time.monotonic()
+        with self._condition:
+            self._queue.append(ticket)
+            self._async_waiters[ticket] = asyncio.get_running_loop()
+        try:
+            while True:
+                with self._condition:
+                    first = self._queue[0] is ticket
+                    ticket.clear()
+                wait = None
+                if first:
+                    wait = await asyncio.to_thread(self._take, tokens) if self._shared else self._take(tokens)
+                    if wait == 0:
+                        break
+                try:
+                    await asyncio.wait_for(ticket.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self._condition:
+                self._queue.remove(ticket)
+                del self._async_waiters[ticket]
+                self._notify_all()
+        self.waited_seconds += time.monotonic() - started
+        return tokens
+
+    def settle(self, reserved: int, used: Optional[int]):
+        """
+        Returns unused reserved tokens to the bucket, or charges the overrun.
+        `used` of None keeps the reservation; 0 refunds it, e.g. for a failed call.
+        """
+        if not self.tokens_per_minute or used is None:
+            return
+        self._write("give", reserved - used)
+        with self._condition:
+            self._notify_all()
+
+    def pause(self, seconds: float):
+        """Holds every caller back for `seconds`, e.g. after a 429 from the provider."""
+        self._write("pause", seconds)
+        with self._condition:
+            self.rate_limited += 1
+            self._notify_all()
+        logger.warning(f"LLM rate limit hit, pausing all requests for {seconds:.1f}s.")
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """Parses Retry-After seconds ("7") and Groq reset durations ("1m2.5s", "450ms")."""
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(number) * scale[unit] for number, unit in parts)
+
+
+def rate_limit_wait(error: Exception) -> Optional[float]:
+    """Seconds to wait if `error` is a provider 429, None for any other error."""
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    if status != 429:
+        return None
+    headers = getattr(response, "headers", None) or {}
+    for header in ["retry-after", "x-ratelimit-reset-tokens", "x-ratelimit-reset-requests"]:
+        if headers.get(header):
+            seconds = _parse_duration(headers[header])
+            if seconds is not None:
+                return seconds
+    return LLM_RATE_LIMIT_BACKOFF_SECONDS
+
+
+llm_rate_limiter = TokenBucketRateLimiter()
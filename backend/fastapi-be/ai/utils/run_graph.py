@@ -0,0 +1,50 @@
+import asyncio
+from typing import Any, Callable, Dict, Optional
+
+from langchain_core.runnables import RunnableConfig
+
+# on_update(node name, the partial state that node returned)
+UpdateCallback = Callable[[str, Dict[str, Any]], None]
+# on_event(event a node emitted while it was running)
+EventCallback = Callable[[Dict[str, Any]], None]
+
+EVENT_CALLBACK_KEY = "on_event"
+
+
+def node_events(config: Optional[RunnableConfig]) -> EventCallback:
+    """
+    Where a node sends its progress events: the run's `on_event`, or a no-op when
+    nobody listens. Safe to call from the node's own worker threads.
+    """
+    return ((config or {}).get("configurable") or {}).get(EVENT_CALLBACK_KEY) or (lambda event: None)
+
+
+async def run_graph(graph, state: Dict, config: Optional[Dict] = None, on_update: Optional[UpdateCallback] = None,
+                    on_event: Optional[EventCallback] = None) -> Dict:
+    """
+    Runs a compiled graph to completion and returns the final state. With
+    `on_update`, node results are streamed to it as each node finishes, and with
+    `on_event`, the events nodes send through `node_events` as they happen, so
+    callers can report progress while the graph is still running. Both callbacks
+    run on the event loop.
+    """
+    config = dict(config or {})
+    if on_event:
+        # Passed through the config rather than the "custom" stream mode, whose writer
+        # needs the run's context and so fails in async nodes before Python 3.11.
+        loop = asyncio.get_running_loop()
+        configurable = dict(config.get("configurable") or {})
+        configurable[EVENT_CALLBACK_KEY] = lambda event: loop.call_soon_threadsafe(on_event, event)
+        config["configurable"] = configurable
+
+    if on_update is None:
+        return await graph.ainvoke(state, config=config)
+
+    final_state = state
+    async for mode, chunk in graph.astream(state, config=config, stream_mode=["updates", "values"]):
+        if mode == "values":
+            final_state = chunk
+            continue
+        for node, update in chunk.items():
+            on_update(node, update or {})
+    return final_state
@@ -0,0 +1,189 @@
+from typing import Any, List, Optional
+
+from ai.utils.parse_json_response import loads
+from configs.logger import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+# What may follow the opening bracket of a JSON value; anything else is a bracket in prose.
+FIRST_CHARS = {"{": '"}', "[": '[]{"-0123456789tfn'}
+
+
+class StreamingJSONParser:
+    """
+    Incremental parser for streamed LLM output. Reasoning blocks (<think>...</think>)
+    and any prose or markdown around the answer are skipped; once the top-level JSON
+    value opens, each element of a top-level array, or each (key, value) member of a
+    top-level object, is emitted by `feed` as soon as its closing bracket arrives.
+    Only container elements are emitted early; `complete` tells whether the whole
+    top-level value was closed. A bracket in prose before the answer (e.g. "{id}")
+    is dropped as soon as it cannot be JSON, and the search for the answer goes on.
+    """
+
+    def __init__(self):
+        self.root: Optional[str] = None  # "[" or "{" once the answer starts
+        self.complete = False
+        self.items_emitted = 0
+        self._pending = ""
+        self._in_think = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._opened = False
+        self._element: List[str] = []
+        self._answer: List[str] = []
+
+    @property
+    def answer(self) -> str:
+        """The top-level JSON text seen so far, without reasoning or surrounding prose."""
+        return "".join(self._answer)
+
+    @property
+    def cut_off(self) -> bool:
+        """True when the text so far stops inside a reasoning block or inside the JSON value."""
+        return self._in_think or (self.root is not None and not self.complete)
+
+    def feed(self, text: str) -> List[Any]:
+        """Consumes the next piece of output and returns the items it completed."""
+        items = []
+        self._pending += text
+        while self._pending and not self.complete:
+            if self._in_think:
+                end = self._pending.find(THINK_CLOSE)
+                if end < 0:
+                    # Keep a possible partial closing tag for the next piece.
+                    self._pending = self._pending[-(len(THINK_CLOSE) - 1):]
+                    break
+                self._pending = self._pending[end + len(THINK_CLOSE):]
+                self._in_think = False
+            elif self._depth == 0:
+                if not self._seek_root():
+                    break
+            else:
+                consumed = self._scan(self._pending, items)
+                self._pending = self._pending[consumed:]
+        return items
+
+    def _seek_root(self) -> bool:
+        """Skips text before the answer; False when more input is needed."""
+        pending = self._pending
+        for i, ch in enumerate(pending):
+            if ch == "<":
+                rest = pending[i:]
+                if rest.startswith(THINK_OPEN):
+                    self._in_think = True
+                    self._pending = rest[len(THINK_OPEN):]
+                    return True
+                if THINK_OPEN.startswith(rest):
+                    self._pending = rest
+                    return False
+            elif ch in "[{":
+                self.root = ch
+                self._depth = 1
+                self._opened = True
+                self._answer.append(ch)
+                self._pending = pending[i + 1:]
+                return True
+        self._pending = ""
+        return False
+
+    def _drop_root(self):
+        """Forgets a root that turned out to be a bracket in prose."""
+        self.root = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._element.clear()
+        self._answer.clear()
+
+    def _scan(self, text: str, items: List[Any]) -> int:
+        """Scans JSON text inside the root value; returns the characters consumed."""
+        element = self._element
+        in_object = self.root == "{"
+        for i, ch in enumerate(text):
+            if self._opened and not ch.isspace():
+                self._opened = False
+                if ch not in FIRST_CHARS[self.root]:
+                    self._drop_root()
+                    return i
+            if self._in_string:
+                if self._depth > 1 or in_object:
+                    element.append(ch)
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"':
+                self._in_string = True
+            elif ch in "[{":
+                self._depth += 1
+            elif ch in "]}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._answer.append(text[:i + 1])
+                    if not self.items_emitted and not self._parses():
+                        self._drop_root()
+                    else:
+                        self.complete = True
+                    return i + 1
+                if self._depth == 1:
+                    element.append(ch)
+                    self._emit(items)
+                    continue
+            elif ch == "," and self._depth == 1:
+                # Scalar members are left to the final parse.
+                element.clear()
+                continue
+            if self._depth > 1 or in_object:
+                element.append(ch)
+        self._answer.append(text)
+        return len(text)
+
+    def _parses(self) -> bool:
+        try:
+            loads(self.answer)
+            return True
+        except ValueError:
+            return False
+
+    def _emit(self, items: List[Any]):
+        text = "".join(self._element)
+        self._element.clear()
+        try:
+            if self.root == "{":
+                items.extend(loads("{" + text.strip() + "}").items())
+            else:
+                items.append(loads(text))
+            self.items_emitted += 1
+        except ValueError as e:
+            logger.debug(f"Skipping malformed streamed item: {e}")
+
+
+def salvage_json(text: Optional[str], expected_type=(list, dict)):
+    """
+    The complete elements (or members) of the top-level list (or dict) in `text`,
+    even when the answer was cut off; None if nothing of the expected type is there.
+    """
+    if not text:
+        return None
+    parser = StreamingJSONParser()
+    items = parser.feed(text)
+    if parser.root == "[" and isinstance([], expected_type):
+        return items
+    if parser.root == "{" and isinstance({}, expected_type):
+        return dict(items)
+    return None
+
+
+def is_truncated_json(text: Optional[str]) -> bool:
+    """True when `text` stops inside its reasoning or inside the top-level JSON value."""
+    if not text:
+        return False
+    parser = StreamingJSONParser()
+    parser.feed(text)
+    return parser.cut_off
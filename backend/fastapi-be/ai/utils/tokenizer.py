@@ -0,0 +1,153 @@
+import re
+import json
+import math
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, List, Optional
+from dotenv import load_dotenv
+import os
+
+from configs.logger import get_custom_logger
+
+load_dotenv()
+
+logger = get_custom_logger(__name__)
+
+TOKENIZER_ENCODING = os.getenv("TOKENIZER_ENCODING", "cl100k_base")
+# "exact" encodes with tiktoken; "approximate" uses a regex estimate scaled against the encoder.
+TOKENIZER_MODE = os.getenv("TOKENIZER_MODE", "exact")
+TOKENIZER_THREADS = int(os.getenv("TOKENIZER_THREADS", min(8, os.cpu_count() or 1)))
+TOKEN_COUNT_MEMO_SIZE = int(os.getenv("TOKEN_COUNT_MEMO_SIZE", 50000))
+
+# Texts shorter than this are memoized by value; hashing them costs about as much as encoding.
+_HASH_MIN_LENGTH = 256
+# Common words up to this length are one token; longer identifier runs split every few characters.
+_SINGLE_TOKEN_WORD = 7
+_CHARS_PER_WORD_TOKEN = 4
+_APPROX_PATTERN = re.compile(r"\w+|[^\w\s]|\s+")
+_CALIBRATION_SAMPLES = 64
+
+
+class TokenCounter:
+    """
+    Token counting shared by every batcher: one lazily created encoder, batched
+    multi-threaded encoding, and an LRU memo keyed by content hash. Falls back to
+    the approximate estimate when tiktoken or its encoding files are unavailable.
+    """
+
+    def __init__(self, encoding_name: str = TOKENIZER_ENCODING, mode: str = TOKENIZER_MODE, memo_size: int = TOKEN_COUNT_MEMO_SIZE):
+        self.encoding_name = encoding_name
+        self.mode = mode
+        self.memo_size = memo_size
+        self._memo: "OrderedDict[Any, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._encoding = None
+        self._encoding_failed = False
+        self._scale: Optional[float] = None
+
+    def _get_encoding(self):
+        if self._encoding is not None or self._encoding_failed:
+            return self._encoding
+        with self._lock:
+            if self._encoding is None and not self._encoding_failed:
+                try:
+                    import tiktoken
+                    self._encoding = tiktoken.get_encoding(self.encoding_name)
+                except Exception as e:
+                    self._encoding_failed = True
+                    logger.warning(f"tiktoken encoding {self.encoding_name} unavailable, approximating token counts: {e}")
+        return self._encoding
+
+    @staticmethod
+    def _memo_key(text: str):
+        if len(text) < _HASH_MIN_LENGTH:
+            return text
+        return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+    @staticmethod
+    def _raw_estimate(text: str) -> int:
+        count = 0
+        for match in _APPROX_PATTERN.finditer(text):
+            piece = match.group()
+            if piece[0].isspace():
+                # Single spaces merge into the next token; newlines and indentation runs do not.
+                count += piece.count("\n") if "\n" in piece else (1 if len(piece) > 1 else 0)
+            elif piece[0].isalnum() or piece[0] == "_":
+                count += 1 if len(piece) <= _SINGLE_TOKEN_WORD else math.ceil(len(piece) / _CHARS_PER_WORD_TOKEN)
+            else:
+                count += 1
+        return count
+
+    def _calibrate(self, texts: List[str]):
+        """Scales the regex estimate to the real encoder on a sample, when one is available."""
+        encoding = self._get_encoding()
+        self._scale = 1.0
+        sample = [text for text in texts if text][:_CALIBRATION_SAMPLES]
+        if encoding is None or not sample:
+            return
+        exact = sum(len(tokens) for tokens in encoding.encode_batch(sample, num_threads=TOKENIZER_THREADS, disallowed_special=()))
+        estimated = sum(self._raw_estimate(text) for text in sample)
+        if exact and estimated:
+            self._scale = exact / estimated
+
+    def approximate(self, texts: List[str]) -> List[int]:
+        if self._scale is None:
+            self._calibrate(texts)
+        return [max(1, round(self._raw_estimate(text) * self._scale)) if text else 0 for text in texts]
+
+    def _count_uncached(self, texts: List[str]) -> List[int]:
+        encoding = None if self.mode == "approximate" else self._get_encoding()
+        if encoding is None:
+            return self.approximate(texts)
+        if len(texts) == 1:
+            return [len(encoding.encode(texts[0], disallowed_special=()))]
+        encoded = encoding.encode_batch(texts, num_threads=TOKENIZER_THREADS, disallowed_special=())
+        return [len(tokens) for tokens in encoded]
+
+    def count_many(self, texts: List[str]) -> List[int]:
+        """Token counts for many texts; only texts missing from the memo are encoded, in one batch."""
+        keys = [self._memo_key(text) for text in texts]
+        counts: List[Optional[int]] = [None] * len(texts)
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._memo:
+                    self._memo.move_to_end(key)
+                    counts[i] = self._memo[key]
+
+        # Duplicate texts in one call are encoded once.
+        pending = OrderedDict()
+        for i, key in enumerate(keys):
+            if counts[i] is None:
+                pending.setdefault(key, []).append(i)
+        if pending:
+            fresh = self._count_uncached([texts[indexes[0]] for indexes in pending.values()])
+            with self._lock:
+                for (key, indexes), count in zip(pending.items(), fresh):
+                    for i in indexes:
+                        counts[i] = count
+                    self._memo[key] = count
+                while len(self._memo) > self.memo_size:
+                    self._memo.popitem(last=False)
+        return counts
+
+    def count(self, text: str) -> int:
+        return self.count_many([text])[0]
+
+
+token_counter = TokenCounter()
+
+
+def count_tokens(text: str) -> int:
+    """Token count of one text."""
+    return token_counter.count(text or "")
+
+
+def count_tokens_many(texts: List[str]) -> List[int]:
+    """Token counts of many texts, encoded in one multi-threaded batch."""
+    return token_counter.count_many([text or "" for text in texts])
+
+
+def count_json_tokens(values: List[Any]) -> List[int]:
+    """Token counts of each value rendered as JSON, the way prompts embed them."""
+    return count_tokens_many([json.dumps(value, default=str) for value in values])
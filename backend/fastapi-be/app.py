@@ -8,6 +8,9 @@ from db.get_mongo_client import get_mongo_client
 from routes.endpoints import router as EndpointsRouter
 from routes.test_generation import router as TestEndpointRouter
 from routes.api_doc_generation import router as APIDocsRouter
+from routes.jobs import router as JobsRouter
+
+from jobs.job_manager import job_manager
 
 logger = get_custom_logger(__name__)
 
@@ -19,7 +22,12 @@ async def lifespan(app: FastAPI):
         mongo_client.ping()
     except Exception as e:
         logger.error(f"❌ MongoDB ping failed at startup: {e}")
+    try:
+        await job_manager.resume()
+    except Exception as e:
+        logger.error(f"Resuming unfinished jobs failed: {e}")
     yield
+    await job_manager.shutdown()
     mongo_client.close()
     logger.error("FastAPI backend shutting down...")
 
@@ -32,4 +40,5 @@ async def root():
 
 app.include_router(EndpointsRouter, prefix="/api", tags=["GET API Endpoints"])
 app.include_router(TestEndpointRouter, prefix="/api/test")
-app.include_router(APIDocsRouter, prefix="/api/docs", tags=["API Documentation"])
\ No newline at end of file
+app.include_router(APIDocsRouter, prefix="/api/docs", tags=["API Documentation"])
+app.include_router(JobsRouter, prefix="/api", tags=["Jobs"])
\ No newline at end of file
@@ -0,0 +1,94 @@
+"""
+Serial vs process-pool chunking on a generated FastAPI repo.
+
+    python benchmarks/chunker_pool.py [--files 600] [--workers 2 4 8] [--repeat 3]
+
+Both sides do the same work (chunking plus token counting). The pool's fixed
+cost is measured on a one-file repo; with the serial cost per byte it gives the
+break-even size PARALLEL_CHUNKING_MIN_BYTES should sit above on the given cores.
+Run from backend/fastapi-be.
+"""
+import argparse
+import os
+import sys
+import time
+from statistics import median
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai.api_extractor.utils.chunker import _chunk_files, _chunk_in_pool
+from ai.utils.tokenizer import count_tokens_many, token_counter
+
+REPO_PATH = "/bench"
+HANDLER = '''
+@router.{method}("/{resource}/{{item_id}}/{action}")
+async def {action}_{resource}_{index}(item_id: int, payload: {model}, db: Session = Depends(get_db)):
+    """{action} a {resource}."""
+    record = db.query({model}).filter({model}.id == item_id).first()
+    if record is None:
+        raise HTTPException(status_code=404, detail="{resource} not found")
+    for key, value in payload.dict(exclude_unset=True).items():
+        setattr(record, key, value)
+    db.commit()
+    return {{"id": record.id, "status": "{action}d"}}
+'''
+
+
+def make_files(count: int, handlers_per_file: int = 40):
+    files = []
+    for file_index in range(count):
+        resource = f"resource{file_index}"
+        body = "from fastapi import APIRouter, Depends, HTTPException\n\nrouter = APIRouter()\n"
+        for index in range(handlers_per_file):
+            body += HANDLER.format(method=["get", "post", "put", "delete"][index % 4], resource=resource,
+                                   action=["read", "create", "update", "archive"][index % 4], index=index, model="Item")
+        files.append({"path": f"{REPO_PATH}/app/routes/{resource}.py", "content": body, "language": "python", "is_api_file": True})
+    return files
+
+
+def serial(files):
+    # A fresh repo misses the token memo; so do the pool's new worker processes.
+    token_counter._memo.clear()
+    chunks = _chunk_files(files, REPO_PATH)
+    for chunk, tokens in zip(chunks, count_tokens_many([chunk["code"] for chunk in chunks])):
+        chunk["tokens"] = tokens
+    return chunks
+
+
+def timed(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return median(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=600)
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    files = make_files(args.files)
+    size = sum(len(file["content"]) for file in files)
+    print(f"{args.files} files, {size / 1e6:.1f} MB, {os.cpu_count()} CPUs")
+
+    serial_seconds, expected = timed(lambda: serial(files), args.repeat)
+    print(f"serial      {serial_seconds:6.2f} s  ({size / serial_seconds / 1e6:.2f} MB/s, {len(expected)} chunks)")
+
+    for workers in args.workers:
+        # One small file per worker, so every worker is spawned.
+        tiny = make_files(workers, handlers_per_file=1)
+        fixed, _ = timed(lambda: _chunk_in_pool(tiny, REPO_PATH, workers), args.repeat)
+        seconds, chunks = timed(lambda: _chunk_in_pool(files, REPO_PATH, workers), args.repeat)
+        assert chunks == expected, "pool output differs from serial output"
+        # Break-even: fixed + serial * bytes / workers == serial * bytes, on `workers` idle cores.
+        parallel_share = 1 - 1 / min(workers, os.cpu_count() or 1) if (os.cpu_count() or 1) > 1 else 0
+        break_even = f"{fixed / (serial_seconds / size * parallel_share) / 1e6:.1f} MB" if parallel_share else "n/a (1 CPU)"
+        print(f"{workers} workers   {seconds:6.2f} s  (x{serial_seconds / seconds:.2f}, pool start-up {fixed:.2f} s, break-even {break_even})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+import asyncio
+import hashlib
+import json
+import socket
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, Optional, Tuple
+from dotenv import load_dotenv
+import os
+
+from pymongo import ReturnDocument
+
+from db.db_connection import MongoDBClient
+from db.get_mongo_client import get_mongo_client
+
+from ai.api_extractor.graph.graph import BATCH_NODES
+from jobs.pipelines import extract_endpoints, generate_documentation, generate_test_cases
+
+from configs.logger import get_custom_logger
+
+load_dotenv()
+
+logger = get_custom_logger(__name__)
+
+# Graph runs executed at once by this process; further jobs wait in the queue.
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", 2))
+# Minimum time between progress writes to Mongo for a running job.
+JOB_PROGRESS_INTERVAL_SECONDS = float(os.getenv("JOB_PROGRESS_INTERVAL_SECONDS", 2))
+# A job belongs to the API process that claimed it until its lease runs out; heartbeats extend it.
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", 120))
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", 30))
+JOBS_COLLECTION = "jobs"
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+ACTIVE_STATUSES = [QUEUED, RUNNING]
+
+JOB_TYPES = ["extraction", "documentation", "test_generation"]
+EXTRACTION_BATCH_NODES = set(BATCH_NODES.values())
+
+
+def job_key(job_type: str, request: Dict) -> str:
+    """Identifies identical requests so a resubmission joins the job already in flight."""
+    payload = json.dumps({"type": job_type, "request": request}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class JobProgress:
+    """Stage and per-node counts of a running job, fed from the graph's node updates."""
+
+    def __init__(self):
+        self.stage: Optional[str] = None
+        self.nodes: Dict[str, int] = {}
+        self.batches_total: Optional[int] = None
+        self.batches_done = 0
+
+    def record(self, node: str, update: Dict[str, Any]):
+        self.stage = node
+        self.nodes[node] = self.nodes.get(node, 0) + 1
+        if update.get("chunk_batches") is not None:
+            self.batches_total = sum(len(batches) for batches in update["chunk_batches"].values())
+        if node in EXTRACTION_BATCH_NODES:
+            self.batches_done += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"stage": self.stage, "nodes": dict(self.nodes), "batches_total": self.batches_total, "batches_done": self.batches_done}
+
+
+class JobManager:
+    """
+    Runs pipeline jobs in the background with at most JOB_CONCURRENCY graphs at a
+    time. Jobs, their progress and their results are kept in the Mongo `jobs`
+    collection. Each unfinished job is leased to the process running it, which
+    heartbeats the lease; `resume` atomically claims the unfinished jobs whose
+    owner stopped or whose lease ran out, so several API processes can share
+    the collection without running a job twice.
+    """
+
+    def __init__(self, concurrency: int = JOB_CONCURRENCY, owner_id: Optional[str] = None):
+        self.concurrency = concurrency
+        self.owner_id = owner_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._submit_lock: Optional[asyncio.Lock] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._progress: Dict[str, JobProgress] = {}
+
+    @property
+    def mongo_client(self) -> MongoDBClient:
+        return get_mongo_client()
+
+    def _ensure_primitives(self):
+        # Created on first use so they bind to the running event loop.
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._submit_lock = asyncio.Lock()
+        if self._heartbeat is None or self._heartbeat.done():
+            self._heartbeat = asyncio.create_task(self._renew_leases())
+
+    def _lease_until(self) -> datetime:
+        return datetime.now(timezone.utc) + timedelta(seconds=JOB_LEASE_SECONDS)
+
+    async def _update(self, job_id: str, fields: Dict[str, Any]):
+        # Only while the job is still ours: a process that lost the lease must not overwrite the new owner's writes.
+        result = await asyncio.to_thread(self.mongo_client.update_one, JOBS_COLLECTION, {"_id": job_id, "owner": self.owner_id}, fields)
+        if result.matched_count == 0:
+            logger.warning(f"Job {job_id} is no longer owned by {self.owner_id}; update dropped.")
+
+    async def _renew_leases(self):
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+            if not self._tasks:
+                continue
+            try:
+                await asyncio.to_thread(
+                    self.mongo_client.get_collection(JOBS_COLLECTION).update_many,
+                    {"_id": {"$in": list(self._tasks)}, "owner": self.owner_id, "status": {"$in": ACTIVE_STATUSES}},
+                    {"$set": {"lease_until": self._lease_until()}},
+                )
+            except Exception as e:
+                logger.error(f"Renewing job leases failed: {e}")
+
+    def _claim(self) -> Optional[Dict]:
+        """Atomically takes the oldest unfinished job that no live process holds."""
+        return self.mongo_client.get_collection(JOBS_COLLECTION).find_one_and_update(
+            {
+                "status": {"$in": ACTIVE_STATUSES},
+                "_id": {"$nin": list(self._tasks)},
+                "$or": [{"owner": None}, {"lease_until": None}, {"lease_until": {"$lt": datetime.now(timezone.utc)}}],
+            },
+            {"$set": {"owner": self.owner_id, "lease_until": self._lease_until(), "status": QUEUED, "progress": JobProgress().to_dict()}},
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def submit(self, job_type: str, request: Dict) -> Tuple[Dict, bool]:
+        """Queues a job; returns (job, created), reusing an identical queued or running job."""
+        if job_type not in JOB_TYPES:
+            raise ValueError(f"Unknown job type: {job_type}")
+        self._ensure_primitives()
+        key = job_key(job_type, request)
+        async with self._submit_lock:
+            existing = await asyncio.to_thread(self.mongo_client.find_one, JOBS_COLLECTION, {"key": key, "status": {"$in": ACTIVE_STATUSES}})
+            if existing:
+                logger.info(f"Joining {existing['status']} {job_type} job {existing['_id']}.")
+                return existing, False
+
+            job = {
+                "_id": uuid.uuid4().hex,
+                "type": job_type,
+                "key": key,
+                "status": QUEUED,
+                "request": request,
+                "progress": JobProgress().to_dict(),
+                "result_status_code": None,
+                "result": None,
+                "error": None,
+                "owner": self.owner_id,
+                "lease_until": self._lease_until(),
+                "created_at": datetime.now(timezone.utc),
+                "started_at": None,
+                "finished_at": None,
+            }
+            await asyncio.to_thread(self.mongo_client.insert_one, JOBS_COLLECTION, job)
+        logger.info(f"Queued {job_type} job {job['_id']}.")
+        self._start(job)
+        return job, True
+
+    def _start(self, job: Dict):
+        task = asyncio.create_task(self._run(job))
+        self._tasks[job["_id"]] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job["_id"], None))
+
+    async def _execute(self, job: Dict, on_update):
+        request = job["request"]
+        if job["type"] == "extraction":
+            return await extract_endpoints(request, on_update=on_update)
+        if job["type"] == "documentation":
+            return await generate_documentation(request, self.mongo_client, on_update=on_update)
+        return await generate_test_cases(request, self.mongo_client, on_update=on_update)
+
+    async def _run(self, job: Dict):
+        job_id = job["_id"]
+        async with self._semaphore:
+            progress = JobProgress()
+            self._progress[job_id] = progress
+            saving: Optional[asyncio.Task] = None
+            saved_at = time.monotonic()
+
+            def on_update(node: str, update: Dict[str, Any]):
+                nonlocal saving, saved_at
+                progress.record(node, update)
+                if (saving is None or saving.done()) and time.monotonic() - saved_at >= JOB_PROGRESS_INTERVAL_SECONDS:
+                    saved_at = time.monotonic()
+                    saving = asyncio.create_task(self._update(job_id, {"progress": progress.to_dict()}))
+
+            try:
+                await self._update(job_id, {"status": RUNNING, "started_at": datetime.now(timezone.utc), "progress": progress.to_dict()})
+                logger.info(f"Running {job['type']} job {job_id}.")
+                status_code, content = await self._execute(job, on_update)
+                if saving:
+                    await saving
+                await self._update(job_id, {
+                    "status": COMPLETED,
+                    "progress": progress.to_dict(),
+                    "result_status_code": status_code,
+                    "result": content,
+                    "lease_until": None,
+                    "finished_at": datetime.now(timezone.utc),
+                })
+                logger.info(f"Job {job_id} completed with status {status_code}.")
+            except asyncio.CancelledError:
+                # Left as running in Mongo so it is resumed, here or by another process.
+                logger.warning(f"Job {job_id} interrupted.")
+                raise
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {e}")
+                if saving:
+                    await asyncio.gather(saving, return_exceptions=True)
+                await self._update(job_id, {
+                    "status": FAILED,
+                    "progress": progress.to_dict(),
+                    "error": str(e),
+                    "lease_until": None,
+                    "finished_at": datetime.now(timezone.utc),
+                })
+            finally:
+                self._progress.pop(job_id, None)
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        """The stored job, with live progress if it is running in this process."""
+        job = await asyncio.to_thread(self.mongo_client.find_one, JOBS_COLLECTION, {"_id": job_id})
+        if job and job_id in self._progress and job["status"] in ACTIVE_STATUSES:
+            job["progress"] = self._progress[job_id].to_dict()
+        return job
+
+    async def resume(self) -> int:
+        """
+        Claims and restarts unfinished jobs that no live process holds: those left
+        by a process that stopped or whose lease expired. Returns how many.
+        """
+        self._ensure_primitives()
+        resumed = 0
+        while True:
+            job = await asyncio.to_thread(self._claim)
+            if job is None:
+                break
+            self._start(job)
+            resumed += 1
+        if resumed:
+            logger.info(f"Resumed {resumed} unfinished jobs.")
+        return resumed
+
+    async def shutdown(self):
+        """Stops running jobs and gives up their leases, so another process (or the next startup) resumes them."""
+        tasks = list(self._tasks.values())
+        job_ids = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._heartbeat:
+            self._heartbeat.cancel()
+        if job_ids:
+            await asyncio.to_thread(
+                self.mongo_client.get_collection(JOBS_COLLECTION).update_many,
+                {"_id": {"$in": job_ids}, "owner": self.owner_id, "status": {"$in": ACTIVE_STATUSES}},
+                {"$set": {"owner": None, "lease_until": None}},
+            )
+
+
+job_manager = JobManager()
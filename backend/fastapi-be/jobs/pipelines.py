@@ -0,0 +1,104 @@
+from typing import Any, Dict, Optional, Tuple
+
+from db.db_connection import MongoDBClient
+
+from ai.api_extractor.main import invoke_graph
+from ai.test_case_generation.tester import invoke_graph as invoke_test_graph
+from ai.api_doc_builder.doc_generator import invoke_doc_graph
+from ai.utils.run_graph import UpdateCallback, EventCallback
+
+from configs.logger import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+# Each pipeline returns (status code, response content) so the same run can back
+# a synchronous route, a background job or an event stream.
+PipelineResult = Tuple[int, Dict[str, Any]]
+
+
+def _stored_endpoints(mongo_client: MongoDBClient, repo_url: str, branch: Optional[str]):
+    endpoint_details = mongo_client.find_one("endpoints", {"repo_url": repo_url, "branch": branch})
+    return endpoint_details.get("endpoints", []) if endpoint_details else []
+
+
+async def extract_endpoints(data: Dict, on_update: Optional[UpdateCallback] = None,
+                            on_event: Optional[EventCallback] = None) -> PipelineResult:
+    """Runs endpoint extraction for an EndpointRequest payload."""
+    repo_url = data.get("repo_url")
+    branch = data.get("branch", None)
+    logger.info(f"Extracting endpoints from repo: {repo_url} (branch: {branch or 'default'})")
+
+    state = {
+        "repo_url": repo_url
+    }
+    if branch:
+        state["branch"] = branch
+    if data.get("user_id"):
+        state["user_id"] = data["user_id"]
+    if data.get("clone_mode"):
+        state["clone_mode"] = data["clone_mode"]
+    if data.get("sparse_paths"):
+        state["sparse_paths"] = data["sparse_paths"]
+    if data.get("extraction_mode"):
+        state["extraction_mode"] = data["extraction_mode"]
+    if data.get("incremental"):
+        state["incremental"] = True
+    if data.get("bypass_cache"):
+        state["bypass_cache"] = True
+
+    updated_state = await invoke_graph(state, on_update=on_update, on_event=on_event)
+    endpoints = updated_state.get("endpoints", [])
+
+    if not endpoints:
+        logger.info("No endpoints found after graph invocation.")
+        return 404, {"message": "No endpoints found."}
+
+    logger.info(f"Successfully extracted {len(endpoints)} endpoints.")
+    collection_lengths ={}
+    for group_name, group in endpoints.items():
+        collection_lengths[group_name] = len(group)
+    return 200, {"user_id":data.get("user_id"), "repo_url":updated_state.get("repo_url"), "branch":updated_state.get("branch",None),"commit_sha":updated_state.get("commit_sha"),"from_cache":bool(updated_state.get("from_cache")),"partial":bool(updated_state.get("failed_batches")),"failed_batches":updated_state.get("failed_batches") or [],"count":len(endpoints),"group_count":collection_lengths,"endpoints": endpoints}
+
+
+async def generate_documentation(data: Dict, mongo_client: MongoDBClient, on_update: Optional[UpdateCallback] = None,
+                            on_event: Optional[EventCallback] = None) -> PipelineResult:
+    """Generates API documentation snippets for the endpoints saved for an APIDocsRequest payload."""
+    user_id = data.get("user_id")
+    repo_url = data.get("repo_url")
+    branch = data.get("branch", None)
+    logger.info(f"Processing API Docs generation for repo: {repo_url} (branch: {branch or 'default'})")
+
+    endpoints = _stored_endpoints(mongo_client, repo_url, branch)
+    if not endpoints:
+        logger.info("No endpoints found for the provided repository.")
+        return 404, {"message": "No endpoints found."}
+    logger.info(f"Successfully retrieved {len(endpoints)} endpoints for API Docs generation.")
+
+    updated_state = await invoke_doc_graph({"endpoints": endpoints}, on_update=on_update, on_event=on_event)
+    api_docs = updated_state.get("doc_snippets", [])
+
+    if not api_docs:
+        return 400, {"message":"No API documentation formed"}
+    return 200, {"user_id":user_id, "repo_url":repo_url,"branch":branch,"count":len(api_docs),"api_docs": api_docs}
+
+
+async def generate_test_cases(data: Dict, mongo_client: MongoDBClient, on_update: Optional[UpdateCallback] = None,
+                            on_event: Optional[EventCallback] = None) -> PipelineResult:
+    """Generates test cases for the endpoints saved for a TestGenerationRequest payload."""
+    user_id = data.get("user_id")
+    repo_url = data.get("repo_url")
+    branch = data.get("branch", None)
+    logger.info(f"Processing test generation for repo: {repo_url} (branch: {branch or 'default'})")
+
+    endpoints = _stored_endpoints(mongo_client, repo_url, branch)
+    if not endpoints:
+        logger.info("No endpoints found for the provided repository.")
+        return 404, {"message": "No endpoints found."}
+    logger.info(f"Successfully retrieved {len(endpoints)} endpoints for test generation.")
+
+    updated_state = await invoke_test_graph({"endpoints": endpoints}, on_update=on_update, on_event=on_event)
+    test_cases = updated_state.get("test_cases")
+
+    if not test_cases:
+        return 400, {"message":"No test cases formed"}
+    return 200, {"user_id":user_id, "repo_url":repo_url,"branch":branch,"count":len(test_cases),"test_cases": test_cases}
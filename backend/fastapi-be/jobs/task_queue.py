@@ -0,0 +1,209 @@
+import asyncio
+import inspect
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import Any, Callable, Dict, List, Optional
+from dotenv import load_dotenv
+import os
+
+from pymongo import ReturnDocument
+from langchain_core.runnables import RunnableConfig
+
+from db.get_mongo_client import get_mongo_client
+from ai.utils.run_graph import node_events, EVENT_CALLBACK_KEY
+
+from configs.logger import get_custom_logger
+
+load_dotenv()
+
+logger = get_custom_logger(__name__)
+
+# With the queue enabled, batch-level graph work is handed to `worker.py` processes
+# through Mongo; the API process only enqueues tasks and aggregates their results.
+TASK_QUEUE_ENABLED = os.getenv("TASK_QUEUE_ENABLED", "false").lower() == "true"
+# A claimed task belongs to its worker until the lease runs out; heartbeats extend it.
+TASK_LEASE_SECONDS = float(os.getenv("TASK_LEASE_SECONDS", 120))
+TASK_HEARTBEAT_SECONDS = float(os.getenv("TASK_HEARTBEAT_SECONDS", 30))
+# Claims per task, counting those whose worker died or whose run raised.
+TASK_MAX_ATTEMPTS = int(os.getenv("TASK_MAX_ATTEMPTS", 3))
+TASK_POLL_SECONDS = float(os.getenv("TASK_POLL_SECONDS", 1))
+TASKS_COLLECTION = "tasks"
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class TaskFailed(RuntimeError):
+    """A queued task that failed on every attempt it was given."""
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _tasks():
+    return get_mongo_client().get_collection(TASKS_COLLECTION)
+
+
+def enqueue_task(kind: str, payload: Dict[str, Any]) -> str:
+    """Adds a task for the workers that handle `kind`; returns its id."""
+    task_id = uuid.uuid4().hex
+    get_mongo_client().insert_one(TASKS_COLLECTION, {
+        "_id": task_id,
+        "kind": kind,
+        "status": QUEUED,
+        "payload": payload,
+        "attempts": 0,
+        "worker": None,
+        "lease_until": None,
+        "result": None,
+        "error": None,
+        "created_at": _now(),
+        "finished_at": None,
+    })
+    return task_id
+
+
+def claim_task(worker_id: str, kinds: List[str]) -> Optional[Dict]:
+    """
+    Atomically takes the oldest task of `kinds` that is queued or whose lease has
+    expired (its worker stopped heartbeating), leasing it to `worker_id`.
+    """
+    now = _now()
+    return _tasks().find_one_and_update(
+        {
+            "kind": {"$in": kinds},
+            "attempts": {"$lt": TASK_MAX_ATTEMPTS},
+            "$or": [{"status": QUEUED}, {"status": RUNNING, "lease_until": {"$lt": now}}],
+        },
+        {
+            "$set": {"status": RUNNING, "worker": worker_id, "lease_until": now + timedelta(seconds=TASK_LEASE_SECONDS)},
+            "$inc": {"attempts": 1},
+        },
+        sort=[("created_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def heartbeat_task(task_id: str, worker_id: str) -> bool:
+    """Extends the lease; False if the task is no longer this worker's (taken over or cancelled)."""
+    result = _tasks().update_one(
+        {"_id": task_id, "worker": worker_id, "status": RUNNING},
+        {"$set": {"lease_until": _now() + timedelta(seconds=TASK_LEASE_SECONDS)}},
+    )
+    return result.matched_count == 1
+
+
+def complete_task(task_id: str, worker_id: str, result: Any) -> bool:
+    """Stores the result; False (and nothing stored) if the lease was lost to another worker."""
+    updated = _tasks().update_one(
+        {"_id": task_id, "worker": worker_id, "status": RUNNING},
+        {"$set": {"status": COMPLETED, "result": result, "lease_until": None, "finished_at": _now()}},
+    )
+    return updated.matched_count == 1
+
+
+def fail_task(task: Dict, worker_id: str, error: str):
+    """Puts the task back in the queue, or marks it failed once it used all its attempts."""
+    status = QUEUED if task["attempts"] < TASK_MAX_ATTEMPTS else FAILED
+    fields = {"status": status, "worker": None, "lease_until": None, "error": error}
+    if status == FAILED:
+        fields["finished_at"] = _now()
+    _tasks().update_one({"_id": task["_id"], "worker": worker_id, "status": RUNNING}, {"$set": fields})
+
+
+def expire_tasks() -> int:
+    """Fails tasks whose last allowed attempt lost its lease, so their waiters stop waiting."""
+    result = _tasks().update_many(
+        {"status": RUNNING, "lease_until": {"$lt": _now()}, "attempts": {"$gte": TASK_MAX_ATTEMPTS}},
+        {"$set": {"status": FAILED, "error": "Lease expired on the last attempt.", "finished_at": _now()}},
+    )
+    return result.modified_count
+
+
+def cancel_tasks(task_ids: List[str], reason: str) -> int:
+    """
+    Cancels those of `task_ids` that have not finished, so no worker claims them
+    and workers running them stop at their next heartbeat. Returns how many.
+    """
+    result = _tasks().update_many(
+        {"_id": {"$in": list(task_ids)}, "status": {"$in": [QUEUED, RUNNING]}},
+        {"$set": {"status": CANCELLED, "lease_until": None, "error": reason, "finished_at": _now()}},
+    )
+    return result.modified_count
+
+
+async def wait_for_tasks(task_ids: List[str], on_done: Optional[Callable[[Dict], None]] = None) -> Dict[str, Any]:
+    """
+    Polls until every task has finished and returns their results by id;
+    `on_done` sees each finished task as it comes in. Raises TaskFailed for
+    the first task that failed for good. Whatever stops the wait early (that
+    failure, an error in `on_done`, or cancellation) cancels the unfinished tasks,
+    since nobody will use their results.
+    """
+    pending = set(task_ids)
+    results: Dict[str, Any] = {}
+    try:
+        while pending:
+            query = {"_id": {"$in": list(pending)}, "status": {"$in": [COMPLETED, FAILED, CANCELLED]}}
+            for task in await asyncio.to_thread(get_mongo_client().find, TASKS_COLLECTION, query):
+                pending.discard(task["_id"])
+                if task["status"] != COMPLETED:
+                    raise TaskFailed(f"{task['kind']} task {task['_id']} {task['status']} after {task['attempts']} attempts: {task['error']}")
+                results[task["_id"]] = task["result"]
+                if on_done:
+                    on_done(task)
+            if pending:
+                await asyncio.sleep(TASK_POLL_SECONDS)
+    except BaseException as e:
+        if pending:
+            # Synchronous, as a cancelled waiter may not get to await anything else.
+            cancelled = cancel_tasks(list(pending), f"Waiter stopped: {type(e).__name__}: {e}")
+            logger.warning(f"Cancelled {cancelled} of {len(pending)} unfinished sibling tasks.")
+        raise
+    return results
+
+
+async def run_node_for_task(node: Callable, state: Dict) -> Dict[str, Any]:
+    """
+    Runs a graph node outside its graph, as a worker does for a task. The node's
+    progress events are kept with its update so the waiting graph can replay them;
+    per-item events are not, since their batch's event carries the same items.
+    """
+    events: List[Dict] = []
+
+    def record(event: Dict):
+        if event.get("event") != "item":
+            events.append(event)
+
+    config: RunnableConfig = {"configurable": {EVENT_CALLBACK_KEY: record}}
+    if inspect.iscoroutinefunction(node):
+        update = await node(state, config)
+    else:
+        update = await asyncio.to_thread(node, state, config)
+    return {"update": update, "events": events}
+
+
+def replay_task_result(result: Dict[str, Any], config: Optional[RunnableConfig]) -> Dict[str, Any]:
+    """Sends a task's recorded events to this run's listeners and returns the node update."""
+    emit = node_events(config)
+    for event in result.get("events", []):
+        emit(event)
+    return result["update"]
+
+
+def queued_node(kind: str):
+    """
+    A graph node that hands its state to a worker as a `kind` task and returns
+    the update the worker's node produced. It waits for as long as the task is
+    queued, so at least one worker must be running.
+    """
+    async def node(state: Dict, config: RunnableConfig):
+        task_id = await asyncio.to_thread(enqueue_task, kind, dict(state))
+        results = await wait_for_tasks([task_id])
+        return replay_task_result(results[task_id], config)
+
+    return node
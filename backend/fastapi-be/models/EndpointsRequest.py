@@ -1,8 +1,14 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List, Literal
 
 class EndpointRequest(BaseModel):
+    user_id: Optional[str] = None
     repo_url: str
     branch: Optional[str] = None
+    clone_mode: Optional[Literal["full", "shallow", "blobless", "sparse"]] = None
+    sparse_paths: Optional[List[str]] = None
+    extraction_mode: Optional[Literal["llm", "hybrid", "static"]] = None
+    incremental: bool = False
+    bypass_cache: bool = False
 
     
\ No newline at end of file
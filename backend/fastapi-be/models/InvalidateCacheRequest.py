@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+
+class InvalidateCacheRequest(BaseModel):
+    """
+    Represents a request to drop memoized extraction results.
+    """
+    repo_url: str
+    clear_chunk_cache: bool = False
\ No newline at end of file
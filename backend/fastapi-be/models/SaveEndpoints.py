@@ -5,6 +5,7 @@ class SaveEndpoint(BaseModel):
     user_id: Optional[str] = None
     repo_url: str
     branch: Optional[str] = None
+    commit_sha: Optional[str] = None
     count: int
     group_count: Dict[str, int] = {}
     endpoints: Dict[str, List[Dict]] = {}
@@ -4,7 +4,8 @@ from fastapi.responses import JSONResponse
 from db.get_mongo_client import get_mongo_client
 from db.db_connection import MongoDBClient  
 
-from ai.api_doc_builder.doc_generator import invoke_doc_graph
+from jobs.pipelines import generate_documentation
+from routes.sse import event_stream
  
 from models.APIDocsRequest import APIDocsRequest
 from models.APIDocs import APIDocs
@@ -37,38 +38,30 @@ async def test_generation(payload: APIDocsRequest, mongo_client: MongoDBClient =
             logger.warning("Request missing repository URL.")
             raise HTTPException(status_code=400, detail="Repository URL is required.")
 
-    # Simulate some processing logic
     try:
-        # Here you would typically call your test generation logic
-        logger.info(f"Processing API Docs generation for repo: {repo_url} (branch: {branch or 'default'})")
-        endpoint_details = mongo_client.find_one("endpoints", {"repo_url": repo_url, "branch": branch})
-        
-        endpoints = endpoint_details.get("endpoints", []) if endpoint_details else []
-        if not endpoints:
-            logger.info("No endpoints found for the provided repository.")
-            return JSONResponse(status_code=404, content={"message": "No endpoints found."})
-        logger.info(f"Successfully retrieved {len(endpoints)} endpoints for test generation.")
-        
-        # print(f"Endpoints: {endpoints}")
-        
-        state = {
-            "endpoints":endpoints
-        }
-        
-        updated_state = await invoke_doc_graph(state)
-        print(updated_state.keys())
-        
-        api_docs = updated_state.get("doc_snippets", [])
-        
-        if not api_docs:
-            return JSONResponse(status_code=400, content={"message":"No API documentation formed"})
-        # print(len(test_cases))
-        return JSONResponse(status_code=200, content={"user_id":user_id, "repo_url":repo_url,"branch":branch,"count":len(api_docs),"api_docs": api_docs})   
+        status_code, content = await generate_documentation(data, mongo_client)
+        return JSONResponse(status_code=status_code, content=content)
     except Exception as e:
         logger.error(f"Error during test generation: {e}")
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
     
 
+
+@router.post("/generate-documentation/stream", summary="Stream API Documentation", tags=["API Documentation"])
+async def stream_documentation(payload: APIDocsRequest, mongo_client: MongoDBClient = Depends(get_mongo_client)):
+    """
+    Same as /generate-documentation, streamed as Server-Sent Events: a "batch" event
+    with the snippets of each batch as it finishes, then a "result" event.
+    """
+    data = payload.dict()
+    if not data.get("repo_url"):
+        logger.warning("Request missing repository URL.")
+        raise HTTPException(status_code=400, detail="Repository URL is required.")
+
+    logger.info(f"Received request to stream API Docs generation for repo: {data['repo_url']}")
+    return event_stream(lambda on_event: generate_documentation(data, mongo_client, on_event=on_event))
+
+
 @router.post("/save-code-snippets", summary="Save API Documentation", tags=["API Documentation"])
 def save_test_cases(payload: APIDocs, mongo_client: MongoDBClient = Depends(get_mongo_client)):
     """
@@ -6,8 +6,15 @@ from db.db_connection import MongoDBClient
 
 from models.EndpointsRequest import EndpointRequest
 from models.SaveEndpoints import SaveEndpoint
+from models.InvalidateCacheRequest import InvalidateCacheRequest
 
-from ai.api_extractor.main import invoke_graph
+from jobs.pipelines import extract_endpoints
+from routes.sse import event_stream
+from ai.api_extractor.utils.result_cache import invalidate_results
+from ai.api_extractor.utils.extraction_cache import extraction_cache
+from ai.utils.model_router import model_router
+from ai.utils.llm_response_cache import llm_response_cache
+from ai.utils.rate_limiter import llm_rate_limiter
 
 from configs.logger import get_custom_logger
 
@@ -35,25 +42,9 @@ async def get_api_endpoints(payload: EndpointRequest):
 
     logger.info(f"Received request to extract endpoints from repo: {repo_url} (branch: {branch or 'default'})")
 
-    state = {
-        "repo_url": repo_url
-    }
-    if branch:
-        state["branch"] = branch
-
     try:
-        updated_state = await invoke_graph(state)
-        endpoints = updated_state.get("endpoints", [])
-
-        if not endpoints:
-            logger.info("No endpoints found after graph invocation.")
-            return JSONResponse(status_code=404, content={"message": "No endpoints found."})
-
-        logger.info(f"Successfully extracted {len(endpoints)} endpoints.")
-        collection_lengths ={}
-        for group_name, group in endpoints.items():
-            collection_lengths[group_name] = len(group)
-        return JSONResponse(status_code=200, content={"user_id":None, "repo_url":updated_state.get("repo_url"), "branch":updated_state.get("branch",None) ,"count":len(endpoints),"group_count":collection_lengths,"endpoints": endpoints})
+        status_code, content = await extract_endpoints(data)
+        return JSONResponse(status_code=status_code, content=content)
 
     except Exception as e:
         logger.error(f"Error processing /get-endpoints: {e}")
@@ -61,6 +52,56 @@ async def get_api_endpoints(payload: EndpointRequest):
 
 
 
+@router.post("/get-endpoints/stream", summary="Stream API Endpoints", tags=["API"])
+async def stream_api_endpoints(payload: EndpointRequest):
+    """
+    Same as /get-endpoints, streamed as Server-Sent Events: a "batch" event with the
+    endpoints of each extraction batch as it finishes, then a "result" event.
+    """
+    data = payload.dict()
+    if not data.get("repo_url"):
+        logger.warning("Request missing repository URL.")
+        raise HTTPException(status_code=400, detail="Repository URL is required.")
+
+    logger.info(f"Received request to stream endpoints from repo: {data['repo_url']} (branch: {data.get('branch') or 'default'})")
+    return event_stream(lambda on_event: extract_endpoints(data, on_event=on_event))
+
+
+@router.post("/invalidate-endpoints-cache", summary="Invalidate Cached Extractions", tags=["API"])
+def invalidate_endpoints_cache(payload: InvalidateCacheRequest):
+    """
+    Drop memoized extraction results for a repository so the next /get-endpoints call reruns the graph.
+    Optionally clears the per-chunk extraction cache as well (shared by all repositories).
+    """
+    data = payload.dict()
+    logger.info(f"Invalidating cached extractions for repo: {data['repo_url']}")
+
+    try:
+        invalidate_results(data["repo_url"])
+        if data.get("clear_chunk_cache"):
+            extraction_cache.clear()
+        return JSONResponse(status_code=200, content={"message": "Extraction cache invalidated.", "repo_url": data["repo_url"]})
+    except Exception as e:
+        logger.error(f"Error invalidating extraction cache: {e}")
+        raise HTTPException(status_code=500, detail=f"Error invalidating cache: {str(e)}")
+
+
+@router.get("/llm-stats", summary="LLM Usage Statistics", tags=["API"])
+def get_llm_stats():
+    """
+    Per-model call counts, latency and success rate, plus LLM response cache
+    and rate limiter counters for this process.
+    """
+    return {
+        "models": model_router.stats(),
+        "response_cache": llm_response_cache.stats(),
+        "rate_limiter": {
+            "rate_limited": llm_rate_limiter.rate_limited,
+            "waited_seconds": round(llm_rate_limiter.waited_seconds, 2)
+        }
+    }
+
+
 @router.post("/save-endpoints", summary="Save API Endpoints", tags=["API"])
 def save_api_endpoints(payload: SaveEndpoint, mongo_client: MongoDBClient = Depends(get_mongo_client)):
     """
@@ -0,0 +1,81 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+
+from models.EndpointsRequest import EndpointRequest
+from models.APIDocsRequest import APIDocsRequest
+from models.TestGenerationRequest import TestGenerationRequest
+
+from jobs.job_manager import job_manager, COMPLETED, FAILED
+
+from configs.logger import get_custom_logger
+
+logger = get_custom_logger(__name__)
+router = APIRouter()
+
+
+def _job_summary(job: dict) -> dict:
+    """Job fields returned to clients; the result has its own route."""
+    summary = {"job_id": job["_id"]}
+    for field in ["type", "status", "progress", "result_status_code", "error"]:
+        summary[field] = job.get(field)
+    for field in ["created_at", "started_at", "finished_at"]:
+        summary[field] = job[field].isoformat() if job.get(field) else None
+    return summary
+
+
+async def _submit(job_type: str, data: dict) -> JSONResponse:
+    if not data.get("repo_url"):
+        logger.warning("Request missing repository URL.")
+        raise HTTPException(status_code=400, detail="Repository URL is required.")
+    try:
+        job, created = await job_manager.submit(job_type, data)
+    except Exception as e:
+        logger.error(f"Error queuing {job_type} job: {e}")
+        raise HTTPException(status_code=500, detail=f"Error queuing job: {str(e)}")
+    return JSONResponse(status_code=202, content={**_job_summary(job), "created": created})
+
+
+@router.post("/jobs/extraction", summary="Queue Endpoint Extraction", tags=["Jobs"])
+async def queue_extraction(payload: EndpointRequest):
+    """
+    Queue endpoint extraction for a repository and return the job id right away.
+    Poll /jobs/{job_id} for progress and /jobs/{job_id}/result for the endpoints.
+    """
+    return await _submit("extraction", payload.dict())
+
+
+@router.post("/jobs/documentation", summary="Queue API Documentation", tags=["Jobs"])
+async def queue_documentation(payload: APIDocsRequest):
+    """Queue API documentation generation for the saved endpoints of a repository."""
+    return await _submit("documentation", payload.dict())
+
+
+@router.post("/jobs/test-generation", summary="Queue Test Generation", tags=["Jobs"])
+async def queue_test_generation(payload: TestGenerationRequest):
+    """Queue test case generation for the saved endpoints of a repository."""
+    return await _submit("test_generation", payload.dict())
+
+
+@router.get("/jobs/{job_id}", summary="Job Status", tags=["Jobs"])
+async def get_job(job_id: str):
+    """Status, per-stage progress and timestamps of a job."""
+    job = await job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return _job_summary(job)
+
+
+@router.get("/jobs/{job_id}/result", summary="Job Result", tags=["Jobs"])
+async def get_job_result(job_id: str):
+    """
+    The response the synchronous route would have returned, with its status code.
+    202 while the job is queued or running, 500 if it failed.
+    """
+    job = await job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    if job["status"] == COMPLETED:
+        return JSONResponse(status_code=job["result_status_code"], content=job["result"])
+    if job["status"] == FAILED:
+        raise HTTPException(status_code=500, detail=f"Error processing request: {job['error']}")
+    return JSONResponse(status_code=202, content=_job_summary(job))
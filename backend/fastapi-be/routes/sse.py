@@ -0,0 +1,50 @@
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict
+
+from fastapi.responses import StreamingResponse
+
+from ai.utils.run_graph import EventCallback
+from jobs.pipelines import PipelineResult
+
+from configs.logger import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def event_stream(run: Callable[[EventCallback], Awaitable[PipelineResult]]) -> StreamingResponse:
+    """
+    Runs a pipeline and streams the events its graph emits as Server-Sent Events:
+    one per finished batch or collection, with running totals, and an "item" event
+    per endpoint or test case as the model produces it, then a "result"
+    event carrying the status code and content the synchronous route returns,
+    or an "error" event. A client that disconnects cancels the run.
+    """
+    async def events():
+        queue: asyncio.Queue = asyncio.Queue()
+        task = asyncio.create_task(run(queue.put_nowait))
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+        totals = {"batches_done": 0, "items_done": 0}
+        try:
+            while (event := await queue.get()) is not None:
+                if event.get("event") == "item":
+                    # Provisional: the batch event that follows carries the final items.
+                    yield _sse("item", event)
+                    continue
+                totals["batches_done"] += 1
+                totals["items_done"] += event.get("count", 0)
+                yield _sse(event.get("event", "batch"), {**event, **totals})
+            status_code, content = task.result()
+            yield _sse("result", {"status_code": status_code, **totals, **content})
+        except Exception as e:
+            logger.error(f"Error while streaming pipeline events: {e}")
+            yield _sse("error", {"message": f"Error processing request: {str(e)}", **totals})
+        finally:
+            if not task.done():
+                task.cancel()
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
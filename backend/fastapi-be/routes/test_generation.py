@@ -4,7 +4,8 @@ from fastapi.responses import JSONResponse
 from db.get_mongo_client import get_mongo_client
 from db.db_connection import MongoDBClient  
 
-from ai.test_case_generation.tester import invoke_graph as invoke_test_graph
+from jobs.pipelines import generate_test_cases
+from routes.sse import event_stream
 
 from models.TestGenerationRequest import TestGenerationRequest
 from models.TestCase import TestCase
@@ -37,41 +38,30 @@ async def test_generation(payload: TestGenerationRequest, mongo_client: MongoDBC
             logger.warning("Request missing repository URL.")
             raise HTTPException(status_code=400, detail="Repository URL is required.")
 
-    # Simulate some processing logic
     try:
-        # Here you would typically call your test generation logic
-        logger.info(f"Processing test generation for repo: {repo_url} (branch: {branch or 'default'})")
-        endpoint_details = mongo_client.find_one("endpoints", {"repo_url": repo_url, "branch": branch})
-        
-        endpoints = endpoint_details.get("endpoints", []) if endpoint_details else []
-        if not endpoints:
-            logger.info("No endpoints found for the provided repository.")
-            return JSONResponse(status_code=404, content={"message": "No endpoints found."})
-        logger.info(f"Successfully retrieved {len(endpoints)} endpoints for test generation.")
-        
-        state = {
-            "endpoints":endpoints
-        }
-        
-        updated_state = await invoke_test_graph(state)
-        print(updated_state.keys())
-        # batches = updated_state.get("batched_endpoints",[])
-        test_cases = updated_state.get("test_cases")
-        
-        # if not batches:
-        #     return JSONResponse(status_code=400, content={"message":"No test cases formed"})
-        # print(len(batches))
-        # return JSONResponse(status_code=200, content={"user_id":user_id, "repo_url":repo_url,"branch":branch,"count":len(batches),"test_cases": batches})   
-        
-        if not test_cases:
-            return JSONResponse(status_code=400, content={"message":"No test cases formed"})
-        print(len(test_cases))
-        return JSONResponse(status_code=200, content={"user_id":user_id, "repo_url":repo_url,"branch":branch,"count":len(test_cases),"test_cases": test_cases})   
+        status_code, content = await generate_test_cases(data, mongo_client)
+        return JSONResponse(status_code=status_code, content=content)
     except Exception as e:
         logger.error(f"Error during test generation: {e}")
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
     
 
+
+@router.post("/test-generation/stream", summary="Stream Test Generation", tags=["Test Generation"])
+async def stream_test_generation(payload: TestGenerationRequest, mongo_client: MongoDBClient = Depends(get_mongo_client)):
+    """
+    Same as /test-generation, streamed as Server-Sent Events: a "collection" event with
+    the test cases of each collection as it finishes, then a "result" event.
+    """
+    data = payload.dict()
+    if not data.get("repo_url"):
+        logger.warning("Request missing repository URL.")
+        raise HTTPException(status_code=400, detail="Repository URL is required.")
+
+    logger.info(f"Received request to stream test generation for repo: {data['repo_url']}")
+    return event_stream(lambda on_event: generate_test_cases(data, mongo_client, on_event=on_event))
+
+
 @router.post("/save-test-cases", summary="Save Generated Test Cases", tags=["Test Generation"])
 def save_test_cases(payload: TestCase, mongo_client: MongoDBClient = Depends(get_mongo_client)):
     """
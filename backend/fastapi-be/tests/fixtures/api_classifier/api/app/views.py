@@ -0,0 +1,8 @@
+from flask import Blueprint, jsonify
+
+bp = Blueprint("users", __name__)
+
+
+@bp.route("/users", methods=["GET"])
+def list_users():
+    return jsonify([])
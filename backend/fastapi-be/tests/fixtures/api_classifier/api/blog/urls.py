@@ -0,0 +1,8 @@
+from django.urls import path
+
+from . import views
+
+urlpatterns = [
+    path("posts/", views.post_list),
+    path("posts/<int:pk>/", views.post_detail),
+]
@@ -0,0 +1,7 @@
+import type { Server } from './types';
+
+export function registerOrders(server: Server) {
+  server.post('/orders', async (request, reply) => {
+    return reply.code(201).send(request.body);
+  });
+}
@@ -0,0 +1,8 @@
+from aiohttp import web
+
+routes = web.RouteTableDef()
+
+
+@routes.get("/status")
+async def status(request):
+    return web.json_response({"status": "up"})
@@ -0,0 +1,8 @@
+import fastapi
+
+app = fastapi.FastAPI()
+
+
+@app.get("/health")
+def health():
+    return {"ok": True}
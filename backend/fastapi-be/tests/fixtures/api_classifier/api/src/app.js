@@ -0,0 +1,7 @@
+const express = require('express');
+
+const app = express();
+
+app.get('/ping', (req, res) => res.json({ pong: true }));
+
+module.exports = app;
@@ -0,0 +1,5 @@
+const users = require('./routes/users');
+
+module.exports = (app) => {
+  app.use('/api/users', users);
+};
@@ -0,0 +1,7 @@
+const fastify = require('fastify')({ logger: true });
+
+fastify.route({
+  method: 'GET',
+  url: '/plugins',
+  handler: async () => [],
+});
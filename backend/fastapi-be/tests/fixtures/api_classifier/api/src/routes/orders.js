@@ -0,0 +1,9 @@
+const { Router } = require('express');
+
+const router = Router();
+
+router.post('/', async (req, res) => {
+  res.status(201).json(req.body);
+});
+
+module.exports = router;
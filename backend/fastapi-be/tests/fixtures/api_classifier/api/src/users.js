@@ -0,0 +1,5 @@
+// Route module mounted with require('./users')(app).
+module.exports = function (app) {
+  app.get('/users', (req, res) => res.json([]));
+  app.delete('/users/:id', (req, res) => res.sendStatus(204));
+};
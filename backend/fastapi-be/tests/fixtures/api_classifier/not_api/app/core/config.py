@@ -0,0 +1,4 @@
+import os
+
+API_PREFIX = os.getenv("API_PREFIX", "/api")
+DEBUG = os.getenv("DEBUG", "false") == "true"
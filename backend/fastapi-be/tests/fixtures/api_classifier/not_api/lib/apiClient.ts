@@ -0,0 +1,5 @@
+import ky from 'ky';
+
+const api = ky.create({ prefixUrl: '/v1' });
+
+export const getOrders = () => api.get('/orders').json();
@@ -0,0 +1,6 @@
+const axios = require('axios');
+
+export async function loadUsers() {
+  const { data } = await axios.get('/users');
+  return data;
+}
@@ -0,0 +1,4 @@
+export function formatPath(route: string): string {
+  // Normalizes a route like '/users/' before it is passed to app.get elsewhere.
+  return route.replace(/\/+$/, '');
+}
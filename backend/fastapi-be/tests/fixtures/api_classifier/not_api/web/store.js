@@ -0,0 +1,6 @@
+export const cache = new Map();
+
+export function remember(key, value) {
+  cache.set(key, value);
+  return cache.get(key);
+}
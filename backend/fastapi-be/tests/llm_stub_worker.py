@@ -0,0 +1,55 @@
+"""
+`worker.py` with a stand-in for the LLM provider, for tests that run real worker
+processes. Every call takes LLM_STUB_LATENCY_SECONDS, answers with an empty
+endpoint list and is recorded in the `llm_stub_calls` collection, so a test can
+check how calls were spread over time and processes. A started process announces
+itself in `llm_stub_workers`.
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+import worker
+from ai.utils import get_llm_response
+from db.get_mongo_client import get_mongo_client
+
+LLM_STUB_LATENCY_SECONDS = float(os.getenv("LLM_STUB_LATENCY_SECONDS", 0))
+CALLS_COLLECTION = "llm_stub_calls"
+WORKERS_COLLECTION = "llm_stub_workers"
+ANSWER = "[]"
+
+
+class StubChatModel:
+    """Answers like a chat model client, without a provider."""
+
+    def _answer(self, message_class):
+        get_mongo_client().insert_one(CALLS_COLLECTION, {"at": time.time(), "pid": os.getpid()})
+        usage = {"input_tokens": 100, "output_tokens": 1, "total_tokens": 101}
+        return message_class(content=ANSWER, usage_metadata=usage, response_metadata={"finish_reason": "stop"})
+
+    def invoke(self, messages):
+        time.sleep(LLM_STUB_LATENCY_SECONDS)
+        return self._answer(AIMessage)
+
+    async def ainvoke(self, messages):
+        await asyncio.sleep(LLM_STUB_LATENCY_SECONDS)
+        return await asyncio.to_thread(self._answer, AIMessage)
+
+    def stream(self, messages):
+        yield self.invoke(messages)
+
+    async def astream(self, messages):
+        await asyncio.sleep(LLM_STUB_LATENCY_SECONDS)
+        yield await asyncio.to_thread(self._answer, AIMessageChunk)
+
+
+if __name__ == "__main__":
+    stub = StubChatModel()
+    get_llm_response.get_llm = lambda model=None: stub
+    get_mongo_client().insert_one(WORKERS_COLLECTION, {"pid": os.getpid()})
+    worker.main()
@@ -0,0 +1,51 @@
+import os
+import unittest
+
+from ai.api_extractor.utils.api_classifier import classify_api_file
+from ai.api_extractor.utils.file_loader import BACKEND_EXTS
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "api_classifier")
+
+
+def labelled_fixtures():
+    """(repo-relative path, content, is an API file) for every fixture file."""
+    for label in ["api", "not_api"]:
+        root = os.path.join(FIXTURES, label)
+        for directory, _, files in os.walk(root):
+            for name in sorted(files):
+                # Only what the loader would read (not README.md or compiled caches).
+                if not name.endswith(tuple(BACKEND_EXTS)):
+                    continue
+                path = os.path.join(directory, name)
+                with open(path, "rb") as f:
+                    yield os.path.relpath(path, root).replace(os.sep, "/"), f.read(), label == "api"
+
+
+class ClassifyApiFileTest(unittest.TestCase):
+    """The API file classifier against the labelled fixtures."""
+
+    def test_fixtures(self):
+        for relative_path, content, expected in labelled_fixtures():
+            with self.subTest(path=relative_path, expected=expected):
+                self.assertEqual(classify_api_file(content, relative_path), expected)
+
+    def test_precision_and_recall(self):
+        results = [(classify_api_file(content, path), expected) for path, content, expected in labelled_fixtures()]
+        true_positives = sum(1 for predicted, expected in results if predicted and expected)
+        precision = true_positives / max(1, sum(1 for predicted, _ in results if predicted))
+        recall = true_positives / max(1, sum(1 for _, expected in results if expected))
+        self.assertEqual((precision, recall), (1.0, 1.0))
+
+    def test_server_call_counts_outside_api_paths(self):
+        self.assertTrue(classify_api_file(b"module.exports = function(app){ app.get('/users', list) }", "src/users.js"))
+        self.assertTrue(classify_api_file(b"server.post('/orders', create)", "lib/orders.ts"))
+
+    def test_client_call_needs_a_framework_import_or_api_path(self):
+        call = b"axios.get('/users')"
+        self.assertFalse(classify_api_file(call, "src/users.js"))
+        self.assertTrue(classify_api_file(call, "src/routes/users.js"))
+        self.assertTrue(classify_api_file(b"const express = require('express');\n" + call, "src/users.js"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import re
+import unittest
+from unittest import mock
+
+from requests.exceptions import RequestException
+
+from ai.api_doc_builder.agents import DocGenNode
+
+EXAMPLE_ID = "f9372bb1-47ab-4a1e-8d91-abc123def456"  # the ID in the prompt's example
+UUID = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+
+
+class DocGeneratorNodeTest(unittest.TestCase):
+    """Snippet generation for one batch of four endpoints, against a scripted LLM."""
+
+    def setUp(self):
+        self.calls = []
+        self.events = []
+        for patch in (
+            mock.patch.object(DocGenNode, "get_llm_json_response", self.answer),
+            mock.patch.object(DocGenNode, "node_events", lambda config: self.events.append),
+            mock.patch.object(DocGenNode.request_snippets.retry, "sleep", lambda seconds: None),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.reply = lambda ids: {endpoint_id: {"bash": "curl", "python": "requests"} for endpoint_id in ids}
+
+    def answer(self, prompt, system_prompt, **kwargs):
+        ids = [endpoint_id for endpoint_id in dict.fromkeys(UUID.findall(prompt)) if endpoint_id != EXAMPLE_ID]
+        self.calls.append(len(ids))
+        return self.reply(ids)
+
+    def run_node(self):
+        state = {"batched_endpoints": [{"Users": [{"path": f"/users/{n}", "method": "GET"} for n in range(4)]}]}
+        return DocGenNode.DocGeneratorNode(state, {"configurable": {}})
+
+    def test_transient_error_is_retried(self):
+        answer = self.reply
+
+        def flaky(ids):
+            if len(self.calls) == 1:
+                raise RequestException("connection reset")
+            return answer(ids)
+        self.reply = flaky
+
+        self.assertEqual(self.run_node()["metrics"]["total_snippets"], 4)
+        self.assertEqual(self.calls, [4, 4])
+
+    def test_empty_answer_is_bisected(self):
+        answer = self.reply
+        self.reply = lambda ids: answer(ids) if len(ids) == 1 else {}
+
+        self.assertEqual(self.run_node()["metrics"]["total_snippets"], 4)
+        self.assertEqual(self.calls, [4, 2, 1, 1, 2, 1, 1])
+
+    def test_outage_leaves_the_batch_empty(self):
+        def down(ids):
+            raise RequestException("connection refused")
+        self.reply = down
+
+        state = self.run_node()
+        self.assertEqual(state["metrics"]["total_snippets"], 0)
+        self.assertEqual(self.calls, [4, 4, 4])
+        self.assertEqual([event["count"] for event in self.events], [0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+
+from ai.api_extractor.utils.file_loader import _is_generated_content, _iter_candidate_files
+
+
+class GeneratedContentTest(unittest.TestCase):
+    """Generated-code banners are only recognized in the standard forms, in the leading comments."""
+
+    def test_standard_banners(self):
+        for content in [
+            "# @generated by protoc-gen-custom\nx = 1\n",
+            "// Code generated by sqlc. DO NOT EDIT.\nexport const a = 1;\n",
+            "#!/usr/bin/env python\n# -*- coding: utf-8 -*-\n\n# Code generated by tool; DO NOT EDIT.\nx = 1\n",
+            "/**\n * This file is @generated by relay-compiler\n */\nmodule.exports = {};\n",
+        ]:
+            with self.subTest(content=content):
+                self.assertTrue(_is_generated_content(content))
+
+    def test_hand_written_files_mentioning_generation(self):
+        for content in [
+            '"""Users API, initially generated by the CLI."""\nfrom fastapi import APIRouter\n',
+            "# Order routes. Do not edit the prefix below.\nrouter = APIRouter(prefix='/orders')\n",
+            "// auto-generated client docs live in docs/\napp.get('/a', handler);\n",
+            "import os\n# @generated\n",
+        ]:
+            with self.subTest(content=content):
+                self.assertFalse(_is_generated_content(content))
+
+
+
+class IncludePathsTest(unittest.TestCase):
+    """Loading only `include_paths` (incremental runs) filters like the full walk."""
+
+    FILES = {
+        ".gitignore": "generated/\n*.local.py\n",
+        "app/main.py": "",
+        "app/settings.local.py": "",
+        "app/.gitignore": "legacy_*.py\n!legacy_keep.py\n",
+        "app/legacy_routes.py": "",
+        "app/legacy_keep.py": "",
+        "generated/api.py": "",
+        "generated/keep.py": "",
+        "node_modules/pkg/index.js": "",
+        "web/server.js": "",
+    }
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.repo = directory.name
+        for relative_path, content in self.FILES.items():
+            path = os.path.join(self.repo, relative_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(content)
+
+    def relative(self, paths):
+        return sorted(os.path.relpath(path, self.repo).replace(os.sep, "/") for path in paths)
+
+    def test_matches_the_full_walk(self):
+        walked = self.relative(_iter_candidate_files(self.repo))
+        self.assertEqual(walked, ["app/legacy_keep.py", "app/main.py", "web/server.js"])
+        included = self.relative(_iter_candidate_files(self.repo, include_paths=[path for path in self.FILES if path != ".gitignore"]))
+        self.assertEqual(included, walked)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import asyncio
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+try:
+    import mongomock
+except ImportError:  # the managers need a Mongo they can share
+    mongomock = None
+
+# Normally set in .env; required to import the pipelines the manager runs.
+os.environ.setdefault("MAX_TOKENS_PER_TEST_BATCH", "3000")
+
+from jobs import job_manager
+from db import get_mongo_client as mongo
+from db.db_connection import MongoDBClient
+
+
+@unittest.skipUnless(mongomock, "mongomock is not installed")
+class TwoManagersTest(unittest.IsolatedAsyncioTestCase):
+    """Two API processes' JobManagers sharing one jobs collection."""
+
+    def setUp(self):
+        client = MongoDBClient.__new__(MongoDBClient)
+        client.client = mongomock.MongoClient()
+        client.db = client.client["test"]
+        self.jobs = client.db[job_manager.JOBS_COLLECTION]
+        self.runs = []
+        self.release = asyncio.Event()
+        patches = [
+            mock.patch.object(mongo, "mogno_client", client),
+            mock.patch.object(job_manager, "JOB_LEASE_SECONDS", 0.3),
+            mock.patch.object(job_manager, "JOB_HEARTBEAT_SECONDS", 0.05),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def manager(self, owner_id: str) -> job_manager.JobManager:
+        manager = job_manager.JobManager(concurrency=4, owner_id=owner_id)
+
+        async def execute(job, on_update):
+            self.runs.append((owner_id, job["_id"]))
+            await self.release.wait()
+            return 200, {"owner": owner_id}
+        manager._execute = execute
+        self.addAsyncCleanup(manager.shutdown)
+        return manager
+
+    def insert(self, job_id: str, owner, lease_until):
+        self.jobs.insert_one({
+            "_id": job_id, "type": "extraction", "key": job_id, "status": job_manager.RUNNING, "request": {},
+            "owner": owner, "lease_until": lease_until, "created_at": datetime.now(timezone.utc),
+        })
+
+    async def test_each_unfinished_job_is_resumed_once(self):
+        expired = datetime.now(timezone.utc) - timedelta(seconds=5)
+        for job_id in ["a", "b", "c"]:
+            self.insert(job_id, "gone", expired)
+        self.insert("d", None, None)  # released on a clean shutdown
+
+        counts = await asyncio.gather(self.manager("first").resume(), self.manager("second").resume())
+        self.assertEqual(sum(counts), 4)
+        await asyncio.sleep(0.1)
+        self.assertEqual(sorted(job_id for _, job_id in self.runs), ["a", "b", "c", "d"])
+
+        self.release.set()
+        await asyncio.sleep(0.1)
+        for job in self.jobs.find():
+            self.assertEqual(job["status"], job_manager.COMPLETED)
+            self.assertEqual(job["result"], {"owner": job["owner"]})
+
+    async def test_live_lease_is_not_taken_over(self):
+        first = self.manager("first")
+        job, _ = await first.submit("extraction", {"repo": "x"})
+        await asyncio.sleep(1)  # several lease lengths, kept alive by heartbeats
+
+        self.assertEqual(await self.manager("second").resume(), 0)
+        self.release.set()
+        await asyncio.sleep(0.1)
+        stored = self.jobs.find_one({"_id": job["_id"]})
+        self.assertEqual((stored["status"], stored["owner"]), (job_manager.COMPLETED, "first"))
+        self.assertEqual(self.runs, [("first", job["_id"])])
+
+    async def test_shutdown_releases_jobs_for_another_process(self):
+        first = self.manager("first")
+        job, _ = await first.submit("extraction", {"repo": "x"})
+        await asyncio.sleep(0.1)
+        await first.shutdown()
+
+        self.assertEqual(await self.manager("second").resume(), 1)
+        self.release.set()
+        await asyncio.sleep(0.1)
+        stored = self.jobs.find_one({"_id": job["_id"]})
+        self.assertEqual((stored["status"], stored["owner"]), (job_manager.COMPLETED, "second"))
+
+
+if __name__ == "__main__":
+    unittest.main()
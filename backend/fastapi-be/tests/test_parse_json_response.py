@@ -0,0 +1,39 @@
+import unittest
+
+from ai.utils.parse_json_response import parse_json_response, scan_json_values
+
+
+class ParseJSONResponseTest(unittest.TestCase):
+
+    def test_stray_bracket_in_prose_before_answer(self):
+        self.assertEqual(parse_json_response('Here is the list [as requested:\n[{"a": 1}]'), [{"a": 1}])
+
+    def test_stray_brace_between_reasoning_and_answer(self):
+        self.assertEqual(parse_json_response('<think>{x</think> see {oops} then {"b": [1, 2]}'), {"b": [1, 2]})
+
+    def test_cut_off_answer_is_not_parsed_as_its_fragments(self):
+        with self.assertRaisesRegex(ValueError, "truncated"):
+            parse_json_response('[{"a": 1}, {"b": 2}, {"c"')
+        scan = scan_json_values('[{"a": 1}, {"b": "unterminated')
+        self.assertEqual(scan.values, [])
+        self.assertEqual(scan.failures[0][2], "truncated")
+
+    def test_values_nested_in_a_stray_span_are_kept(self):
+        scan = scan_json_values('[{"a": 1}, {"b": [2]}, oops] [3]')
+        self.assertEqual(scan.values, [{"a": 1}, {"b": [2]}, [3]])
+        self.assertEqual(len(scan.failures), 1)
+
+    def test_nested_stray_brackets_are_decoded_once(self):
+        # Restarting inside each bracket would decode the long prefix once per bracket.
+        scan = scan_json_values("Plan " + "[" * 200 + "1, " * 2000 + 'x\n[{"a": 1}]')
+        self.assertEqual(scan.values, [[{"a": 1}]])
+        self.assertEqual(len(scan.failures), 1)
+
+    def test_several_objects_are_merged_or_listed(self):
+        text = '{"a": 1}\n{"b": 2}'
+        self.assertEqual(parse_json_response(text), {"a": 1, "b": 2})
+        self.assertEqual(parse_json_response(text, expected_type=list), [{"a": 1}, {"b": 2}])
+
+
+if __name__ == "__main__":
+    unittest.main()
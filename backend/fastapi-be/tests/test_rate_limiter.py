@@ -0,0 +1,73 @@
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+try:
+    import mongomock
+except ImportError:  # the limiters need a Mongo they can share
+    mongomock = None
+
+from ai.utils import rate_limiter
+from db import get_mongo_client as mongo
+from db.db_connection import MongoDBClient
+
+REQUESTS_PER_MINUTE = 600  # a burst of 600, then 10 a second
+
+
+@unittest.skipUnless(mongomock, "mongomock is not installed")
+class SharedBudgetTest(unittest.IsolatedAsyncioTestCase):
+    """Limiters of several processes (one instance each) drawing from one Mongo budget."""
+
+    def setUp(self):
+        client = MongoDBClient.__new__(MongoDBClient)
+        client.client = mongomock.MongoClient()
+        client.db = client.client["test"]
+        patch = mock.patch.object(mongo, "mogno_client", client)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def limiters(self, count: int, shared: bool):
+        return [rate_limiter.TokenBucketRateLimiter(REQUESTS_PER_MINUTE, 0, shared=shared) for _ in range(count)]
+
+    async def granted_within(self, limiters, seconds: float) -> int:
+        """Requests the limiters let through in `seconds`, each with callers asking as fast as it allows."""
+        granted = 0
+
+        async def caller(limiter):
+            nonlocal granted
+            while True:
+                await limiter.aacquire(1)
+                granted += 1
+
+        callers = [asyncio.create_task(caller(limiter)) for limiter in limiters for _ in range(4)]
+        await asyncio.sleep(seconds)
+        for task in callers:
+            task.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        return granted
+
+    async def test_processes_share_one_budget(self):
+        started = time.monotonic()
+        granted = await self.granted_within(self.limiters(4, shared=True), 1)
+        refill = (time.monotonic() - started) * REQUESTS_PER_MINUTE / 60
+        # Four processes with their own budgets could take 4 * 600 here.
+        self.assertLessEqual(granted, REQUESTS_PER_MINUTE + refill + 1)
+        self.assertGreater(granted, REQUESTS_PER_MINUTE / 2)
+
+    async def test_per_process_budgets_add_up(self):
+        # What the shared budget prevents: every process spends the whole limit.
+        granted = await self.granted_within(self.limiters(4, shared=False), 0.5)
+        self.assertGreaterEqual(granted, 4 * REQUESTS_PER_MINUTE)
+
+    async def test_pause_reaches_other_processes(self):
+        first, second = self.limiters(2, shared=True)
+        first.pause(0.5)
+        await asyncio.to_thread(first._writer.shutdown, wait=True)
+        started = time.monotonic()
+        await second.aacquire(1)
+        self.assertGreaterEqual(time.monotonic() - started, 0.4)
+
+
+if __name__ == "__main__":
+    unittest.main()
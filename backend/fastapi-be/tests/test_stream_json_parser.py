@@ -0,0 +1,36 @@
+import unittest
+
+from ai.utils.stream_json_parser import StreamingJSONParser, is_truncated_json, salvage_json
+
+
+def feed_in_pieces(text, size):
+    parser = StreamingJSONParser()
+    items = []
+    for start in range(0, len(text), size):
+        items += parser.feed(text[start:start + size])
+    return parser, items
+
+
+class StreamingJSONParserTest(unittest.TestCase):
+
+    def test_items_stream_from_the_answer_after_a_stray_brace(self):
+        text = 'Each item has an {id} field. Here: [{"id": 1}, {"id": 2}] done'
+        for size in (1, 4, len(text)):
+            parser, items = feed_in_pieces(text, size)
+            self.assertEqual(items, [{"id": 1}, {"id": 2}])
+            self.assertEqual(parser.root, "[")
+            self.assertTrue(parser.complete)
+
+    def test_closed_span_that_is_not_json_is_skipped(self):
+        parser, items = feed_in_pieces('{"x" oops} [{"a": 1}]', 3)
+        self.assertEqual(items, [{"a": 1}])
+        self.assertEqual(parser.answer, '[{"a": 1}]')
+
+    def test_salvage_and_truncation_skip_prose_brackets(self):
+        self.assertEqual(salvage_json('see [note] and [{"a": 1}, {"b"'), [{"a": 1}])
+        self.assertFalse(is_truncated_json("x {y} [1, 2]"))
+        self.assertTrue(is_truncated_json('{"a": [1'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import os
+import asyncio
+import unittest
+from unittest import mock
+
+try:
+    import mongomock
+except ImportError:  # the workers need a Mongo they can share
+    mongomock = None
+
+# Normally set in .env; required to import the test generation node the worker runs.
+os.environ.setdefault("MAX_TOKENS_PER_TEST_BATCH", "3000")
+
+import worker
+from jobs import task_queue
+from db import get_mongo_client as mongo
+from db.db_connection import MongoDBClient
+
+
+async def wait_until(predicate, timeout: float = 5):
+    async def poll():
+        while not await asyncio.to_thread(predicate):
+            await asyncio.sleep(0.02)
+    await asyncio.wait_for(poll(), timeout)
+
+
+@unittest.skipUnless(mongomock, "mongomock is not installed")
+class TwoWorkersTest(unittest.IsolatedAsyncioTestCase):
+    """Two Worker instances claiming from one tasks collection."""
+
+    def setUp(self):
+        client = MongoDBClient.__new__(MongoDBClient)
+        client.client = mongomock.MongoClient()
+        client.db = client.client["test"]
+        self.tasks = client.db[task_queue.TASKS_COLLECTION]
+        self.runs = []
+        self.release = asyncio.Event()
+        patches = [
+            mock.patch.object(mongo, "mogno_client", client),
+            mock.patch.object(task_queue, "TASK_LEASE_SECONDS", 0.3),
+            mock.patch.object(task_queue, "TASK_POLL_SECONDS", 0.05),
+            mock.patch.object(worker, "TASK_POLL_SECONDS", 0.05),
+            mock.patch.object(worker, "TASK_HANDLERS", {"probe": self.probe}),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    async def probe(self, payload):
+        """The first run of a task hangs until released; later runs answer at once."""
+        self.runs.append(payload["name"])
+        if payload.get("fail"):
+            raise RuntimeError("probe failed")
+        if self.runs.count(payload["name"]) == 1:
+            await self.release.wait()
+        return {"name": payload["name"], "run": self.runs.count(payload["name"])}
+
+    async def start(self, worker_id: str, heartbeat_seconds: float):
+        stop = asyncio.Event()
+        heartbeat = mock.patch.object(worker, "TASK_HEARTBEAT_SECONDS", heartbeat_seconds)
+        heartbeat.start()
+        self.addCleanup(heartbeat.stop)
+        instance = worker.Worker(worker_id, kinds=["probe"], concurrency=1)
+        running = asyncio.create_task(instance.run(stop))
+
+        async def shutdown():
+            stop.set()
+            self.release.set()
+            await running
+        self.addAsyncCleanup(shutdown)
+        return instance
+
+    def task(self, task_id):
+        return self.tasks.find_one({"_id": task_id})
+
+    async def test_expired_lease_is_taken_over(self):
+        task_id = task_queue.enqueue_task("probe", {"name": "t"})
+        # Never heartbeats in time: to the queue it looks like a dead worker.
+        first = await self.start("first", heartbeat_seconds=60)
+        await wait_until(lambda: self.task(task_id)["worker"] == "first")
+        second = await self.start("second", heartbeat_seconds=60)
+
+        results = await asyncio.wait_for(task_queue.wait_for_tasks([task_id]), 5)
+        self.assertEqual(results[task_id], {"name": "t", "run": 2})
+        task = self.task(task_id)
+        self.assertEqual((task["status"], task["worker"], task["attempts"]), (task_queue.COMPLETED, "second", 2))
+
+        # The first worker finishing late does not overwrite the result.
+        self.release.set()
+        await wait_until(lambda: len(self.runs) == 2 and first.completed == 0 and second.completed == 1)
+        await asyncio.sleep(0.1)
+        self.assertEqual(first.completed, 0)
+        self.assertEqual(self.task(task_id)["result"], {"name": "t", "run": 2})
+
+    async def test_heartbeats_keep_the_lease(self):
+        task_id = task_queue.enqueue_task("probe", {"name": "t"})
+        first = await self.start("first", heartbeat_seconds=0.05)
+        await wait_until(lambda: self.task(task_id)["worker"] == "first")
+        await self.start("second", heartbeat_seconds=0.05)
+
+        await asyncio.sleep(1)  # several lease lengths
+        self.release.set()
+        await asyncio.wait_for(task_queue.wait_for_tasks([task_id]), 5)
+        task = self.task(task_id)
+        self.assertEqual((task["worker"], task["attempts"]), ("first", 1))
+        self.assertEqual(first.completed, 1)
+        self.assertEqual(self.runs, ["t"])
+
+    async def test_failed_task_cancels_its_siblings(self):
+        with mock.patch.object(task_queue, "TASK_MAX_ATTEMPTS", 1):
+            sibling = task_queue.enqueue_task("probe", {"name": "sibling"})
+            failing = task_queue.enqueue_task("probe", {"name": "failing", "fail": True})
+            queued = task_queue.enqueue_task("probe", {"name": "queued"})
+            first = await self.start("first", heartbeat_seconds=0.05)
+            await wait_until(lambda: self.task(sibling)["worker"] == "first")
+            second = await self.start("second", heartbeat_seconds=0.05)
+
+            with self.assertRaises(task_queue.TaskFailed):
+                await asyncio.wait_for(task_queue.wait_for_tasks([sibling, failing, queued]), 5)
+
+            self.assertEqual(self.task(failing)["status"], task_queue.FAILED)
+            for task_id in [sibling, queued]:
+                self.assertEqual(self.task(task_id)["status"], task_queue.CANCELLED)
+            # Runs of cancelled tasks (the second worker may have claimed "queued" before
+            # the waiter saw the failure) stop at their next heartbeat instead of completing.
+            await asyncio.sleep(0.3)
+            self.release.set()
+            await asyncio.sleep(0.2)
+            self.assertEqual((first.completed, second.completed), (0, 0))
+
+    async def test_cancelled_waiter_cancels_its_tasks(self):
+        task_ids = [task_queue.enqueue_task("probe", {"name": name}) for name in ["a", "b"]]
+        await self.start("first", heartbeat_seconds=0.05)
+        await wait_until(lambda: self.task(task_ids[0])["worker"] == "first")
+
+        waiter = asyncio.create_task(task_queue.wait_for_tasks(task_ids))
+        await asyncio.sleep(0.1)
+        waiter.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+        self.assertEqual([self.task(task_id)["status"] for task_id in task_ids], [task_queue.CANCELLED] * 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
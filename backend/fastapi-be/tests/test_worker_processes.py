@@ -0,0 +1,125 @@
+import os
+import sys
+import time
+import uuid
+import asyncio
+import subprocess
+import unittest
+from unittest import mock
+
+from pymongo import MongoClient
+
+# Normally set in .env; required to import the task queue's callers.
+os.environ.setdefault("MAX_TOKENS_PER_TEST_BATCH", "3000")
+
+from jobs import task_queue
+from db import get_mongo_client as mongo
+from db.db_connection import MongoDBClient
+
+# A real mongod the worker processes can share, e.g. mongodb://localhost:27017.
+TEST_MONGO_URI = os.getenv("TEST_MONGO_URI")
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUB_WORKER = os.path.join(BACKEND_DIR, "tests", "llm_stub_worker.py")
+
+
+def mongod_available() -> bool:
+    if not TEST_MONGO_URI:
+        return False
+    try:
+        with MongoClient(TEST_MONGO_URI, serverSelectionTimeoutMS=2000) as client:
+            client.admin.command("ping")
+        return True
+    except Exception:
+        return False
+
+
+@unittest.skipUnless(mongod_available(), "TEST_MONGO_URI does not point at a running mongod")
+class WorkerProcessesTest(unittest.IsolatedAsyncioTestCase):
+    """Separate `worker.py` processes, with a stand-in LLM, sharing one task queue and LLM budget."""
+
+    def setUp(self):
+        self.db_name = f"test_workers_{uuid.uuid4().hex[:8]}"
+        client = MongoDBClient(TEST_MONGO_URI, self.db_name)
+        self.addCleanup(client.client.close)
+        self.addCleanup(client.client.drop_database, self.db_name)
+        patches = [
+            mock.patch.object(mongo, "mogno_client", client),
+            mock.patch.object(task_queue, "TASK_POLL_SECONDS", 0.05),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.calls = client.db["llm_stub_calls"]
+        self.started = client.db["llm_stub_workers"]
+
+    async def start_workers(self, count: int, **env):
+        """Starts `count` stub worker processes, waits until they are all up and returns a function stopping them."""
+        environment = {
+            **os.environ,
+            "PYTHONPATH": BACKEND_DIR,
+            "MONGO_URI": TEST_MONGO_URI,
+            "MONGO_DB_NAME": self.db_name,
+            "TASK_QUEUE_ENABLED": "true",
+            "TASK_POLL_SECONDS": "0.05",
+            "LLM_CACHE_ENABLED": "false",
+            "EXTRACTION_CACHE_ENABLED": "false",
+            "TOKENIZER_MODE": "approximate",
+            "LLM_TOKENS_PER_MINUTE": "0",
+            "LLM_STREAMING": "false",
+            **env,
+        }
+        workers = [
+            subprocess.Popen([sys.executable, STUB_WORKER, "--concurrency", "1", "--kinds", "extract_batch"], cwd=BACKEND_DIR,
+                             env=environment, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            for _ in range(count)
+        ]
+
+        def stop():
+            for process in workers:
+                process.kill()
+                process.wait()
+        self.addCleanup(stop)
+
+        started = time.monotonic()
+        while self.started.count_documents({"pid": {"$in": [process.pid for process in workers]}}) < count:
+            self.assertLess(time.monotonic() - started, 60, "worker processes did not start")
+            await asyncio.sleep(0.1)
+        return stop
+
+    def enqueue_batches(self, count: int):
+        chunks = [{"file_name": f"app/r{i}.py", "language": "python", "code": f"@router.get('/r{i}')\ndef r{i}():\n    return {i}\n"} for i in range(count)]
+        return [
+            task_queue.enqueue_task("extract_batch", {"language": "python", "batch": [chunk], "batch_index": i, "batch_count": count})
+            for i, chunk in enumerate(chunks)
+        ]
+
+    async def run_batches(self, workers: int, batches: int, **env) -> float:
+        """Seconds `workers` started processes take to extract `batches` one-chunk batches."""
+        stop = await self.start_workers(workers, **env)
+        started = time.monotonic()
+        task_ids = self.enqueue_batches(batches)
+        await asyncio.wait_for(task_queue.wait_for_tasks(task_ids), 120)
+        elapsed = time.monotonic() - started
+        stop()
+        return elapsed
+
+    async def test_throughput_scales_with_workers(self):
+        latency = {"LLM_STUB_LATENCY_SECONDS": "0.5", "LLM_REQUESTS_PER_MINUTE": "0"}
+        one = await self.run_batches(1, 12, **latency)
+        four = await self.run_batches(4, 12, **latency)
+        # 12 calls of 0.5s: about 6s for one worker, about 1.5s for four.
+        self.assertLess(four, one / 2.5)
+
+    async def test_workers_share_the_request_budget(self):
+        # A burst of 60 requests, then one a second, for all processes together.
+        await self.run_batches(4, 66, LLM_REQUESTS_PER_MINUTE="60", LLM_RATE_LIMIT_SHARED="true")
+        times = sorted(call["at"] for call in self.calls.find())
+        self.assertEqual(len(times), 66)
+        self.assertEqual(len({call["pid"] for call in self.calls.find()}), 4)
+        in_burst = sum(1 for at in times if at - times[0] < 3)
+        self.assertLessEqual(in_burst, 60 + 3)
+        self.assertGreaterEqual(times[-1] - times[0], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
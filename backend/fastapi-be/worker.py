@@ -0,0 +1,130 @@
+# worker.py
+import argparse
+import asyncio
+import os
+import socket
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ai.api_extractor.agents.ExtractOpenAPIPythonNode import ExctractOpenAPIPythonNode
+from ai.api_extractor.agents.ExtractOpenAPIJSNode import ExtractOpenAPIJSNode
+from ai.test_case_generation.agents.TestGenerationNode import TestGenerationNode
+from jobs.task_queue import (
+    claim_task, heartbeat_task, complete_task, fail_task, expire_tasks, run_node_for_task,
+    TASK_HEARTBEAT_SECONDS, TASK_POLL_SECONDS
+)
+from configs.logger import get_custom_logger
+
+logger = get_custom_logger(__name__)
+
+# Tasks one worker process runs at once.
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", 2))
+
+EXTRACTION_NODES = {
+    "python": ExctractOpenAPIPythonNode,
+    "javascript": ExtractOpenAPIJSNode,
+    "typescript": ExtractOpenAPIJSNode,
+}
+
+
+async def extract_batch(payload: Dict) -> Dict[str, Any]:
+    """One extraction batch, as sent to extract_python_endpoints / extract_js_endpoints."""
+    return await run_node_for_task(EXTRACTION_NODES[payload["language"]], payload)
+
+
+async def generate_test_batch(payload: Dict) -> Dict[str, Any]:
+    """Test cases for one batch of endpoint collections."""
+    result = await run_node_for_task(TestGenerationNode, payload)
+    # Only what the API side aggregates; the node echoes its whole input state.
+    result["update"] = {key: result["update"].get(key) for key in ["test_cases", "metrics"]}
+    return result
+
+
+TASK_HANDLERS: Dict[str, Callable[[Dict], Awaitable[Dict[str, Any]]]] = {
+    "extract_batch": extract_batch,
+    "test_batch": generate_test_batch,
+}
+
+
+class Worker:
+    """
+    Claims tasks from the Mongo task queue and runs them, up to `concurrency` at a
+    time. Each claimed task is heartbeated while it runs; if this process dies its
+    lease expires and another worker picks the task up again. A run whose task was
+    cancelled or taken over is stopped at its next heartbeat. The LLM calls of all
+    workers draw from one rate budget kept in Mongo (LLM_RATE_LIMIT_SHARED, on with
+    the task queue), so adding workers does not multiply the provider limit.
+    """
+
+    def __init__(self, worker_id: Optional[str] = None, kinds: Optional[List[str]] = None, concurrency: int = WORKER_CONCURRENCY):
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.kinds = kinds or list(TASK_HANDLERS)
+        self.concurrency = concurrency
+        self.completed = 0
+        self.failed = 0
+
+    async def _heartbeat(self, task_id: str, run: asyncio.Task):
+        while True:
+            await asyncio.sleep(TASK_HEARTBEAT_SECONDS)
+            if not await asyncio.to_thread(heartbeat_task, task_id, self.worker_id):
+                logger.warning(f"{self.worker_id}: lost the lease on task {task_id}, stopping it.")
+                run.cancel()
+                return
+
+    async def _handle(self, task: Dict):
+        run = asyncio.create_task(TASK_HANDLERS[task["kind"]](task["payload"]))
+        heartbeat = asyncio.create_task(self._heartbeat(task["_id"], run))
+        try:
+            logger.info(f"{self.worker_id}: running {task['kind']} task {task['_id']} (attempt {task['attempts']}).")
+            result = await run
+            if await asyncio.to_thread(complete_task, task["_id"], self.worker_id, result):
+                self.completed += 1
+            else:
+                logger.warning(f"{self.worker_id}: task {task['_id']} was taken over or cancelled, result discarded.")
+        except asyncio.CancelledError:
+            # The heartbeat only ends by itself when the lease is lost.
+            if not heartbeat.done() or heartbeat.cancelled():
+                raise
+            # Stopped by the heartbeat: the task is no longer ours to finish or fail.
+        except Exception as e:
+            logger.error(f"{self.worker_id}: {task['kind']} task {task['_id']} failed: {e}")
+            self.failed += 1
+            await asyncio.to_thread(fail_task, task, self.worker_id, str(e))
+        finally:
+            heartbeat.cancel()
+            run.cancel()
+
+    async def run(self, stop: Optional[asyncio.Event] = None):
+        """Claims and runs tasks until `stop` is set (forever without one)."""
+        stop = stop or asyncio.Event()
+        slots = asyncio.Semaphore(self.concurrency)
+        running = set()
+        logger.info(f"Worker {self.worker_id} started for {self.kinds} with concurrency {self.concurrency}.")
+        while not stop.is_set():
+            await slots.acquire()
+            task = await asyncio.to_thread(claim_task, self.worker_id, self.kinds)
+            if task is None:
+                slots.release()
+                await asyncio.to_thread(expire_tasks)
+                try:
+                    await asyncio.wait_for(stop.wait(), TASK_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            handler = asyncio.create_task(self._handle(task))
+            running.add(handler)
+            handler.add_done_callback(lambda done: (running.discard(done), slots.release()))
+        await asyncio.gather(*running, return_exceptions=True)
+        logger.info(f"Worker {self.worker_id} stopped after {self.completed} tasks ({self.failed} failed attempts).")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued extraction and test generation tasks.")
+    parser.add_argument("--concurrency", type=int, default=WORKER_CONCURRENCY, help="Tasks run at once by this process.")
+    parser.add_argument("--kinds", nargs="+", choices=list(TASK_HANDLERS), help="Task kinds to claim (default: all).")
+    args = parser.parse_args()
+    asyncio.run(Worker(kinds=args.kinds, concurrency=args.concurrency).run())
+
+
+if __name__ == "__main__":
+    main()